@@ -1,315 +1,242 @@
-import streamlit as st
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import re
-from difflib import get_close_matches
-import unicodedata
 import os
-from io import StringIO
-import matplotlib.pyplot as plt
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
+import uuid
 
-# ===== Parâmetros globais =====
-TOLERANCIA = 1e-6
-VALOR_MIN = 0.045
-VALOR_MAX = 0.275
-ODD_MIN = 1.425
-ODD_MAX = 3.15
+import streamlit as st
+import pandas as pd
 
-BASE_URL = "https://www.tennisexplorer.com"
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-HISTORICO_CSV = os.path.join(BASE_DIR, "historico_apostas.csv")
+from tennis_value import (
+    analise, cliente_http, identidades, metricas, perfil, ratings, scrapers, simulacao, voo_unico,
+)
+from tennis_value.cache_disco import politica
+from tennis_value.monitor_odds import INTERVALO_MIN, MonitorOdds
+from tennis_value.odds_historico import registo_padrao
+from tennis_value.historico import RESULTADO_PENDENTE, livro_padrao, lucro_acumulado_mensal, resumo_desempenho
+from tennis_value.precos import (
+    ODD_MAX, ODD_MIN, TOLERANCIA, VALOR_MAX, VALOR_MIN,
+    avaliar_arrays, mudancas_de_valor,
+)
+from tennis_value.ratings import PlayerRatings
 
 superficies_map = {"Piso Duro": "Hard", "Terra": "Clay", "Relva": "Grass"}
 
-TORNEIOS_ATP_PERMITIDOS = [
-    "Acapulco", "Adelaide", "Adelaide 2", "Almaty", "Antwerp", "Astana", "Atlanta", "ATP Cup",
-    "Auckland", "Australian Open", "Banja Luka", "Barcelona", "Basel", "Bastad", "Beijing",
-    "Belgrade", "Belgrade 2", "Brisbane", "Bucharest", "Buenos Aires", "Chengdu", "Cincinnati",
-    "Cordoba", "Dallas", "Delray Beach", "Doha", "Dubai", "Eastbourne", "Estoril", "Florence",
-    "French Open", "Geneva", "Gijon", "Gstaad", "Halle", "Hamburg", "Hangzhou",
-    "Hertogenbosch", "Hong Kong ATP", "Houston", "Indian Wells", "Kitzbühel", "Los Cabos",
-    "Lyon", "Madrid", "Mallorca", "Marrakech", "Marseille", "Masters Cup ATP", "Melbourne Summer Set 1",
-    "Metz", "Miami", "Monte Carlo", "Montpellier", "Montreal", "Moscow", "Munich", "Napoli",
-    "Newport", "Next Gen ATP Finals", "Paris", "Parma", "Pune", "Queen's Club", "Rio de Janeiro",
-    "Rome", "Rotterdam", "Saint Petersburg", "San Diego", "Santiago", "Seoul", "Shanghai",
-    "Sofia", "Stockholm", "Stuttgart", "Sydney", "Tel Aviv", "Tokyo (Japan Open)", "Toronto",
-    "Umag", "United Cup", "US Open", "Vienna", "Washington", "Wimbledon", "Winston Salem", "Zhuhai"
-]
-
-TORNEIOS_WTA_PERMITIDOS = [
-    "Abu Dhabi WTA", "Adelaide", "Adelaide 2", "Andorra WTA", "Angers WTA", "Antalya 2 WTA", "Antalya 3 WTA",
-    "Antalya WTA", "Auckland", "Austin", "Australian Open", "Bad Homburg WTA", "Bari WTA", "Barranquilla",
-    "Bastad WTA", "Beijing", "Belgrade", "Belgrade WTA", "Berlin", "Birmingham", "Bogotá WTA", "Bol WTA", "Brisbane",
-    "Bucharest 2 WTA", "Budapest 2 WTA", "Budapest WTA", "Buenos Aires WTA", "Cali", "Cancún WTA", "Charleston",
-    "Charleston 2", "Charleston 3", "Charleston 4", "Chennai WTA", "Chicago 2 WTA", "Chicago 3 WTA", "Chicago WTA",
-    "Cincinnati WTA", "Cleveland WTA", "Cluj-Napoca 2 WTA", "Cluj-Napoca WTA", "Colina WTA", "Columbus WTA",
-    "Concord WTA", "Contrexeville WTA", "Courmayeur WTA", "Doha", "Dubai", "Eastbourne", "Florence WTA",
-    "Florianopolis WTA", "French Open", "Gaiba WTA", "Gdynia", "Grado", "Granby WTA", "Guadalajara 2 WTA",
-    "Guadalajara WTA", "Guangzhou", "Hamburg WTA", "Hertogenbosch", "Hobart", "Hong Kong 2 WTA", "Hong Kong WTA",
-    "Hua Hin 2 WTA", "Hua Hin WTA", "Iasi WTA", "Ilkley WTA", "Indian Wells", "Istanbul WTA", "Jiujiang",
-    "Karlsruhe", "Kozerki", "La Bisbal", "Lausanne", "Limoges", "Linz", "Livesport Prague Open", "Ljubljana WTA",
-    "Lleida", "Luxembourg WTA", "Lyon WTA", "Madrid WTA", "Makarska", "Marbella WTA", "Mérida", "Miami",
-    "Midland WTA", "Monastir", "Monterrey", "Montevideo WTA", "Montreal WTA", "Montreux WTA", "Moscow", "Mumbai WTA",
-    "Newport Beach WTA", "Ningbo WTA", "Nottingham", "Nur-Sultan WTA", "Osaka WTA", "Ostrava WTA", "Palermo",
-    "Paris WTA", "Parma", "Porto WTA", "Portoroz WTA", "Puerto Vallarta", "Queen's Club", "Rabat", "Reus WTA",
-    "Rome 2 WTA", "Rome WTA", "Rouen WTA", "Saint Petersburg WTA", "Saint-Malo WTA", "San Diego", "San Jose WTA",
-    "San Luis Potosi WTA", "Santa Cruz WTA", "Seoul WTA", "Singapore WTA", "Stanford WTA", "Strasbourg", "Stuttgart",
-    "Sydney", "Tallinn", "Tampico WTA", "Tenerife WTA", "Tokyo", "Toronto WTA", "US Open", "Valencia WTA",
-    "Vancouver WTA", "Warsaw 2 WTA", "Warsaw WTA", "Washington", "Wimbledon", "Wuhan", "Zhengzhou 2 WTA"
-]
-
-def limpar_numero_ranking(nome):
-    return re.sub(r"\s*\(\d+\)", "", nome or "").strip()
-
-def ajustar_nome(nome_raw):
-    nome_raw = nome_raw or ""
-    nome_sem_profile = nome_raw.replace(" - profile", "").strip()
-    partes = nome_sem_profile.split(" - ")
-    if len(partes) == 2:
-        return f"{partes[1].strip()} {partes[0].strip()}"
-    return nome_sem_profile
-
-def reorganizar_nome(nome):
-    partes = (nome or "").strip().split()
-    if len(partes) == 2:
-        return f"{partes[1]} {partes[0]}"
-    elif len(partes) == 3:
-        return f"{partes[2]} {partes[0]} {partes[1]}"
-    else:
-        return nome or ""
+def botao_perfil(resultado):
+    st.caption(f"Perfil do último rerun perfilado: {resultado['segundos']:.2f}s")
+    if resultado["caminho"]:
+        with open(resultado["caminho"], "rb") as f:
+            st.download_button("⬇️ Perfil (.pstats)", data=f.read(),
+                               file_name=os.path.basename(resultado["caminho"]),
+                               mime="application/octet-stream")
+    st.download_button("⬇️ Resumo (.txt)", data=resultado["texto"].encode("utf-8"),
+                       file_name="perfil.txt", mime="text/plain")
+
+# Perfil de um rerun completo (?perfil=1 ou TENNIS_PERFIL=1): o resto do script corre uma vez sob
+# cProfile, dentro de perfilar_script, e esta execução termina logo a seguir
+if not perfil.a_perfilar() and perfil.pedido(st.query_params):
+    st.query_params.pop(perfil.PARAMETRO, None)
+    perfil.perfilar_script(__file__, lambda resultado: st.session_state.__setitem__("perfil_ultimo", resultado))
+    with st.sidebar:
+        botao_perfil(st.session_state["perfil_ultimo"])
+    st.stop()
 
-def normalizar_nome(nome):
-    nome = nome or ""
-    s = "".join(c for c in unicodedata.normalize("NFD", nome) if unicodedata.category(c) != "Mn")
-    return s.strip().casefold()
+# Validade e número de entradas das caches do Streamlit seguem as políticas de cada fonte
+POLITICA_TORNEIOS = politica("torneios")
+POLITICA_ODDS = politica("odds")
+POLITICA_RATINGS = politica("ratings")
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(show_spinner=False, ttl=POLITICA_TORNEIOS.ttl, max_entries=POLITICA_TORNEIOS.max_entradas)
 def obter_torneios(tipo="ATP"):
     try:
-        url = f"{BASE_URL}/matches/"
-        r = requests.get(url)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.content, "html.parser")
-        torneios = []
-        permitidos = TORNEIOS_ATP_PERMITIDOS if tipo == "ATP" else TORNEIOS_WTA_PERMITIDOS
-        nomes_permitidos = [t.casefold() for t in permitidos]
-        for a in soup.find_all("a", href=True):
-            nome = a.text.strip()
-            href = a["href"]
-            if tipo == "ATP" and ("/atp" in href or "/atp-men" in href):
-                if nome.casefold() in nomes_permitidos:
-                    url_full = BASE_URL + href if href.startswith("/") else href
-                    if url_full not in {t["url"] for t in torneios}:
-                        torneios.append({"nome": nome, "url": url_full})
-            elif tipo == "WTA" and ("/wta" in href or "/wta-women" in href):
-                if nome.casefold() in nomes_permitidos:
-                    url_full = BASE_URL + href if href.startswith("/") else href
-                    if url_full not in {t["url"] for t in torneios}:
-                        torneios.append({"nome": nome, "url": url_full})
-        return torneios
+        return scrapers.obter_torneios(tipo)
     except Exception as e:
         st.error(f"Erro ao obter torneios {tipo}: {e}")
         return []
 
-@st.cache_data(show_spinner=False)
-def obter_nome_completo(url_jogador):
-    if not url_jogador:
-        return None
-    try:
-        r = requests.get(url_jogador, timeout=15)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.content, "html.parser")
-        h1 = soup.find("h1")
-        if h1:
-            return re.sub(r"\s+", " ", h1.get_text(strip=True))
-    except:
-        return None
-    return None
-
-@st.cache_data(show_spinner=False)
-def obter_jogos_do_torneio(url_torneio):
-    jogos = []
-    r = requests.get(url_torneio)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.content, "html.parser")
-    tables = soup.select("table")
-    if not tables:
-        return jogos
-    jogador_map = {}
-    for a in soup.select("a[href^='/player/']"):
-        n = a.text.strip()
-        u = BASE_URL + a["href"] if a["href"].startswith("/") else a["href"]
-        jogador_map[n] = u
-    for table in tables:
-        tbody = table.find("tbody")
-        if not tbody:
-            continue
-        for tr in tbody.find_all("tr"):
-            tds = tr.find_all("td")
-            if len(tds) < 7:
-                continue
-            confronto = tds[2].text.strip()
-            try:
-                odd_a = float(tds[5].text.strip())
-                odd_b = float(tds[6].text.strip())
-            except:
-                odd_a = None
-                odd_b = None
-            parts = confronto.split("-")
-            if len(parts) != 2:
-                continue
-            p1, p2 = map(lambda s: limpar_numero_ranking(s.strip()), parts)
-            url1 = jogador_map.get(p1)
-            url2 = jogador_map.get(p2)
-            nome1 = obter_nome_completo(url1) or p1
-            nome2 = obter_nome_completo(url2) or p2
-            nome1 = reorganizar_nome(ajustar_nome(nome1))
-            nome2 = reorganizar_nome(ajustar_nome(nome2))
-            jogos.append(
-                {
-                    "label": f"{nome1} vs {nome2}",
-                    "jogador_a": nome1,
-                    "jogador_b": nome2,
-                    "odd_a": odd_a,
-                    "odd_b": odd_b,
-                }
-            )
-        if jogos:
-            break
+@st.cache_resource(show_spinner=False)
+def obter_registo_odds():
+    return registo_padrao()
+
+@st.cache_data(show_spinner=False, ttl=POLITICA_ODDS.ttl, max_entries=POLITICA_ODDS.max_entradas)
+def obter_jogos_do_torneio(url_torneio, torneio=None, competicao=None):
+    jogos = scrapers.obter_jogos_do_torneio(url_torneio)
+    registo = obter_registo_odds()
+    if registo is not None and jogos:
+        try:
+            registo.registar(url_torneio, jogos, torneio, competicao)
+        except Exception:
+            pass
     return jogos
 
-def obter_elo_table(tipo="ATP"):
-    url = (
-        "https://tennisabstract.com/reports/atp_elo_ratings.html"
-        if tipo == "ATP"
-        else "https://tennisabstract.com/reports/wta_elo_ratings.html"
-    )
+# Um único monitor de odds por processo, partilhado por todas as sessões
+@st.cache_resource(show_spinner=False)
+def obter_monitor_odds():
+    monitor = MonitorOdds(registo=obter_registo_odds())
+    monitor.iniciar()
+    return monitor
+
+# Vista Elo + yElo (e índice de nomes) construída uma vez por carregamento das tabelas (ver btn_atualizar_ratings)
+# e partilhada, só de leitura, por todas as sessões. As tabelas lidas não passam por st.cache_data: cada
+# sessão receberia a sua cópia desserializada; a cache HTTP já guarda o resultado do parsing.
+@st.cache_resource(show_spinner=False, ttl=POLITICA_RATINGS.ttl, max_entries=POLITICA_RATINGS.max_entradas)
+def ratings_jogadores(tipo="ATP"):
     try:
-        r = requests.get(url, timeout=20)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.content, "html.parser")
-        dfs = pd.read_html(StringIO(str(soup)), flavor="bs4")
-        for df in dfs:
-            cols = [str(c).strip() for c in df.columns]
-            if "Player" in cols:
-                df.columns = cols
-                df = df.dropna(subset=["Player"])
-                return df
+        elo_df = ratings.obter_elo_table(tipo)
+        yelo_df = ratings.obter_yelo_table(tipo)
     except Exception as e:
-        st.error(f"Erro ao obter Elo table {tipo}: {e}")
+        st.error(f"Erro ao obter bases Elo/yElo {tipo}: {e}")
         return None
-
-def obter_yelo_table(tipo="ATP"):
-    url = (
-        "https://tennisabstract.com/reports/atp_season_yelo_ratings.html"
-        if tipo == "ATP"
-        else "https://tennisabstract.com/reports/wta_season_yelo_ratings.html"
-    )
-    try:
-        r = requests.get(url, timeout=20)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.content, "html.parser")
-        dfs = pd.read_html(StringIO(str(soup)), flavor="bs4")
-        for df in dfs:
-            cols = [str(c).strip().lower() for c in df.columns]
-            if "player" in cols and "yelo" in cols:
-                df.columns = cols
-                df = df.dropna(subset=["player"])
-                df = df.rename(columns={"player": "Player", "yelo": "yElo"})
-                return df[["Player", "yElo"]]
-    except Exception as e:
-        st.error(f"Erro ao obter yElo table {tipo}: {e}")
+    if elo_df is None or yelo_df is None or elo_df.empty or yelo_df.empty:
         return None
-
-@st.cache_data(show_spinner=False)
-def cache_elo(tipo="ATP"):
-    return obter_elo_table(tipo)
-
-@st.cache_data(show_spinner=False)
-def cache_yelo(tipo="ATP"):
-    return obter_yelo_table(tipo)
-
-def elo_prob(elo_a, elo_b):
-    return 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
-
-def value_bet(prob, odd):
-    return prob * odd - 1
-
-def stake_por_faixa(valor):
-    if valor < VALOR_MIN or valor > VALOR_MAX:
-        return 0.0
-    elif valor < 0.11:
-        return 5.0
-    elif valor < 0.18:
-        return 7.5
-    else:
-        return 10.0
-
-def encontrar_yelo(nome, yelo_df):
-    nrm_nome = normalizar_nome(nome)
-    ys = yelo_df["Player"].dropna().tolist()
-    nrm_ys = [normalizar_nome(x) for x in ys]
-    for idx, val in enumerate(nrm_ys):
-        if val == nrm_nome:
-            return yelo_df.iloc[idx]["yElo"]
-    matches = get_close_matches(nrm_nome, nrm_ys, n=1, cutoff=0.8)
-    if matches:
-        idx = nrm_ys.index(matches[0])
-        return yelo_df.iloc[idx]["yElo"]
-    return None
-
-def match_nome(nome, df_col):
-    nome_norm = normalizar_nome(nome)
-    df_norm = df_col.dropna().apply(normalizar_nome)
-    exact_match = df_norm[df_norm == nome_norm]
-    if not exact_match.empty:
-        return exact_match.index[0]
-    matches = get_close_matches(nome_norm, df_norm.tolist(), n=1, cutoff=0.8)
-    if matches:
-        return df_norm[df_norm == matches[0]].index[0]
-    return None
-
-def elo_por_superficie(df_jogador, superficie_en):
-    col_map = {"Hard": "hElo", "Clay": "cElo", "Grass": "gElo"}
-    try:
-        return float(df_jogador[col_map[superficie_en]])
-    except:
-        return float(df_jogador.get("Elo", 1500))
-
-def carregar_historico():
-    if os.path.exists(HISTORICO_CSV):
-        try:
-            df = pd.read_csv(HISTORICO_CSV)
-            if "data" in df.columns:
-                df["data"] = df["data"].astype(str)
-            if "valor_apostado" in df.columns:
-                df = df.drop(columns=["valor_apostado"])
-            return df
-        except:
-            return pd.DataFrame()
-    return pd.DataFrame()
-
-def salvar_historico(df):
-    if "valor_apostado" in df.columns:
-        df = df.drop(columns=["valor_apostado"])
-    df.to_csv(HISTORICO_CSV, index=False)
-
-def calcular_retorno(aposta):
-    resultado = aposta.get("resultado", "")
-    valor = float(aposta.get("stake", 0.0))
-    odd = float(aposta.get("odd", 0.0))
-    if resultado == "ganhou":
-        return valor * odd
-    elif resultado == "cashout":
-        return valor * 0.5
-    else:
-        return 0.0
+    with metricas.medir("indice_ratings"):
+        return PlayerRatings(elo_df, yelo_df, identidades=identidades.mapa_padrao())
+
+# Avaliações por jogo partilhadas por todas as sessões (ver tennis_value/analise.py)
+@st.cache_resource(show_spinner=False)
+def obter_memo_analise():
+    return analise.MemoAnalise()
+
+def tabela_analise_automatica(av):
+    def sugestao(jogador, odd, especial):
+        texto = jogador + " +1.5 sets (odd: " + odd.map("{:.2f}".format) + ")"
+        return texto.where(especial, "")
+
+    return pd.DataFrame({
+        "Jogo": av["jogador_a"] + " vs " + av["jogador_b"],
+        "Odd A": av["odd_a"],
+        "Odd B": av["odd_b"],
+        "Valor A %": (av["valor_a"] * 100).map("{:.1f}%".format),
+        "Valor B %": (av["valor_b"] * 100).map("{:.1f}%".format),
+        "Stake A (€)": av["stake_a"].map("{:.2f}".format),
+        "Stake B (€)": av["stake_b"].map("{:.2f}".format),
+        "Valor A (raw)": av["valor_a"],
+        "Valor B (raw)": av["valor_b"],
+        "Jogador A": av["jogador_a"],
+        "Jogador B": av["jogador_b"],
+        "Stake A raw": av["stake_a"],
+        "Stake B raw": av["stake_b"],
+        "Odd A raw": av["odd_a"],
+        "Odd B raw": av["odd_b"],
+        "Prob A raw": av["prob_a"],
+        "Prob B raw": av["prob_b"],
+        "Sugestão Especial A": sugestao(av["jogador_a"], av["odd_mais15_a"], av["especial_a"]),
+        "Odd +1.5 Sets A": av["odd_mais15_a"].astype(object).where(av["especial_a"], ""),
+        "Flag especial A": av["especial_a"],
+        "Sugestão Especial B": sugestao(av["jogador_b"], av["odd_mais15_b"], av["especial_b"]),
+        "Odd +1.5 Sets B": av["odd_mais15_b"].astype(object).where(av["especial_b"], ""),
+        "Flag especial B": av["especial_b"],
+    })
+
+# Livro de apostas partilhado por todas as sessões; cada sessão só recarrega quando a versão muda
+@st.cache_resource
+def obter_livro_apostas():
+    return livro_padrao()
+
+# A sessão só guarda o total e os agregados; as apostas são lidas página a página (ver aba Histórico)
+def atualizar_historico_sessao():
+    livro = obter_livro_apostas()
+    versao = livro.versao()
+    if st.session_state.get("historico_versao") != versao:
+        with metricas.medir("historico"):
+            st.session_state["historico_total"] = livro.contar()
+            agregados = livro.agregados()
+            st.session_state["historico_desempenho"] = (resumo_desempenho(agregados), lucro_acumulado_mensal(agregados))
+        st.session_state["historico_versao"] = versao
+
+# CSV completo só quando o livro muda (e não a cada rerun)
+@st.cache_data(show_spinner=False, max_entries=2)
+def csv_historico(versao):
+    return obter_livro_apostas().listar().to_csv(index=False).encode("utf-8")
+
+def registar_aposta(aposta):
+    with metricas.medir("historico"):
+        obter_livro_apostas().inserir(aposta)
+    atualizar_historico_sessao()
+
+def painel_diagnostico(medicoes):
+    # Tempos e contadores deste rerun, por etapa (as etapas servidas pelas caches do Streamlit não aparecem)
+    with st.sidebar.expander("🩺 Diagnóstico deste rerun", expanded=False):
+        tabela = pd.DataFrame(medicoes.tabela())
+        if tabela.empty:
+            st.caption("Nenhuma etapa executada: tudo veio das caches.")
+        else:
+            tabela["KiB"] = (tabela.pop("bytes") / 1024).round(1)
+            st.dataframe(tabela, hide_index=True)
+        st.caption(f"Rerun: {medicoes.duracao():.2f}s")
+        voos = voo_unico.estatisticas()
+        st.caption(f"Processo: {voos['executados']} pedidos executados, {voos['partilhados']} partilhados "
+                   f"entre sessões, {voos['em_voo']} em curso")
+        memo = obter_memo_analise().estatisticas()
+        st.caption(f"Análise: {memo['jogos']} jogos memorizados, {memo['acertos']} reaproveitados, "
+                   f"{memo['calculados']} calculados")
+        if "perfil_ultimo" in st.session_state:
+            botao_perfil(st.session_state["perfil_ultimo"])
+
+def painel_simulacao(livro, avaliacao_auto):
+    # Simulação Monte Carlo da banca (opcional: só corre quando pedida, o resultado fica na sessão)
+    with st.expander("🎲 Simulação de banca (Monte Carlo)", expanded=False):
+        fontes = ["Apostas registadas", "Apostas pendentes"]
+        if avaliacao_auto is not None and not avaliacao_auto[2].empty:
+            fontes.append("Candidatas do torneio atual")
+        with st.form("form_simulacao"):
+            fonte = st.radio("Apostas a simular", fontes, horizontal=True)
+            col1, col2, col3, col4 = st.columns(4)
+            banca_inicial = col1.number_input("Banca inicial (€)", min_value=1.0, value=simulacao.BANCA_INICIAL, step=50.0)
+            caminhos = col2.number_input("Caminhos", min_value=1000, max_value=1_000_000, value=simulacao.CAMINHOS, step=10_000)
+            semente = col3.number_input("Semente", min_value=0, value=0, step=1)
+            limiar = col4.number_input("Ruína abaixo de (€)", min_value=0.0, value=0.0, step=10.0)
+            simular = st.form_submit_button("Simular")
+
+        if simular:
+            sem_prob = 0
+            if fonte == "Candidatas do torneio atual":
+                # Só os lados com valor; as sugestões +1.5 sets entram com a odd +1.5, como na tabela
+                prob, odd, stake = simulacao.apostas_da_avaliacao(avaliacao_auto[2])
+            else:
+                apostas = livro.listar()
+                if fonte == "Apostas pendentes":
+                    apostas = apostas[apostas["resultado"].fillna("") == ""]
+                prob, odd, stake, sem_prob = simulacao.apostas_do_historico(apostas)
+            with metricas.medir("simulacao"):
+                resultado = simulacao.simular_banca(
+                    prob, odd, stake, banca_inicial=banca_inicial, caminhos=int(caminhos),
+                    semente=int(semente), limiar_ruina=limiar,
+                )
+            st.session_state["simulacao_ultima"] = (fonte, len(prob), sem_prob, banca_inicial, resultado)
+
+        if "simulacao_ultima" not in st.session_state:
+            return
+        fonte, n_apostas, sem_prob, banca_inicial, resultado = st.session_state["simulacao_ultima"]
+        if n_apostas == 0:
+            st.info("Não há apostas com stake para simular.")
+            return
+        st.caption(f"{fonte}: {n_apostas} apostas, {len(resultado['banca_final'])} caminhos")
+        if sem_prob:
+            st.warning(f"{sem_prob} aposta(s) sem probabilidade do modelo: usada a probabilidade implícita da odd.")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Banca final mediana (€)", f"€{resultado['percentis_banca'][50]:.2f}")
+        col2.metric("Lucro esperado (€)", f"€{resultado['lucro_esperado']:.2f}")
+        col3.metric("Prob. de ruína", f"{resultado['prob_ruina'] * 100:.2f}%")
+        col4.metric("Prob. de prejuízo", f"{resultado['prob_prejuizo'] * 100:.2f}%")
+        st.dataframe(pd.DataFrame({
+            "Banca final (€)": resultado["percentis_banca"],
+            "Drawdown máximo (€)": resultado["percentis_drawdown"],
+        }).rename_axis("Percentil").round(2))
+
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(8, 3))
+        ax1, ax2 = fig.subplots(1, 2)
+        ax1.hist(resultado["banca_final"], bins=60)
+        ax1.axvline(banca_inicial, color="black", linestyle="--", linewidth=1)
+        ax1.set_title("Banca final (€)")
+        ax2.hist(resultado["drawdown_max"], bins=60, color="tab:red")
+        ax2.set_title("Drawdown máximo (€)")
+        fig.tight_layout()
+        st.pyplot(fig)
 
 # --- Streamlit app ---
-if "historico_apostas_df" not in st.session_state:
-    st.session_state["historico_apostas_df"] = carregar_historico()
+metricas.configurar_log()
+medicoes_rerun = metricas.ativar(metricas.Medicoes())
+atualizar_historico_sessao()
 
 # Configuração página
 st.set_page_config(page_title="Tennis Value Bets ATP & WTA", page_icon="🎾", layout="wide")
@@ -328,6 +255,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.markdown('<div class="main-title">🎾 Análise de Valor em Apostas de Ténis &mdash; ATP & WTA</div>', unsafe_allow_html=True)
+if obter_livro_apostas().aviso_migracao:
+    st.warning(obter_livro_apostas().aviso_migracao + " A migração volta a ser tentada no próximo arranque.")
 
 with st.sidebar:
     st.header("⚙️ Definições gerais")
@@ -339,26 +268,87 @@ with st.sidebar:
     torneio_nomes = [t["nome"] for t in torneios]
     torneio_selec = st.selectbox("Selecionar Torneio", torneio_nomes)
     superficie_pt = st.selectbox("Superfície", list(superficies_map.keys()))
-    btn_atualizar = st.button("🔄 Atualizar Dados", type="primary")
+    url_torneio_selec = next(t["url"] for t in torneios if t["nome"] == torneio_selec)
+    monitor_odds = obter_monitor_odds()
+    # Identifica esta sessão no monitor partilhado (cada sessão segura os seus próprios torneios)
+    sessao_odds = st.session_state.setdefault("sessao_odds", uuid.uuid4().hex)
+    intervalo_odds = st.number_input(
+        "Atualizar odds automaticamente (segundos, 0 = desligado)",
+        min_value=0, max_value=3600, step=15,
+        value=int(monitor_odds.acompanhados(sessao_odds).get(url_torneio_selec, 0)),
+        key=f"intervalo_odds_{url_torneio_selec}",
+    )
+    if intervalo_odds and intervalo_odds < INTERVALO_MIN:
+        st.caption(f"Intervalo mínimo: {INTERVALO_MIN}s.")
+    # Cada botão só revalida a sua fonte: atualizar odds custa um pedido (condicional) à página do torneio
+    st.caption("🔄 Atualizar dados")
+    col_odds, col_ratings, col_torneios = st.columns(3)
+    btn_atualizar_odds = col_odds.button("Odds", type="primary")
+    btn_atualizar_ratings = col_ratings.button("Ratings")
+    btn_atualizar_torneios = col_torneios.button("Torneios")
+
+if btn_atualizar_odds:
+    cliente_http.expirar(url_torneio_selec)
+    obter_jogos_do_torneio.clear()
+    st.rerun()
 
-if btn_atualizar:
-    st.cache_data.clear()
+if btn_atualizar_ratings:
+    cliente_http.expirar_fonte("ratings")
+    ratings_jogadores.clear()
+    obter_memo_analise().invalidar()
+    # Correções do mapa de identidades feitas com a CLI entram com as novas tabelas
+    if identidades.mapa_padrao() is not None:
+        identidades.mapa_padrao().recarregar()
     st.rerun()
 
-superficie_en = superficies_map[superficie_pt]
+if btn_atualizar_torneios:
+    cliente_http.expirar_fonte("torneios")
+    obter_torneios.clear()
+    st.rerun()
 
-url_torneio_selec = next(t["url"] for t in torneios if t["nome"] == torneio_selec)
+superficie_en = superficies_map[superficie_pt]
 
 with st.spinner(f"Carregando bases Elo e yElo para {tipo_competicao}..."):
-    elo_df = cache_elo(tipo_competicao)
-    yelo_df = cache_yelo(tipo_competicao)
+    ratings_jog = ratings_jogadores(tipo_competicao)
 
-if elo_df is None or yelo_df is None or elo_df.empty or yelo_df.empty:
+if ratings_jog is None:
     st.error(f"Erro ao carregar bases Elo/yElo para {tipo_competicao}.")
     st.stop()
 
 with st.spinner(f"Carregando jogos do torneio {torneio_selec}..."):
-    jogos = obter_jogos_do_torneio(url_torneio_selec)
+    jogos = obter_jogos_do_torneio(url_torneio_selec, torneio_selec, tipo_competicao)
+
+# Odds vindas do monitor em segundo plano, sem limpar as caches de ratings e nomes. A sessão só segura o
+# torneio selecionado; os outros que acompanhava são largados.
+for url_acompanhado in monitor_odds.acompanhados(sessao_odds):
+    if url_acompanhado != url_torneio_selec or not intervalo_odds:
+        monitor_odds.deixar_de_acompanhar(url_acompanhado, sessao_odds)
+if intervalo_odds:
+    monitor_odds.acompanhar(url_torneio_selec, intervalo_odds, jogos, torneio_selec, tipo_competicao,
+                            sessao=sessao_odds)
+    estado_odds = monitor_odds.estado(url_torneio_selec)
+    if estado_odds is not None and estado_odds.jogos is not None:
+        jogos = estado_odds.jogos
+        versao_odds_vista = estado_odds.versao
+
+        # Enquanto a sessão estiver aberta o fragmento renova o arrendamento do torneio no monitor
+        @st.fragment(run_every=5)
+        def vigiar_odds():
+            if not monitor_odds.renovar(url_torneio_selec, sessao_odds):
+                st.rerun()
+            estado = monitor_odds.estado(url_torneio_selec)
+            if estado is None:
+                return
+            if estado.versao != versao_odds_vista:
+                st.rerun()
+            if estado.atualizado_em:
+                hora = pd.Timestamp.fromtimestamp(estado.atualizado_em).strftime("%H:%M:%S")
+                st.caption(f"Odds verificadas às {hora}")
+            if estado.erro:
+                st.caption(f"Última atualização falhou: {estado.erro}")
+
+        with st.sidebar:
+            vigiar_odds()
 
 if not jogos:
     st.warning("Nenhum jogo encontrado neste torneio.")
@@ -379,82 +369,51 @@ with tab_manual:
     odd_a_input = st.number_input(f"Odd para {selecionado['jogador_a']}", value=selecionado["odd_a"] or 1.80, step=0.01)
     odd_b_input = st.number_input(f"Odd para {selecionado['jogador_b']}", value=selecionado["odd_b"] or 2.00, step=0.01)
 
-    idx_a = match_nome(selecionado["jogador_a"], elo_df["Player"])
-    idx_b = match_nome(selecionado["jogador_b"], elo_df["Player"])
-    if idx_a is None or idx_b is None:
+    registo_odds = obter_registo_odds()
+    if registo_odds is not None:
+        movimento = registo_odds.movimento_jogo(url_torneio_selec, selecionado["jogador_a"], selecionado["jogador_b"])
+        if len(movimento) > 1:
+            with st.expander(f"📈 Movimento das odds ({len(movimento)} observações)"):
+                st.line_chart(movimento.set_index("ts").rename(columns={
+                    "odd_a": selecionado["jogador_a"], "odd_b": selecionado["jogador_b"],
+                }))
+
+    with metricas.medir("nomes"):
+        dados_a = ratings_jog.jogador(selecionado["jogador_a"], selecionado.get("url_a"))
+        dados_b = ratings_jog.jogador(selecionado["jogador_b"], selecionado.get("url_b"))
+    if dados_a is None or dados_b is None:
         st.error("Não foi possível encontrar Elo para um dos jogadores.")
         st.stop()
 
-    dados_a = elo_df.loc[idx_a]
-    dados_b = elo_df.loc[idx_b]
-
-    yelo_a = encontrar_yelo(selecionado["jogador_a"], yelo_df)
-    yelo_b = encontrar_yelo(selecionado["jogador_b"], yelo_df)
-    if yelo_a is None or yelo_b is None:
+    if pd.isna(dados_a["yElo"]) or pd.isna(dados_b["yElo"]):
         st.error("Não consegui encontrar yElo para um dos jogadores.")
         st.stop()
 
-    try:
-        geral_a = float(dados_a["Elo"])
-        esp_a = elo_por_superficie(dados_a, superficie_en)
-        yelo_a_f = float(yelo_a)
-        elo_final_a = (esp_a / geral_a) * yelo_a_f
-
-        geral_b = float(dados_b["Elo"])
-        esp_b = elo_por_superficie(dados_b, superficie_en)
-        yelo_b_f = float(yelo_b)
-        elo_final_b = (esp_b / geral_b) * yelo_b_f
-    except Exception as e:
-        st.warning(f"Erro ao calcular Elo final: {e}")
-        st.stop()
-
-    prob_a = elo_prob(elo_final_a, elo_final_b)
-    prob_b = 1 - prob_a
+    # Mesmos valores que a análise automática (sem Elo da superfície usa o geral)
+    (geral_a, geral_b), (esp_a, esp_b), (yelo_a_f, yelo_b_f) = ratings_jog.valores(
+        [dados_a.pos, dados_b.pos], superficie_en)
 
     odd_a = float(odd_a_input)
     odd_b = float(odd_b_input)
 
-    raw_p_a = 1 / odd_a
-    raw_p_b = 1 / odd_b
-    soma_raw = raw_p_a + raw_p_b
-    corr_p_a = raw_p_a / soma_raw
-    corr_p_b = raw_p_b / soma_raw
-    corr_odd_a = 1 / corr_p_a
-    corr_odd_b = 1 / corr_p_b
-
-    valor_a = value_bet(prob_a, corr_odd_a)
-    valor_b = value_bet(prob_b, corr_odd_b)
-
-    valor_a_arred = round(valor_a, 6)
-    valor_b_arred = round(valor_b, 6)
-
-    stake_a = stake_por_faixa(valor_a_arred)
-    stake_b = stake_por_faixa(valor_b_arred)
-
-    cond_a_especial = False
-    cond_b_especial = False
-    odd_manual_a = odd_a
-    odd_manual_b = odd_b
-    sugestao_manual_a = ""
-    sugestao_manual_b = ""
-
-    if (2.45 <= odd_a <= 2.70):
-        cond_a_especial = True
-        odd_manual_a = odd_a / 1.5
-        sugestao_manual_a = f"{selecionado['jogador_a']} +1.5 sets (odd: {odd_manual_a:.2f})"
-    elif odd_a > 2.70:
-        cond_a_especial = True
-        odd_manual_a = odd_a / 1.7
-        sugestao_manual_a = f"{selecionado['jogador_a']} +1.5 sets (odd: {odd_manual_a:.2f})"
-
-    if (2.45 <= odd_b <= 2.70):
-        cond_b_especial = True
-        odd_manual_b = odd_b / 1.5
-        sugestao_manual_b = f"{selecionado['jogador_b']} +1.5 sets (odd: {odd_manual_b:.2f})"
-    elif odd_b > 2.70:
-        cond_b_especial = True
-        odd_manual_b = odd_b / 1.7
-        sugestao_manual_b = f"{selecionado['jogador_b']} +1.5 sets (odd: {odd_manual_b:.2f})"
+    av = {coluna: valores[0] for coluna, valores in avaliar_arrays(
+        [geral_a], [esp_a], [yelo_a_f], [geral_b], [esp_b], [yelo_b_f], [odd_a], [odd_b],
+        arredondar=6, tolerancia=TOLERANCIA,
+    ).items()}
+    prob_a = av["prob_a"]
+    prob_b = av["prob_b"]
+    valor_a = av["valor_a"]
+    valor_b = av["valor_b"]
+    stake_a = av["stake_a"]
+    stake_b = av["stake_b"]
+
+    # A sugestão +1.5 sets na análise manual não depende da faixa de valor
+    cond_a_especial = not pd.isna(av["odd_mais15_a"])
+    cond_b_especial = not pd.isna(av["odd_mais15_b"])
+    odd_manual_a = av["odd_mais15_a"] if cond_a_especial else odd_a
+    odd_manual_b = av["odd_mais15_b"] if cond_b_especial else odd_b
+    sugestao_manual_a = f"{selecionado['jogador_a']} +1.5 sets (odd: {odd_manual_a:.2f})" if cond_a_especial else ""
+    sugestao_manual_b = f"{selecionado['jogador_b']} +1.5 sets (odd: {odd_manual_b:.2f})" if cond_b_especial else ""
 
     if cond_a_especial and not cond_b_especial:
         jogador_apostar = st.radio(
@@ -485,7 +444,7 @@ with tab_manual:
     with colA:
         st.metric("Prob. vitória (A)", f"{prob_a*100:.1f}%")
         st.metric("Valor esperado (A)", f"{valor_a*100:.1f}%")
-        if (ODD_MAX >= odd_a >= ODD_MIN and (VALOR_MIN - TOLERANCIA) <= valor_a_arred <= (VALOR_MAX + TOLERANCIA)):
+        if av["com_valor_a"]:
             classe_stake = ("stake-low" if stake_a == 5 else "stake-mid" if stake_a == 7.5 else "stake-high" if stake_a == 10 else "")
             st.markdown(f"<span class='faixa-stake {classe_stake}'>Stake recomendada: €{stake_a:.2f}</span>", unsafe_allow_html=True)
             st.success("Valor positivo ✅")
@@ -494,7 +453,7 @@ with tab_manual:
     with colB:
         st.metric("Prob. vitória (B)", f"{prob_b*100:.1f}%")
         st.metric("Valor esperado (B)", f"{valor_b*100:.1f}%")
-        if (ODD_MAX >= odd_b >= ODD_MIN and (VALOR_MIN - TOLERANCIA) <= valor_b_arred <= (VALOR_MAX + TOLERANCIA)):
+        if av["com_valor_b"]:
             classe_stake = ("stake-low" if stake_b == 5 else "stake-mid" if stake_b == 7.5 else "stake-high" if stake_b == 10 else "")
             st.markdown(f"<span class='faixa-stake {classe_stake}'>Stake recomendada: €{stake_b:.2f}</span>", unsafe_allow_html=True)
             st.success("Valor positivo ✅")
@@ -509,18 +468,22 @@ with tab_manual:
         if cond_a_especial and jogador_apostar == sugestao_manual_a:
             aposta_nome = f"{selecionado['jogador_a']} +1.5 sets"
             odd_usar = odd_manual_a
-            stake_usar = stake_por_faixa(valor_a)
+            stake_usar = stake_a
+            prob_usar = prob_a
         elif cond_b_especial and jogador_apostar == sugestao_manual_b:
             aposta_nome = f"{selecionado['jogador_b']} +1.5 sets"
             odd_usar = odd_manual_b
-            stake_usar = stake_por_faixa(valor_b)
+            stake_usar = stake_b
+            prob_usar = prob_b
         else:
             if jogador_apostar == selecionado["jogador_a"]:
                 odd_usar = odd_a
                 stake_usar = stake_a
+                prob_usar = prob_a
             else:
                 odd_usar = odd_b
                 stake_usar = stake_b
+                prob_usar = prob_b
 
         nova_aposta = {
             "data": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -529,124 +492,41 @@ with tab_manual:
             "odd": odd_usar,
             "stake": stake_usar,
             "resultado": "",
+            # Probabilidade de vitória no jogo segundo o modelo (usada pelo simulador de banca)
+            "prob": float(prob_usar),
             "competicao": tipo_competicao,
             "torneio": torneio_selec,
         }
-        novo_df = pd.DataFrame([nova_aposta])
-        st.session_state["historico_apostas_df"] = pd.concat([st.session_state["historico_apostas_df"], novo_df], ignore_index=True)
-        salvar_historico(st.session_state["historico_apostas_df"])
+        registar_aposta(nova_aposta)
         st.success(f"Aposta registrada para {aposta_nome} com odd {odd_usar} e stake €{stake_usar:.2f}")
         st.rerun()
 
 ### --- ABA AUTOMÁTICA ---
 with tab_auto:
     st.header(f"Análise Automática de Jogos {tipo_competicao} — Valor Positivo")
-    resultados = []
-    for idx, jogo in enumerate(jogos):
-        jogador_a = jogo["jogador_a"]
-        jogador_b = jogo["jogador_b"]
-        oA = jogo["odd_a"] or 1.80
-        oB = jogo["odd_b"] or 2.00
-
-        idxA = match_nome(jogador_a, elo_df["Player"])
-        idxB = match_nome(jogador_b, elo_df["Player"])
-        if idxA is None or idxB is None:
-            continue
-        dA = elo_df.loc[idxA]
-        dB = elo_df.loc[idxB]
-
-        yA = encontrar_yelo(jogador_a, yelo_df)
-        yB = encontrar_yelo(jogador_b, yelo_df)
-        if yA is None or yB is None:
-            continue
-        try:
-            eGA = float(dA["Elo"])
-            eSA = elo_por_superficie(dA, superficie_en)
-            yFA = float(yA)
-            eGB = float(dB["Elo"])
-            eSB = elo_por_superficie(dB, superficie_en)
-            yFB = float(yB)
-        except:
-            continue
-        
-        eloFA = (eSA / eGA) * yFA
-        eloFB = (eSB / eGB) * yFB
-        
-        pA = elo_prob(eloFA, eloFB)
-        pB = 1 - pA
-        
-        rawpA = 1 / oA
-        rawpB = 1 / oB
-        sRaw = rawpA + rawpB
-        cA = rawpA / sRaw
-        cB = rawpB / sRaw
-        corr_oA = 1 / cA
-        corr_oB = 1 / cB
-        
-        valA = value_bet(pA, corr_oA)
-        valB = value_bet(pB, corr_oB)
-        
-        stakeA = stake_por_faixa(valA)
-        stakeB = stake_por_faixa(valB)
-
-        cond_a_especial = False
-        cond_b_especial = False
-        sugerir_a = ""
-        odd_plus_a = None
-        if ODD_MIN <= oA <= ODD_MAX and VALOR_MIN <= valA <= VALOR_MAX:
-            if 2.45 <= oA <= 2.70:
-                odd_plus_a = oA / 1.5
-                sugerir_a = f"{jogador_a} +1.5 sets (odd: {odd_plus_a:.2f})"
-                cond_a_especial = True
-            elif oA > 2.70:
-                odd_plus_a = oA / 1.7
-                sugerir_a = f"{jogador_a} +1.5 sets (odd: {odd_plus_a:.2f})"
-                cond_a_especial = True
-
-        sugerir_b = ""
-        odd_plus_b = None
-        if ODD_MIN <= oB <= ODD_MAX and VALOR_MIN <= valB <= VALOR_MAX:
-            if 2.45 <= oB <= 2.70:
-                odd_plus_b = oB / 1.5
-                sugerir_b = f"{jogador_b} +1.5 sets (odd: {odd_plus_b:.2f})"
-                cond_b_especial = True
-            elif oB > 2.70:
-                odd_plus_b = oB / 1.7
-                sugerir_b = f"{jogador_b} +1.5 sets (odd: {odd_plus_b:.2f})"
-                cond_b_especial = True
-
-        resultados.append({
-            "Jogo": f"{jogador_a} vs {jogador_b}",
-            "Odd A": oA,
-            "Odd B": oB,
-            "Valor A %": f"{valA*100:.1f}%",
-            "Valor B %": f"{valB*100:.1f}%",
-            "Stake A (€)": f"{stakeA:.2f}",
-            "Stake B (€)": f"{stakeB:.2f}",
-            "Valor A (raw)": valA,
-            "Valor B (raw)": valB,
-            "Jogador A": jogador_a,
-            "Jogador B": jogador_b,
-            "Stake A raw": stakeA,
-            "Stake B raw": stakeB,
-            "Odd A raw": oA,
-            "Odd B raw": oB,
-            "Sugestão Especial A": sugerir_a,
-            "Odd +1.5 Sets A": odd_plus_a if odd_plus_a is not None else "",
-            "Flag especial A": cond_a_especial,
-            "Sugestão Especial B": sugerir_b,
-            "Odd +1.5 Sets B": odd_plus_b if odd_plus_b is not None else "",
-            "Flag especial B": cond_b_especial,
-        })
-
-    if not resultados:
+    # Só os jogos novos ou com odds alteradas são avaliados; um rerun sem alterações recebe o mesmo
+    # DataFrame da memória partilhada, e a tabela formatada só é refeita quando ele muda
+    chave_avaliacao = (url_torneio_selec, superficie_en, ratings_jog.versao)
+    avaliacao = obter_memo_analise().avaliar(jogos, ratings_jog, superficie_en)
+    anterior = st.session_state.get("avaliacao_auto")
+    if anterior is not None and anterior[0] == chave_avaliacao and anterior[2] is not avaliacao:
+        reavaliados = analise.jogos_alterados(anterior[1], jogos)
+        ganharam, perderam = mudancas_de_valor(anterior[2], avaliacao, reavaliados)
+        for a, b in ganharam:
+            st.toast(f"Novo valor: {a} vs {b}", icon="✅")
+        for a, b in perderam:
+            st.toast(f"Sem valor agora: {a} vs {b}", icon="⚠️")
+    st.session_state["avaliacao_auto"] = (chave_avaliacao, jogos, avaliacao)
+
+    if avaliacao.empty:
         st.info("Nenhum jogo com valor possível analisado.")
     else:
-        df = pd.DataFrame(resultados)
-        df_valor_positivo = df[
-            ((df["Valor A (raw)"] >= VALOR_MIN) & (df["Valor A (raw)"] <= VALOR_MAX) & (df["Odd A"] >= ODD_MIN) & (df["Odd A"] <= ODD_MAX)) |
-            ((df["Valor B (raw)"] >= VALOR_MIN) & (df["Valor B (raw)"] <= VALOR_MAX) & (df["Odd B"] >= ODD_MIN) & (df["Odd B"] <= ODD_MAX))
-        ]
+        tabela_auto = st.session_state.get("tabela_auto")
+        if tabela_auto is None or tabela_auto[0] is not avaliacao:
+            df = tabela_analise_automatica(avaliacao)
+            tabela_auto = (avaliacao, df, df[avaliacao["com_valor_a"] | avaliacao["com_valor_b"]])
+            st.session_state["tabela_auto"] = tabela_auto
+        _, df, df_valor_positivo = tabela_auto
 
         def highlight_stakes(val):
             if val in ["5.00", "7.50", "10.00"]:
@@ -685,11 +565,11 @@ with tab_auto:
                                 "odd": float(row["Odd +1.5 Sets A"]),
                                 "stake": row["Stake A raw"],
                                 "resultado": "",
+                                "prob": float(row["Prob A raw"]),
                                 "competicao": tipo_competicao,
                                 "torneio": torneio_selec,
                             }
-                            st.session_state["historico_apostas_df"] = pd.concat([st.session_state["historico_apostas_df"], pd.DataFrame([nova_aposta_plus])], ignore_index=True)
-                            salvar_historico(st.session_state["historico_apostas_df"])
+                            registar_aposta(nova_aposta_plus)
                             st.success(f"Aposta +1.5 sets registrada para {row['Jogador A']}")
                             st.rerun()
                 else:
@@ -702,11 +582,11 @@ with tab_auto:
                                 "odd": row["Odd A raw"],
                                 "stake": row["Stake A raw"],
                                 "resultado": "",
+                                "prob": float(row["Prob A raw"]),
                                 "competicao": tipo_competicao,
                                 "torneio": torneio_selec,
                             }
-                            st.session_state["historico_apostas_df"] = pd.concat([st.session_state["historico_apostas_df"], pd.DataFrame([nova_aposta])], ignore_index=True)
-                            salvar_historico(st.session_state["historico_apostas_df"])
+                            registar_aposta(nova_aposta)
                             st.success(f"Aposta {nova_aposta['aposta']} registrada automaticamente (Jogador A)")
                             st.rerun()
             with col2:
@@ -720,11 +600,11 @@ with tab_auto:
                                 "odd": float(row["Odd +1.5 Sets B"]),
                                 "stake": row["Stake B raw"],
                                 "resultado": "",
+                                "prob": float(row["Prob B raw"]),
                                 "competicao": tipo_competicao,
                                 "torneio": torneio_selec,
                             }
-                            st.session_state["historico_apostas_df"] = pd.concat([st.session_state["historico_apostas_df"], pd.DataFrame([nova_aposta_plus])], ignore_index=True)
-                            salvar_historico(st.session_state["historico_apostas_df"])
+                            registar_aposta(nova_aposta_plus)
                             st.success(f"Aposta +1.5 sets registrada para {row['Jogador B']}")
                             st.rerun()
                 else:
@@ -737,29 +617,28 @@ with tab_auto:
                                 "odd": row["Odd B raw"],
                                 "stake": row["Stake B raw"],
                                 "resultado": "",
+                                "prob": float(row["Prob B raw"]),
                                 "competicao": tipo_competicao,
                                 "torneio": torneio_selec,
                             }
-                            st.session_state["historico_apostas_df"] = pd.concat([st.session_state["historico_apostas_df"], pd.DataFrame([nova_aposta])], ignore_index=True)
-                            salvar_historico(st.session_state["historico_apostas_df"])
+                            registar_aposta(nova_aposta)
                             st.success(f"Aposta {nova_aposta['aposta']} registrada automaticamente (Jogador B)")
                             st.rerun()
 
 ### --- ABA HISTÓRICO ---
 with tab_hist:
 
-    # Botão manual para gravar imediatamente
+    # Cada alteração já é gravada na hora; o botão só confirma e recarrega o estado do livro
     if st.button("💾 Gravar histórico agora"):
-        salvar_historico(st.session_state["historico_apostas_df"])
+        atualizar_historico_sessao()
         st.success("Histórico gravado com sucesso ✅")
 
     # Exportar histórico
     st.subheader("📤 Exportar Histórico")
-    if not st.session_state["historico_apostas_df"].empty:
-        csv_export = st.session_state["historico_apostas_df"].to_csv(index=False).encode("utf-8")
+    if st.session_state["historico_total"] > 0:
         st.download_button(
             label="⬇️ Download histórico CSV",
-            data=csv_export,
+            data=csv_historico(st.session_state["historico_versao"]),
             file_name="historico_apostas.csv",
             mime="text/csv"
         )
@@ -779,43 +658,79 @@ with tab_hist:
                 ("Substituir histórico atual", "Adicionar ao histórico atual")
             )
             if st.button("Importar agora"):
+                # Os ids do ficheiro importado não correspondem aos do livro: são sempre apostas novas
+                apostas_importadas = df_importado.drop(columns=["id"], errors="ignore").to_dict(orient="records")
                 if opcao == "Substituir histórico atual":
-                    st.session_state["historico_apostas_df"] = df_importado
+                    obter_livro_apostas().substituir(apostas_importadas)
                 else:
-                    st.session_state["historico_apostas_df"] = pd.concat(
-                        [st.session_state["historico_apostas_df"], df_importado],
-                        ignore_index=True
-                    )
-                salvar_historico(st.session_state["historico_apostas_df"])
+                    obter_livro_apostas().inserir_varias(apostas_importadas)
+                atualizar_historico_sessao()
                 st.success("Histórico importado com sucesso ✅")
                 st.rerun()
         except Exception as e:
             st.error(f"Erro ao importar CSV: {e}")
 
-    # Tabela do histórico
-    if "historico_apostas_df" not in st.session_state or st.session_state["historico_apostas_df"].empty:
+    # Tabela do histórico: filtros e paginação feitos no livro (SQL); a grelha só recebe a página visível
+    if st.session_state["historico_total"] == 0:
         st.info("Nenhuma aposta registrada.")
     else:
-        df_hist = st.session_state["historico_apostas_df"].copy().fillna("").reset_index(drop=True)
+        livro = obter_livro_apostas()
+        col_proc, col_res, col_comp, col_tam = st.columns([3, 2, 2, 1])
+        procurar = col_proc.text_input("Procurar (evento, aposta ou torneio)")
+        opcoes_resultado = {"Todos": None, "Pendentes": RESULTADO_PENDENTE, "Ganhou": "ganhou",
+                            "Perdeu": "perdeu", "Cashout": "cashout"}
+        resultado_filtro = opcoes_resultado[col_res.selectbox("Resultado", list(opcoes_resultado))]
+        competicao_filtro = {"Todas": None, "ATP": "ATP", "WTA": "WTA"}[col_comp.selectbox("Competição", ["Todas", "ATP", "WTA"])]
+        por_pagina = col_tam.selectbox("Por página", [25, 50, 100, 200], index=1)
+
+        filtros = {"procurar": procurar.strip() or None, "resultado": resultado_filtro, "competicao": competicao_filtro}
+        chave_filtros = (tuple(filtros.values()), por_pagina, st.session_state["historico_versao"])
+        if st.session_state.get("historico_filtros") != chave_filtros[:2]:
+            st.session_state["historico_pagina"] = 1
+        st.session_state["historico_filtros"] = chave_filtros[:2]
+        # Contagem e página lidas uma vez por (filtros, página, versão do livro)
+        if st.session_state.get("historico_contagem", (None,))[0] != chave_filtros:
+            st.session_state["historico_contagem"] = (chave_filtros, livro.contar(**filtros))
+        total_filtrado = st.session_state["historico_contagem"][1]
+        paginas = max(1, -(-total_filtrado // por_pagina))
+        if st.session_state.get("historico_pagina", 1) > paginas:
+            st.session_state["historico_pagina"] = paginas
+        col_pag, col_info = st.columns([1, 4])
+        pagina = col_pag.number_input("Página", min_value=1, max_value=paginas, step=1, key="historico_pagina")
+        col_info.caption(f"{total_filtrado} aposta(s) com estes filtros — página {pagina} de {paginas}")
+
+        chave_pagina = (chave_filtros, pagina)
+        if st.session_state.get("historico_pagina_df", (None,))[0] != chave_pagina:
+            with metricas.medir("historico"):
+                df_pagina = livro.pagina((pagina - 1) * por_pagina, por_pagina, **filtros)
+            st.session_state["historico_pagina_df"] = (chave_pagina, df_pagina)
+        df_hist = st.session_state["historico_pagina_df"][1].fillna("")
         if "valor_apostado" in df_hist.columns:
             df_hist = df_hist.drop(columns=["valor_apostado"])
 
+        # Importação tardia: a grelha só é carregada quando há histórico para mostrar
+        from st_aggrid import AgGrid, DataReturnMode, GridOptionsBuilder, GridUpdateMode
+
         resultados_validos = ["", "ganhou", "perdeu", "cashout"]
         gb = GridOptionsBuilder.from_dataframe(df_hist)
+        gb.configure_column("id", hide=True)
+        if "prob" in df_hist.columns:
+            gb.configure_column("prob", hide=True)
         gb.configure_column("resultado", editable=True, cellEditor="agSelectCellEditor",
                             cellEditorParams={"values": resultados_validos})
         gb.configure_selection(selection_mode="multiple", use_checkbox=True, groupSelectsChildren=True)
         grid_options = gb.build()
 
-        response = AgGrid(
-            df_hist,
-            gridOptions=grid_options,
-            update_mode=GridUpdateMode.MODEL_CHANGED | GridUpdateMode.SELECTION_CHANGED,
-            data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
-            fit_columns_on_grid_load=True,
-            height=400,
-            theme="fresh",
-        )
+        with metricas.medir("grelha_historico"):
+            response = AgGrid(
+                df_hist,
+                gridOptions=grid_options,
+                update_mode=GridUpdateMode.MODEL_CHANGED | GridUpdateMode.SELECTION_CHANGED,
+                data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
+                fit_columns_on_grid_load=True,
+                height=400,
+                theme="fresh",
+            )
 
         # Remover apostas selecionadas
         selected_raw = getattr(response, "selected_rows", None)
@@ -832,119 +747,60 @@ with tab_hist:
             if len(selected) == 0:
                 st.warning("Nenhuma aposta foi selecionada.")
             else:
-                df = st.session_state["historico_apostas_df"].copy().reset_index(drop=True)
-                if "valor_apostado" in df.columns:
-                    df = df.drop(columns=["valor_apostado"])
-
-                for data in selected:
-                    if not isinstance(data, dict):
-                        continue
-
-                    cond = (df["data"].astype(str).str.strip() == str(data.get("data", "")).strip())
-                    cond &= (df["evento"] == data.get("evento", ""))
-                    cond &= (df["aposta"] == data.get("aposta", ""))
-                    try:
-                        data_odd = float(data.get("odd", 0))
-                        cond &= (abs(df["odd"].astype(float) - data_odd) < 1e-9)
-                    except Exception:
-                        cond &= False
-
-                    indices = df[cond].index
-                    if not indices.empty:
-                        df = df.drop(indices)
-
-                st.session_state["historico_apostas_df"] = df.reset_index(drop=True)
-                salvar_historico(st.session_state["historico_apostas_df"])
+                ids = [int(float(d["id"])) for d in selected if isinstance(d, dict) and d.get("id") not in (None, "")]
+                obter_livro_apostas().remover(ids)
+                atualizar_historico_sessao()
                 st.success("Aposta(s) removida(s) com sucesso.")
                 st.rerun()
 
-        # Gravar sempre que houver alteração na tabela
+        # Gravar só os resultados alterados nesta página, numa transação ({id: resultado})
         if hasattr(response, "data") and response.data is not None:
-            df_updated = pd.DataFrame(response.data)
-            if "remove" in df_updated.columns:
-                df_updated = df_updated.drop(columns=["remove"])
-            if "valor_apostado" in df_updated.columns:
-                df_updated = df_updated.drop(columns=["valor_apostado"])
-
-            if not df_updated.equals(st.session_state["historico_apostas_df"]):
-                st.session_state["historico_apostas_df"] = df_updated
-                salvar_historico(df_updated)
-
-        # Métricas e Análise de desempenho
-        df_hist_resultado = st.session_state["historico_apostas_df"]
-        if "valor_apostado" in df_hist_resultado.columns:
-            df_hist_resultado = df_hist_resultado.drop(columns=["valor_apostado"])
-
-        df_hist_resultado = df_hist_resultado[
-            df_hist_resultado["resultado"].notna() & (df_hist_resultado["resultado"].str.strip() != "")
-        ].copy()
-
-        df_hist_resultado["stake"] = pd.to_numeric(df_hist_resultado["stake"], errors="coerce").fillna(0)
-        df_hist_resultado["odd"] = pd.to_numeric(df_hist_resultado["odd"], errors="coerce").fillna(0)
-
-        def calcular_retorno(row):
-            if row["resultado"] == "ganhou":
-                return row["stake"] * row["odd"]
-            elif row["resultado"] == "cashout":
-                return row["stake"] * 0.5
-            else:
-                return 0
-
-        num_apostas = len(df_hist_resultado)
-        apostas_ganhas = (df_hist_resultado["resultado"] == "ganhou").sum()
-        apostas_perdidas = (df_hist_resultado["resultado"] == "perdeu").sum()
-        montante_investido = df_hist_resultado["stake"].sum()
-        montante_ganho = df_hist_resultado.apply(calcular_retorno, axis=1).sum()
-        yield_percent = ((montante_ganho - montante_investido) / montante_investido * 100) if montante_investido > 0 else 0.0
+            df_grelha = pd.DataFrame(response.data)
+            if {"id", "resultado"} <= set(df_grelha.columns) and not df_grelha.empty:
+                antes = df_hist.set_index("id")["resultado"]
+                depois = df_grelha.assign(id=df_grelha["id"].astype(float).astype(int)).set_index("id")["resultado"].fillna("")
+                depois = depois[depois.index.isin(antes.index)]
+                alterados = depois[depois != antes.reindex(depois.index)]
+                if not alterados.empty:
+                    livro.atualizar_resultados(alterados.to_dict())
+                    atualizar_historico_sessao()
+
+        # Métricas e Análise de desempenho (agregados mantidos pelo livro a cada escrita)
+        resumo, tabela = st.session_state["historico_desempenho"]
 
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Número de Apostas", num_apostas)
-            st.metric("Apostas Ganhas", apostas_ganhas)
-            st.metric("Apostas Perdidas", apostas_perdidas)
+            st.metric("Número de Apostas", resumo["apostas"])
+            st.metric("Apostas Ganhas", resumo["ganhas"])
+            st.metric("Apostas Perdidas", resumo["perdidas"])
         with col2:
-            st.metric("Montante Investido (€)", f"€{montante_investido:.2f}")
-            st.metric("Montante Ganho (€)", f"€{montante_ganho:.2f}")
+            st.metric("Montante Investido (€)", f"€{resumo['investido']:.2f}")
+            st.metric("Montante Ganho (€)", f"€{resumo['retorno']:.2f}")
         with col3:
-            st.metric("Yield (%)", f"{yield_percent:.2f}%")
+            st.metric("Yield (%)", f"{resumo['yield']:.2f}%")
 
         # Gráfico de lucro acumulado
-        df_lucro = df_hist_resultado.copy()
-        if not df_lucro.empty:
-            def calc_lucro(row):
-                if row["resultado"] == "ganhou":
-                    return row["stake"] * row["odd"] - row["stake"]
-                elif row["resultado"] == "cashout":
-                    return row["stake"] * 0.5 - row["stake"]
-                else:
-                    return -row["stake"]
-
-            df_lucro["lucro"] = df_lucro.apply(calc_lucro, axis=1)
-            df_lucro["ano_mes"] = pd.to_datetime(df_lucro["data"], errors="coerce").dt.strftime('%Y-%m')
-            df_lucro = df_lucro[df_lucro["ano_mes"].notna()]
-
-            grupo = df_lucro.groupby(["ano_mes", "competicao"])["lucro"].sum().reset_index()
-            tabela = grupo.pivot(index="ano_mes", columns="competicao", values="lucro").fillna(0).sort_index()
-
-            if "ATP" not in tabela.columns:
-                tabela["ATP"] = 0
-            if "WTA" not in tabela.columns:
-                tabela["WTA"] = 0
-
-            tabela["ATP_acum"] = tabela["ATP"].cumsum()
-            tabela["WTA_acum"] = tabela["WTA"].cumsum()
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            tabela[["ATP_acum", "WTA_acum"]].plot(ax=ax)
+        if not tabela.empty:
+            # Figure sem pyplot: evita carregar o backend e o estado global do pyplot
+            from matplotlib.figure import Figure
+
+            fig = Figure(figsize=(8, 4))
+            ax = fig.subplots()
+            ax.plot(tabela.index, tabela["ATP"], label="ATP")
+            ax.plot(tabela.index, tabela["WTA"], label="WTA")
             ax.set_title("Lucro Acumulado por Mês (ATP / WTA)")
             ax.set_ylabel("Lucro acumulado (€)")
             ax.set_xlabel("Ano-Mês")
-            ax.legend(["ATP", "WTA"])
-            plt.xticks(rotation=45)
+            ax.legend()
+            ax.tick_params(axis="x", labelrotation=45)
             st.pyplot(fig)
         else:
             st.info("Ainda não há dados suficientes para gerar o gráfico de lucro acumulado por mês.")
 
+    painel_simulacao(obter_livro_apostas(), st.session_state.get("avaliacao_auto"))
+
     st.divider()
     st.caption("Fontes: tennisexplorer.com e tennisabstract.com | App experimental — design demo")
 
+painel_diagnostico(medicoes_rerun)
+
@@ -0,0 +1,43 @@
+# Corre todos os benchmarks e grava os resultados num único ficheiro JSON.
+#
+#   python -m benchmarks --json resultados.json             # tamanhos completos
+#   python -m benchmarks --rapido --json resultados.json    # tamanhos reduzidos (segundos, não minutos)
+#   python -m benchmarks.comparar antes.json resultados.json
+import argparse
+import os
+import sys
+
+from benchmarks import (
+    bench_backtest, bench_historico, bench_indice_jogadores, bench_memoria_ratings, bench_parsing, bench_precos,
+    bench_simulacao,
+)
+
+RAPIDO = {
+    bench_parsing: ["--repeticoes", "3"],
+    bench_indice_jogadores: ["--tamanhos", "2000", "5000", "--consultas", "50"],
+    bench_precos: ["--jogos", "10", "100", "1000", "--repeticoes", "3", "--max-original", "10"],
+    bench_historico: ["--apostas", "1000", "10000", "--repeticoes", "2"],
+    bench_backtest: ["--configs", "1000", "--jogos", "1000"],
+    bench_simulacao: ["--caminhos", "20000", "--apostas", "100"],
+    bench_memoria_ratings: ["--tamanhos", "2000", "--sessoes", "5"],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corre todos os benchmarks.")
+    parser.add_argument("--json", default="resultados.json", help="ficheiro de resultados (substituído)")
+    parser.add_argument("--rapido", action="store_true", help="usar tamanhos reduzidos")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.json):
+        os.remove(args.json)
+    for modulo in (bench_parsing, bench_indice_jogadores, bench_precos, bench_historico, bench_backtest,
+                   bench_simulacao, bench_memoria_ratings):
+        print(f"\n== {modulo.__name__} ==")
+        modulo.main((RAPIDO[modulo] if args.rapido else []) + ["--json", args.json])
+    print(f"\nresultados em {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
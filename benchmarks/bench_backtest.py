@@ -0,0 +1,45 @@
+# Tempo de uma varredura em grelha do backtest, por número de configurações e de jogos.
+#
+#   python -m benchmarks.bench_backtest --configs 1000 10000 --jogos 3000 --processos 4 --json resultados.json
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import sinteticos
+from benchmarks.resultados import Resultados
+from tennis_value import backtest
+
+
+def grelha_com(n):
+    # Grelha com ~n configurações a variar os limites de valor e de odd
+    lado = max(1, round(n ** 0.25))
+    return backtest.grelha(
+        valor_min=list(np.linspace(0.02, 0.08, lado)), valor_max=list(np.linspace(0.15, 0.35, lado)),
+        odd_min=list(np.linspace(1.3, 1.6, lado)), odd_max=list(np.linspace(2.5, 3.5, lado)),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varredura em grelha do backtest.")
+    parser.add_argument("--configs", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--jogos", type=int, default=3000, help="jogos da época sintética")
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    apostas = backtest.Apostas.de_jogos(sinteticos.gerar_jogos_historicos(args.jogos))
+    resultados = Resultados("backtest")
+    print(f"{'configs':>8} {'jogos':>7} {'tempo':>9} {'configs/s':>11}")
+    for n in args.configs:
+        configs = grelha_com(n)
+        inicio = time.perf_counter()
+        backtest.varrer_grelha(apostas, configs, args.processos)
+        t = time.perf_counter() - inicio
+        resultados.adicionar("varrer_grelha", t, configs=len(configs), jogos=args.jogos)
+        print(f"{len(configs):>8} {args.jogos:>7} {t:>8.2f}s {len(configs) / t:>11.0f}")
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
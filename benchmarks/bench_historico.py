@@ -0,0 +1,92 @@
+# Métricas e gráfico do separador Histórico: recalculadas a partir do livro inteiro (como a app fazia)
+# vs lidas dos agregados mantidos pelo LivroApostas, por número de apostas. A coluna "página" é o que a
+# grelha do histórico lê por rerun (uma página de 50 pendentes) em vez do livro inteiro.
+#
+#   python -m benchmarks.bench_historico --apostas 1000 10000 100000 500000 --json resultados.json
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks import sinteticos
+from benchmarks.resultados import Resultados
+from tennis_value.historico import LivroApostas, calcular_retorno, lucro_acumulado_mensal, resumo_desempenho
+
+
+def metricas_da_listagem(df):
+    # Implementação original, mantida como referência: retorno aposta a aposta sobre o histórico completo
+    df = df[df["resultado"].str.strip() != ""].copy()
+    df["retorno"] = df.apply(calcular_retorno, axis=1)
+    investido = float(df["stake"].sum())
+    retorno = float(df["retorno"].sum())
+    resumo = {
+        "apostas": len(df),
+        "ganhas": int((df["resultado"] == "ganhou").sum()),
+        "perdidas": int((df["resultado"] == "perdeu").sum()),
+        "investido": investido,
+        "retorno": retorno,
+        "yield": (retorno - investido) / investido * 100 if investido > 0 else 0.0,
+    }
+    df["ano_mes"] = pd.to_datetime(df["data"], errors="coerce").dt.strftime("%Y-%m")
+    df["lucro"] = df["retorno"] - df["stake"]
+    grafico = (
+        df.pivot_table(index="ano_mes", columns="competicao", values="lucro", aggfunc="sum", fill_value=0.0)
+        .reindex(columns=["ATP", "WTA"], fill_value=0.0)
+        .sort_index()
+        .cumsum()
+    )
+    return resumo, grafico
+
+def metricas_dos_agregados(livro):
+    agregados = livro.agregados()
+    return resumo_desempenho(agregados), lucro_acumulado_mensal(agregados)
+
+
+def medir(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, statistics.median(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Métricas do histórico: livro completo vs agregados.")
+    parser.add_argument("--apostas", type=int, nargs="+", default=[1000, 10000, 100000, 500000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    resultados = Resultados("historico")
+    print(f"{'apostas':>8} {'inserir':>10} {'listar':>10} {'página':>10} {'completo':>11} {'agregados':>11} "
+          f"{'speedup':>9}  iguais")
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in args.apostas:
+            livro = LivroApostas(os.path.join(pasta, f"livro_{n}.sqlite"), csv_migrar=None)
+            apostas = sinteticos.gerar_apostas(n, seed=n)
+            inicio = time.perf_counter()
+            livro.inserir_varias(apostas)
+            t_inserir = time.perf_counter() - inicio
+
+            df, t_listar = medir(livro.listar, args.repeticoes)
+            _, t_pagina = medir(lambda: livro.pagina(0, 50, resultado="pendente"), args.repeticoes)
+            (ref, _), t_completo = medir(lambda: metricas_da_listagem(df), args.repeticoes)
+            (res, _), t_agregados = medir(lambda: metricas_dos_agregados(livro), args.repeticoes)
+            iguais = ref["apostas"] == res["apostas"] and abs(ref["retorno"] - res["retorno"]) < 1e-6 * max(1.0, ref["retorno"])
+            livro.fechar()
+
+            for caso, t in (("inserir", t_inserir), ("listar", t_listar), ("pagina", t_pagina),
+                            ("metricas_completo", t_completo), ("metricas_agregados", t_agregados)):
+                resultados.adicionar(caso, t, apostas=n)
+            print(f"{n:>8} {t_inserir * 1e3:>8.0f}ms {t_listar * 1e3:>8.1f}ms {t_pagina * 1e3:>8.2f}ms "
+                  f"{t_completo * 1e3:>9.1f}ms "
+                  f"{t_agregados * 1e3:>9.2f}ms {(t_listar + t_completo) / t_agregados:>8.0f}x  {iguais}")
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
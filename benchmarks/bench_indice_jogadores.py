@@ -0,0 +1,70 @@
+# Compara a pesquisa linear original (match_nome / encontrar_yelo) com PlayerIndex.
+#
+#   python -m benchmarks.bench_indice_jogadores --tamanhos 2000 5000 20000 --consultas 200 --json resultados.json
+import argparse
+import time
+from difflib import get_close_matches
+
+from benchmarks.resultados import Resultados
+from benchmarks.sinteticos import gerar_consultas, gerar_nomes
+from tennis_value.indice_jogadores import PlayerIndex
+from tennis_value.nomes import normalizar_nome
+
+import pandas as pd
+
+
+def match_nome_linear(nome, df_col):
+    # Implementação original de app.py, mantida como referência
+    nome_norm = normalizar_nome(nome)
+    df_norm = df_col.dropna().apply(normalizar_nome)
+    exact_match = df_norm[df_norm == nome_norm]
+    if not exact_match.empty:
+        return exact_match.index[0]
+    matches = get_close_matches(nome_norm, df_norm.tolist(), n=1, cutoff=0.8)
+    if matches:
+        return df_norm[df_norm == matches[0]].index[0]
+    return None
+
+
+def medir(func, consultas):
+    inicio = time.perf_counter()
+    resultados = [func(c) for c in consultas]
+    return resultados, (time.perf_counter() - inicio) / len(consultas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pesquisa de nomes: linear vs PlayerIndex.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[2000, 5000, 20000])
+    parser.add_argument("--consultas", type=int, default=100)
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    resultados = Resultados("indice_jogadores")
+
+    print(f"{'jogadores':>10} {'construção':>12} {'linear/pesq.':>14} {'índice/pesq.':>14} {'speedup':>9}  iguais")
+    for n in args.tamanhos:
+        nomes = gerar_nomes(n)
+        serie = pd.Series(nomes)
+        consultas = gerar_consultas(nomes, args.consultas)
+
+        inicio = time.perf_counter()
+        indice = PlayerIndex(serie)
+        construcao = time.perf_counter() - inicio
+
+        ref, t_linear = medir(lambda c: match_nome_linear(c, serie), consultas)
+        novo, t_indice = medir(indice.procurar, consultas)
+        iguais = ref == novo
+        resultados.adicionar("construcao", construcao, jogadores=n)
+        resultados.adicionar("linear_por_pesquisa", t_linear, jogadores=n)
+        resultados.adicionar("indice_por_pesquisa", t_indice, jogadores=n)
+        print(f"{n:>10} {construcao * 1e3:>10.1f}ms {t_linear * 1e3:>12.2f}ms {t_indice * 1e3:>12.3f}ms "
+              f"{t_linear / t_indice:>8.0f}x  {iguais}")
+        if not iguais:
+            for c, a, b in zip(consultas, ref, novo):
+                if a != b:
+                    print(f"  divergência: {c!r}: linear={a!r} índice={b!r}")
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Memória e tempo por sessão das tabelas de ratings: cópia por sessão (como st.cache_data, que guarda o
+# valor serializado e devolve uma cópia desserializada a cada chamada) vs PlayerRatings partilhada.
+#
+#   python -m benchmarks.bench_memoria_ratings --tamanhos 2000 20000 --sessoes 20 --json resultados.json
+import argparse
+import pickle
+import time
+import tracemalloc
+
+from benchmarks import sinteticos
+from benchmarks.resultados import Resultados
+from tennis_value.ratings import PlayerRatings
+
+
+def alocado(func):
+    # (resultado, bytes que continuam alocados enquanto o resultado existe)
+    tracemalloc.start()
+    try:
+        resultado = func()
+        atual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, atual
+
+
+def leitura_sessao(ratings, jogos, superficie="Clay"):
+    # O que um rerun faz com a vista partilhada: uma análise manual e a avaliação do torneio
+    dados = ratings.jogador(jogos[0]["jogador_a"]), ratings.jogador(jogos[0]["jogador_b"])
+    posicoes = [ratings.procurar(j["jogador_a"]) for j in jogos]
+    return dados, ratings.valores(posicoes, superficie)
+
+
+def kib(n):
+    return f"{n / 1024:,.0f} KiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória por sessão das tabelas de ratings.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--jogos", type=int, default=50)
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    resultados = Resultados("memoria_ratings")
+    print(f"{'jogadores':>10} {'modo':>10} {'partilhado':>12} {'por sessão':>12} "
+          f"{f'{args.sessoes} sessões':>14} {'por rerun':>11}")
+    for n in args.tamanhos:
+        nomes = sinteticos.gerar_nomes(n)
+        elo_df, yelo_df = sinteticos.gerar_elo_df(nomes), sinteticos.gerar_yelo_df(nomes)
+        jogos = sinteticos.gerar_jogos(nomes, args.jogos)
+
+        # Antes: o valor serializado fica na cache e cada sessão desserializa a sua cópia em cada rerun
+        serializado = pickle.dumps((elo_df, yelo_df))
+        _, por_sessao = alocado(lambda: pickle.loads(serializado))
+        inicio = time.perf_counter()
+        for _ in range(args.sessoes):
+            pickle.loads(serializado)
+        t_copia = (time.perf_counter() - inicio) / args.sessoes
+        print(f"{n:>10} {'cópia':>10} {kib(len(serializado)):>12} {kib(por_sessao):>12} "
+              f"{kib(len(serializado) + args.sessoes * por_sessao):>14} {t_copia * 1e3:>9.2f}ms")
+
+        # Depois: uma PlayerRatings por processo; cada sessão só lê por posição
+        ratings, partilhado = alocado(lambda: PlayerRatings(elo_df, yelo_df))
+        _, por_sessao = alocado(lambda: leitura_sessao(ratings, jogos))
+        inicio = time.perf_counter()
+        for _ in range(args.sessoes):
+            leitura_sessao(ratings, jogos)
+        t_vista = (time.perf_counter() - inicio) / args.sessoes
+        print(f"{n:>10} {'partilhada':>10} {kib(partilhado):>12} {kib(por_sessao):>12} "
+              f"{kib(partilhado + args.sessoes * por_sessao):>14} {t_vista * 1e3:>9.2f}ms")
+        print(f"{'':>10} {'(arrays)':>10} {kib(ratings.memoria()):>12}")
+
+        resultados.adicionar("copia_por_rerun", t_copia, jogadores=n)
+        resultados.adicionar("vista_por_rerun", t_vista, jogadores=n, jogos=args.jogos)
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
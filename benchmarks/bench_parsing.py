@@ -0,0 +1,175 @@
+# Compara o parsing original (BeautifulSoup + html.parser) com o parsing lxml dos scrapers, página a página.
+#
+#   python -m benchmarks.bench_parsing                        # páginas guardadas em benchmarks/paginas/ ou sintéticas
+#   python -m benchmarks.bench_parsing --guardar              # guarda páginas reais (matches, torneio, jogador)
+#   TENNIS_HTTP_MODO=reproduzir python -m benchmarks.bench_parsing --guardar   # as mesmas, das gravações (offline)
+#   python -m benchmarks.bench_parsing --paginas DIR --repeticoes 20 --json resultados.json
+#
+# Os ficheiros em DIR são classificados pelo prefixo do nome: matches*.html, torneio*.html, jogador*.html.
+import argparse
+import os
+import re
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks import sinteticos
+from benchmarks.resultados import Resultados
+from tennis_value import scrapers
+from tennis_value.nomes import limpar_numero_ranking
+
+PAGINAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "paginas")
+
+
+# ===== Implementações originais de scrapers.py, mantidas como referência =====
+
+def torneios_bs(conteudo, tipo="ATP"):
+    soup = BeautifulSoup(conteudo, "html.parser")
+    torneios = []
+    permitidos = scrapers.TORNEIOS_ATP_PERMITIDOS if tipo == "ATP" else scrapers.TORNEIOS_WTA_PERMITIDOS
+    nomes_permitidos = [t.casefold() for t in permitidos]
+    for a in soup.find_all("a", href=True):
+        nome = a.text.strip()
+        href = a["href"]
+        if tipo == "ATP" and ("/atp" in href or "/atp-men" in href):
+            if nome.casefold() in nomes_permitidos:
+                url_full = scrapers.BASE_URL + href if href.startswith("/") else href
+                if url_full not in {t["url"] for t in torneios}:
+                    torneios.append({"nome": nome, "url": url_full})
+        elif tipo == "WTA" and ("/wta" in href or "/wta-women" in href):
+            if nome.casefold() in nomes_permitidos:
+                url_full = scrapers.BASE_URL + href if href.startswith("/") else href
+                if url_full not in {t["url"] for t in torneios}:
+                    torneios.append({"nome": nome, "url": url_full})
+    return torneios
+
+def nome_bs(conteudo):
+    soup = BeautifulSoup(conteudo, "html.parser")
+    h1 = soup.find("h1")
+    if h1:
+        return re.sub(r"\s+", " ", h1.get_text(strip=True))
+    return None
+
+def linhas_bs(conteudo):
+    soup = BeautifulSoup(conteudo, "html.parser")
+    tables = soup.select("table")
+    if not tables:
+        return [], {}
+    jogador_map = {}
+    for a in soup.select("a[href^='/player/']"):
+        n = a.text.strip()
+        u = scrapers.BASE_URL + a["href"] if a["href"].startswith("/") else a["href"]
+        jogador_map[n] = u
+    linhas = []
+    for table in tables:
+        tbody = table.find("tbody")
+        if not tbody:
+            continue
+        for tr in tbody.find_all("tr"):
+            tds = tr.find_all("td")
+            if len(tds) < 7:
+                continue
+            confronto = tds[2].text.strip()
+            try:
+                odd_a = float(tds[5].text.strip())
+                odd_b = float(tds[6].text.strip())
+            except:
+                odd_a = None
+                odd_b = None
+            parts = confronto.split("-")
+            if len(parts) != 2:
+                continue
+            p1, p2 = map(lambda s: limpar_numero_ranking(s.strip()), parts)
+            linhas.append((p1, p2, odd_a, odd_b))
+        if linhas:
+            break
+    return linhas, jogador_map
+
+
+PARSERS = {
+    "matches": (lambda c: (torneios_bs(c, "ATP"), torneios_bs(c, "WTA")),
+                lambda c: (scrapers.torneios_de_html(c, "ATP"), scrapers.torneios_de_html(c, "WTA"))),
+    "torneio": (linhas_bs, scrapers.linhas_de_html),
+    "jogador": (nome_bs, scrapers.nome_de_html),
+}
+
+
+def paginas_sinteticas():
+    nomes = sinteticos.gerar_nomes(400, seed=3)
+    torneios = [(n, f"/{n.lower().replace(' ', '-')}/2026/atp-men/") for n in scrapers.TORNEIOS_ATP_PERMITIDOS[:40]]
+    torneios += [(n, f"/{n.lower().replace(' ', '-')}/2026/wta-women/") for n in scrapers.TORNEIOS_WTA_PERMITIDOS[:40]]
+    torneios += [(f"Challenger {i}", f"/challenger-{i}/2026/atp-men/") for i in range(60)]
+    return [
+        ("matches (sintética)", "matches", sinteticos.pagina_matches(torneios)),
+        ("torneio (sintética)", "torneio", sinteticos.pagina_torneio(nomes, seed=1)),
+        ("jogador (sintética)", "jogador", sinteticos.pagina_jogador(nomes[0], seed=2)),
+    ]
+
+def paginas_guardadas(pasta):
+    paginas = []
+    for ficheiro in sorted(os.listdir(pasta)):
+        tipo = next((t for t in PARSERS if ficheiro.startswith(t)), None)
+        if tipo is None or not ficheiro.endswith(".html"):
+            continue
+        with open(os.path.join(pasta, ficheiro), "rb") as f:
+            paginas.append((ficheiro, tipo, f.read()))
+    return paginas
+
+def guardar_paginas(pasta):
+    from tennis_value import cliente_http
+
+    os.makedirs(pasta, exist_ok=True)
+    url_matches = f"{scrapers.BASE_URL}/matches/"
+    conteudos = {"matches.html": cliente_http.obter(url_matches)}
+    torneios = scrapers.torneios_de_html(conteudos["matches.html"], "ATP")
+    if torneios:
+        conteudos["torneio.html"] = cliente_http.obter(torneios[0]["url"])
+        linhas, jogador_map = scrapers.linhas_de_html(conteudos["torneio.html"])
+        url_jogador = next(iter(jogador_map.values()), None)
+        if url_jogador:
+            conteudos["jogador.html"] = cliente_http.obter(url_jogador)
+    for nome, conteudo in conteudos.items():
+        with open(os.path.join(pasta, nome), "wb") as f:
+            f.write(conteudo)
+        print(f"guardado {nome} ({len(conteudo) / 1024:.0f} KiB)")
+
+def medir(func, conteudo, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func(conteudo)
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, statistics.median(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parsing por página: BeautifulSoup/html.parser vs lxml.")
+    parser.add_argument("--paginas", default=PAGINAS_DIR, help="pasta com páginas guardadas")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--guardar", action="store_true", help="descarregar e guardar páginas reais em --paginas")
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    if args.guardar:
+        guardar_paginas(args.paginas)
+
+    paginas = paginas_guardadas(args.paginas) if os.path.isdir(args.paginas) else []
+    if not paginas:
+        paginas = paginas_sinteticas()
+
+    resultados = Resultados("parsing")
+    print(f"{'página':<28} {'KiB':>6} {'antes':>10} {'depois':>10} {'speedup':>9}  iguais")
+    for nome, tipo, conteudo in paginas:
+        antigo, novo = PARSERS[tipo]
+        ref, t_antes = medir(antigo, conteudo, args.repeticoes)
+        res, t_depois = medir(novo, conteudo, args.repeticoes)
+        resultados.adicionar("bs4", t_antes, pagina=nome)
+        resultados.adicionar("lxml", t_depois, pagina=nome)
+        print(f"{nome:<28} {len(conteudo) / 1024:>6.0f} {t_antes * 1e3:>8.2f}ms {t_depois * 1e3:>8.2f}ms "
+              f"{t_antes / t_depois:>8.1f}x  {ref == res}")
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
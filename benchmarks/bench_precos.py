@@ -0,0 +1,165 @@
+# Avaliação de um lote de jogos por três caminhos, por tamanho de lote:
+#   original     - o ciclo da análise automática antes do PlayerRatings: match_nome e encontrar_yelo lineares
+#                  sobre as tabelas Elo/yElo e um cálculo escalar por jogo (só até --max-original jogos)
+#   jogo a jogo  - o mesmo cálculo escalar, com as pesquisas memorizadas do PlayerRatings
+#   lote         - avaliar_jogos (arrays NumPy e um DataFrame no fim)
+# A coluna "iguais" compara valor, stake e sinal de valor dos dois lados com o caminho original (ou, acima
+# de --max-original, com o jogo a jogo). Contra o original os valores podem diferir até TOLERANCIA_FLOAT32,
+# porque o PlayerRatings guarda os ratings em float32; stakes e sinais têm de ser iguais.
+# O lote tem um custo fixo (o DataFrame) e só compensa em lotes grandes.
+#
+#   python -m benchmarks.bench_precos --jogos 10 100 1000 5000 --jogadores 2000 --json resultados.json
+import argparse
+import math
+import statistics
+import time
+from difflib import get_close_matches
+
+from benchmarks import sinteticos
+from benchmarks.bench_indice_jogadores import match_nome_linear
+from benchmarks.resultados import Resultados
+from tennis_value.nomes import normalizar_nome
+from tennis_value.precos import (
+    ODD_MAX, ODD_MIN, ODD_PADRAO_A, ODD_PADRAO_B, VALOR_MAX, VALOR_MIN,
+    avaliar_jogos, elo_final, elo_por_superficie, elo_prob, stake_por_faixa, value_bet,
+)
+from tennis_value.ratings import PlayerRatings
+
+TOLERANCIA_FLOAT32 = 1e-5
+
+
+def encontrar_yelo_linear(nome, yelo_df):
+    # Implementação original de app.py, mantida como referência
+    nrm_nome = normalizar_nome(nome)
+    ys = yelo_df["Player"].dropna().tolist()
+    nrm_ys = [normalizar_nome(x) for x in ys]
+    for idx, val in enumerate(nrm_ys):
+        if val == nrm_nome:
+            return yelo_df.iloc[idx]["yElo"]
+    matches = get_close_matches(nrm_nome, nrm_ys, n=1, cutoff=0.8)
+    if matches:
+        idx = nrm_ys.index(matches[0])
+        return yelo_df.iloc[idx]["yElo"]
+    return None
+
+
+def _linha(jogo, ef_a, ef_b):
+    # (jogador_a, jogador_b, valor_a, valor_b, stake_a, stake_b, com_valor_a, com_valor_b), como no ciclo original
+    odd_a = jogo["odd_a"] or ODD_PADRAO_A
+    odd_b = jogo["odd_b"] or ODD_PADRAO_B
+    prob_a = elo_prob(ef_a, ef_b)
+    soma = 1 / odd_a + 1 / odd_b
+    valor_a = value_bet(prob_a, soma * odd_a)
+    valor_b = value_bet(1 - prob_a, soma * odd_b)
+    return (
+        jogo["jogador_a"], jogo["jogador_b"], valor_a, valor_b, stake_por_faixa(valor_a), stake_por_faixa(valor_b),
+        ODD_MIN <= odd_a <= ODD_MAX and VALOR_MIN <= valor_a <= VALOR_MAX,
+        ODD_MIN <= odd_b <= ODD_MAX and VALOR_MIN <= valor_b <= VALOR_MAX,
+    )
+
+
+def avaliar_original(jogos, elo_df, yelo_df, superficie_en):
+    # Ciclo da análise automática original: quatro pesquisas lineares e um cálculo escalar por jogo
+    linhas = []
+    for jogo in jogos:
+        idx_a = match_nome_linear(jogo["jogador_a"], elo_df["Player"])
+        idx_b = match_nome_linear(jogo["jogador_b"], elo_df["Player"])
+        if idx_a is None or idx_b is None:
+            continue
+        dados_a = elo_df.loc[idx_a]
+        dados_b = elo_df.loc[idx_b]
+        yelo_a = encontrar_yelo_linear(jogo["jogador_a"], yelo_df)
+        yelo_b = encontrar_yelo_linear(jogo["jogador_b"], yelo_df)
+        if yelo_a is None or yelo_b is None:
+            continue
+        try:
+            ef_a = elo_final(float(dados_a["Elo"]), elo_por_superficie(dados_a, superficie_en), float(yelo_a))
+            ef_b = elo_final(float(dados_b["Elo"]), elo_por_superficie(dados_b, superficie_en), float(yelo_b))
+        except (TypeError, ValueError):
+            continue
+        linhas.append(_linha(jogo, ef_a, ef_b))
+    return linhas
+
+
+def avaliar_linha_a_linha(jogos, ratings, superficie_en):
+    # O mesmo cálculo escalar, com as pesquisas (memorizadas) e os valores do PlayerRatings
+    linhas = []
+    for jogo in jogos:
+        pa = ratings.procurar(jogo["jogador_a"])
+        pb = ratings.procurar(jogo["jogador_b"])
+        if pa is None or pb is None:
+            continue
+        geral, sup, yelo = ratings.valores([pa, pb], superficie_en)
+        ef_a = elo_final(geral[0], sup[0], yelo[0])
+        ef_b = elo_final(geral[1], sup[1], yelo[1])
+        if math.isnan(ef_a) or math.isnan(ef_b):
+            continue
+        linhas.append(_linha(jogo, float(ef_a), float(ef_b)))
+    return linhas
+
+
+def linhas_do_lote(res):
+    if res.empty:
+        return []
+    colunas = ["jogador_a", "jogador_b", "valor_a", "valor_b", "stake_a", "stake_b", "com_valor_a", "com_valor_b"]
+    return list(res[colunas].itertuples(index=False, name=None))
+
+
+def iguais(ref, linhas, tolerancia=1e-9):
+    # Mesmos jogos, valores dentro da tolerância e stakes e sinais de valor exatamente iguais
+    if len(ref) != len(linhas):
+        return False
+    for a, b in zip(ref, linhas):
+        if a[:2] != b[:2] or a[4:6] != tuple(b[4:6]) or bool(a[6]) != bool(b[6]) or bool(a[7]) != bool(b[7]):
+            return False
+        if abs(a[2] - b[2]) > tolerancia or abs(a[3] - b[3]) > tolerancia:
+            return False
+    return True
+
+
+def medir(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, statistics.median(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Avaliação de lotes de jogos: original, jogo a jogo e em lote.")
+    parser.add_argument("--jogos", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--jogadores", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--max-original", type=int, default=100,
+                        help="maior lote medido pelo caminho original (lento: pesquisas lineares)")
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    nomes = sinteticos.gerar_nomes(args.jogadores)
+    elo_df = sinteticos.gerar_elo_df(nomes)
+    yelo_df = sinteticos.gerar_yelo_df(nomes)
+    ratings = PlayerRatings(elo_df, yelo_df)
+    resultados = Resultados("precos")
+
+    print(f"{'jogos':>7} {'original':>11} {'jogo a jogo':>13} {'lote':>10} {'lote/jogo a jogo':>17}  iguais")
+    for n in args.jogos:
+        jogos = sinteticos.gerar_jogos(nomes, n, seed=n)
+        escalar, t_linhas = medir(lambda: avaliar_linha_a_linha(jogos, ratings, "Clay"), args.repeticoes)
+        res, t_lote = medir(lambda: avaliar_jogos(jogos, ratings, "Clay"), args.repeticoes)
+        ref, tolerancia, texto_original = escalar, 1e-9, f"{'—':>11}"
+        if n <= args.max_original:
+            tolerancia = TOLERANCIA_FLOAT32
+            ref, t_original = medir(lambda: avaliar_original(jogos, elo_df, yelo_df, "Clay"), 1)
+            resultados.adicionar("original", t_original, jogos=n, jogadores=args.jogadores)
+            texto_original = f"{t_original * 1e3:>9.1f}ms"
+        ok = iguais(ref, escalar, tolerancia) and iguais(ref, linhas_do_lote(res), tolerancia)
+        resultados.adicionar("jogo_a_jogo", t_linhas, jogos=n, jogadores=args.jogadores)
+        resultados.adicionar("avaliar_jogos", t_lote, jogos=n, jogadores=args.jogadores)
+        print(f"{n:>7} {texto_original} {t_linhas * 1e3:>11.2f}ms {t_lote * 1e3:>8.2f}ms "
+              f"{t_lote / t_linhas:>16.2f}x  {ok}")
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Tempo da simulação Monte Carlo da banca, por número de caminhos e de apostas.
+#
+#   python -m benchmarks.bench_simulacao --caminhos 100000 --apostas 100 500 --json resultados.json
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.resultados import Resultados
+from tennis_value import simulacao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação Monte Carlo da banca.")
+    parser.add_argument("--caminhos", type=int, default=simulacao.CAMINHOS)
+    parser.add_argument("--apostas", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--json", help="acrescentar os resultados a este ficheiro")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    resultados = Resultados("simulacao")
+    print(f"{'caminhos':>9} {'apostas':>8} {'tempo':>9} {'ruína':>7}")
+    for n in args.apostas:
+        odd = rng.uniform(1.4, 3.0, n)
+        prob = np.clip(1 / odd + rng.normal(0.03, 0.02, n), 0.01, 0.99)
+        stake = rng.choice([5.0, 7.5, 10.0], n)
+        inicio = time.perf_counter()
+        r = simulacao.simular_banca(prob, odd, stake, caminhos=args.caminhos, semente=0)
+        t = time.perf_counter() - inicio
+        resultados.adicionar("simular_banca", t, caminhos=args.caminhos, apostas=n)
+        print(f"{args.caminhos:>9} {n:>8} {t:>8.2f}s {r['prob_ruina'] * 100:>6.2f}%")
+    resultados.gravar(args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Compara dois ficheiros de resultados (ver benchmarks.resultados) caso a caso.
+#
+#   python -m benchmarks.comparar antes.json depois.json --limite 0.10
+#
+# Termina com código 1 se algum caso ficar mais lento do que `limite` (fração) em relação a `antes`.
+import argparse
+import sys
+
+from benchmarks.resultados import chave_caso, ler
+
+
+def comparar(antes, depois, limite):
+    tempos_antes = {chave_caso(c): c["segundos"] for c in antes["casos"]}
+    linhas = []
+    for caso in depois["casos"]:
+        chave = chave_caso(caso)
+        anterior = tempos_antes.get(chave)
+        razao = caso["segundos"] / anterior if anterior else None
+        linhas.append((chave, anterior, caso["segundos"], razao, razao is not None and razao > 1 + limite))
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmarks entre dois commits.")
+    parser.add_argument("antes")
+    parser.add_argument("depois")
+    parser.add_argument("--limite", type=float, default=0.10, help="abrandamento tolerado (fração)")
+    args = parser.parse_args(argv)
+
+    antes, depois = ler(args.antes), ler(args.depois)
+    print(f"antes: {antes['meta'].get('commit')}  depois: {depois['meta'].get('commit')}")
+    print(f"{'suite':<18} {'caso':<22} {'parâmetros':<28} {'antes':>10} {'depois':>10} {'razão':>7}")
+    regressoes = 0
+    for (suite, caso, parametros), t_antes, t_depois, razao, regressao in comparar(antes, depois, args.limite):
+        regressoes += regressao
+        print(f"{suite:<18} {caso:<22} {parametros:<28} "
+              f"{t_antes * 1e3 if t_antes else float('nan'):>8.3f}ms {t_depois * 1e3:>8.3f}ms "
+              f"{razao if razao else float('nan'):>6.2f}x{'  REGRESSÃO' if regressao else ''}")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
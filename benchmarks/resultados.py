@@ -0,0 +1,56 @@
+# Resultados dos benchmarks em JSON, para comparar commits com `python -m benchmarks.comparar`.
+#
+# Formato: {"meta": {commit, python, plataforma, data}, "casos": [{suite, caso, parametros, segundos}]}.
+# Vários benchmarks podem gravar no mesmo ficheiro: os casos são acrescentados aos que já lá estão.
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+
+def _commit():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def metadados():
+    return {
+        "commit": _commit(),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def chave_caso(caso):
+    return (caso["suite"], caso["caso"], json.dumps(caso["parametros"], sort_keys=True, ensure_ascii=False))
+
+
+class Resultados:
+    def __init__(self, suite):
+        self.suite = suite
+        self.casos = []
+
+    def adicionar(self, caso, segundos, **parametros):
+        self.casos.append({"suite": self.suite, "caso": caso, "parametros": parametros, "segundos": segundos})
+
+    def gravar(self, caminho):
+        if not caminho:
+            return
+        dados = ler(caminho) if os.path.exists(caminho) else {"meta": metadados(), "casos": []}
+        dados["casos"].extend(self.casos)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=1)
+
+
+def ler(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,227 @@
+import random
+import string
+
+import numpy as np
+import pandas as pd
+
+from tennis_value.nomes import normalizar_nome
+
+PRIMEIROS = [
+    "Carlos", "Jannik", "Novak", "Alexander", "Daniil", "Andrey", "Casper", "Holger", "Taylor", "Stefanos",
+    "Iga", "Aryna", "Coco", "Elena", "Jessica", "Ons", "Maria", "Karolina", "Beatriz", "Jelena",
+    "João", "Nuno", "Francisco", "Gastão", "Frederico", "Íñigo", "Jiří", "Tomáš", "Zoë", "Anaïs",
+]
+APELIDOS = [
+    "Alcaraz", "Sinner", "Djokovic", "Zverev", "Medvedev", "Rublev", "Ruud", "Rune", "Fritz", "Tsitsipas",
+    "Swiatek", "Sabalenka", "Gauff", "Rybakina", "Pegula", "Jabeur", "Sakkari", "Muchova", "Haddad Maia",
+    "Ostapenko", "Sousa", "Borges", "Cabral", "Elias", "Silva", "Lehečka", "Macháč", "Ćorić", "Müller",
+]
+
+
+def gerar_nomes(n, seed=0):
+    # Nomes únicos, com acentos e sufixos aleatórios para chegar a n jogadores
+    rng = random.Random(seed)
+    nomes = set()
+    while len(nomes) < n:
+        sufixo = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 6)))
+        apelido = rng.choice(APELIDOS)
+        if rng.random() < 0.85:
+            apelido = apelido + sufixo
+        nomes.add(f"{rng.choice(PRIMEIROS)} {apelido}")
+    return sorted(nomes)
+
+
+def perturbar(nome, rng):
+    # Simula as diferenças entre tennisexplorer e tennisabstract (gralhas, acentos, caixa)
+    op = rng.random()
+    if op < 0.25 and len(nome) > 4:
+        i = rng.randrange(len(nome))
+        return nome[:i] + nome[i + 1:]
+    if op < 0.5:
+        i = rng.randrange(len(nome))
+        return nome[:i] + rng.choice(string.ascii_lowercase) + nome[i:]
+    if op < 0.75:
+        return nome.upper()
+    return nome.replace("a", "á", 1)
+
+
+def gerar_consultas(nomes, n, seed=1):
+    # Mistura de acertos exatos, nomes perturbados e nomes inexistentes
+    rng = random.Random(seed)
+    consultas = []
+    for _ in range(n):
+        op = rng.random()
+        if op < 0.4:
+            consultas.append(rng.choice(nomes))
+        elif op < 0.85:
+            consultas.append(perturbar(rng.choice(nomes), rng))
+        else:
+            consultas.append(f"{rng.choice(PRIMEIROS)} Desconhecido{rng.randint(0, 999)}")
+    return consultas
+
+
+def gerar_elo_df(nomes, seed=0):
+    rng = random.Random(seed)
+    linhas = []
+    for nome in nomes:
+        elo = rng.uniform(1500, 2200)
+        linhas.append({
+            "Player": nome,
+            "chave": normalizar_nome(nome),
+            "Elo": elo,
+            "hElo": elo + rng.uniform(-80, 80),
+            "cElo": elo + rng.uniform(-80, 80),
+            "gElo": elo + rng.uniform(-80, 80),
+        })
+    return pd.DataFrame(linhas)
+
+
+def gerar_yelo_df(nomes, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Player": nomes,
+        "chave": [normalizar_nome(n) for n in nomes],
+        "yElo": [rng.uniform(1500, 2200) for _ in nomes],
+    })
+
+
+def gerar_jogos(nomes, n, seed=0):
+    # Jogos entre pares aleatórios de jogadores, no formato de scrapers.obter_jogos_do_torneio
+    rng = random.Random(seed)
+    jogos = []
+    for _ in range(n):
+        a, b = rng.sample(nomes, 2)
+        odd_a = round(rng.uniform(1.15, 4.5), 2)
+        odd_b = round(1 / max(0.05, 1.06 - 1 / odd_a), 2)
+        jogos.append({"label": f"{a} vs {b}", "jogador_a": a, "jogador_b": b, "odd_a": odd_a, "odd_b": odd_b})
+    return jogos
+
+
+def gerar_jogos_historicos(n, seed=0):
+    # Jogos com ratings, odds de fecho e resultado, no formato de tennis_value.backtest
+    rng = np.random.default_rng(seed)
+    geral = rng.uniform(1500, 2200, size=(n, 2))
+    sup = geral + rng.uniform(-80, 80, size=(n, 2))
+    yelo = geral + rng.normal(0, 60, size=(n, 2))
+    forca = (sup / geral) * yelo
+    prob_a = 1 / (1 + 10 ** ((forca[:, 1] - forca[:, 0]) / 400))
+    # Odds da casa: probabilidade com ruído e margem de ~6%
+    prob_casa = np.clip(prob_a + rng.normal(0, 0.06, size=n), 0.05, 0.95)
+    vence_a = rng.random(n) < prob_a
+    sets_perdedor = (rng.random(n) < 0.35).astype(int)
+    return pd.DataFrame({
+        "data": pd.date_range("2025-01-01", periods=n, freq="37min").strftime("%Y-%m-%d %H:%M"),
+        "elo_geral_a": geral[:, 0], "elo_sup_a": sup[:, 0], "yelo_a": yelo[:, 0],
+        "elo_geral_b": geral[:, 1], "elo_sup_b": sup[:, 1], "yelo_b": yelo[:, 1],
+        "odd_a": np.round(1 / (prob_casa * 1.06), 2), "odd_b": np.round(1 / ((1 - prob_casa) * 1.06), 2),
+        "vencedor": np.where(vence_a, "a", "b"),
+        "sets_a": np.where(vence_a, 2, sets_perdedor), "sets_b": np.where(vence_a, sets_perdedor, 2),
+    })
+
+
+# ===== Histórico de apostas (para os benchmarks do livro) =====
+
+def gerar_apostas(n, seed=0, meses=36):
+    # Apostas com resultado, distribuídas por `meses` meses, como as regista a app
+    rng = random.Random(seed)
+    resultados = ["ganhou", "perdeu", "perdeu", "ganhou", "cashout", ""]
+    apostas = []
+    for i in range(n):
+        ano, mes = divmod(rng.randrange(meses), 12)
+        apostas.append({
+            "data": f"{2023 + ano}-{mes + 1:02d}-{rng.randint(1, 28):02d}",
+            "evento": f"Jogador {i % 997} vs Jogador {(i * 7) % 991}",
+            "aposta": f"Jogador {i % 997}",
+            "odd": round(rng.uniform(1.43, 3.15), 2),
+            "stake": rng.choice([5.0, 7.5, 10.0]),
+            "resultado": rng.choice(resultados),
+            "competicao": rng.choice(["ATP", "WTA"]),
+            "torneio": f"Torneio {rng.randrange(60)}",
+        })
+    return apostas
+
+
+# ===== Páginas HTML com a estrutura do tennisexplorer (para os benchmarks de parsing) =====
+
+def _nome_te(nome):
+    # tennisexplorer mostra "Apelido I."
+    partes = nome.split()
+    return f"{partes[-1]} {partes[0][0]}."
+
+def _slug(nome):
+    return nome.replace(" ", "-").lower()
+
+def _navegacao(rng, n_links):
+    # Menus, rodapé e listas laterais: a maior parte dos links de uma página real
+    itens = "".join(
+        f"<li><a href='/{rng.choice(['ranking', 'calendar', 'list-players', 'statistics'])}/?p={i}'>"
+        f"<span class='i'>{''.join(rng.choices(string.ascii_letters, k=8))}</span></a></li>"
+        for i in range(n_links)
+    )
+    return (
+        "<head><meta charset='utf-8'><title>Tennis Explorer</title>"
+        "<script>var dados = {a: 1, b: [1, 2, 3]};</script><style>.x{color:red}</style></head>"
+        f"<div id='nav'><ul>{itens}</ul></div>"
+    )
+
+def pagina_matches(torneios, n_links=2500, seed=0):
+    # torneios: lista de (nome, href); inclui links repetidos e torneios fora da lista de permissão
+    rng = random.Random(seed)
+    blocos = []
+    for nome, href in torneios:
+        jogos = "".join(
+            f"<tr><td class='first time'>1{rng.randint(0, 9)}:00</td><td class='t-name'>"
+            f"<a href='/match-detail/?id={rng.randint(1, 10**7)}'>x - y</a></td></tr>"
+            for _ in range(rng.randint(2, 8))
+        )
+        blocos.append(
+            f"<table class='result'><tbody><tr class='head flags'><td class='t-name' colspan='2'>"
+            f"<a href='{href}'>{nome}</a></td></tr>{jogos}</tbody></table>"
+        )
+        blocos.append(f"<div class='box'><a href='{href}'>{nome}</a></div>")
+    return (f"<html>{_navegacao(rng, n_links)}<body><div id='center'>{''.join(blocos)}</div>"
+            f"</body></html>").encode("utf-8")
+
+def pagina_torneio(nomes, n_jogos=32, n_links=1500, seed=0):
+    rng = random.Random(seed)
+    jogadores = rng.sample(nomes, 2 * n_jogos)
+    linhas = []
+    for i in range(n_jogos):
+        a, b = jogadores[2 * i], jogadores[2 * i + 1]
+        odd_a, odd_b = round(rng.uniform(1.1, 4.0), 2), round(rng.uniform(1.1, 4.0), 2)
+        linhas.append(
+            f"<tr class='{'one' if i % 2 else 'two'}'><td class='first time'>1{i % 10}:30</td>"
+            f"<td class='s-color'><span title='Hard'>H</span></td>"
+            f"<td class='t-name'><a href='/player/{_slug(a)}/'>{_nome_te(a)}</a> ({rng.randint(1, 200)}) - "
+            f"<a href='/player/{_slug(b)}/'>{_nome_te(b)}</a></td>"
+            f"<td class='h2h'>{rng.randint(0, 5)}-{rng.randint(0, 5)}</td><td class='tl'>&nbsp;</td>"
+            f"<td class='course'>{odd_a}</td><td class='course'>{odd_b}</td>"
+            f"<td class='alone'><a href='/match-detail/?id={rng.randint(1, 10**7)}'>info</a></td></tr>"
+        )
+    resultados = "".join(
+        f"<tr><td>{rng.randint(1, 28)}.0{rng.randint(1, 9)}.</td><td><a href='/player/{_slug(n)}/'>{_nome_te(n)}</a></td>"
+        f"<td>6-4 6-3</td></tr>"
+        for n in rng.sample(nomes, min(len(nomes), 120))
+    )
+    return (
+        f"<html>{_navegacao(rng, n_links)}<body><div id='center'>"
+        f"<table class='result'><thead><tr><th>Data</th><th></th><th>Jogo</th><th>H2H</th><th></th>"
+        f"<th>1</th><th>2</th><th></th></tr></thead><tbody>{''.join(linhas)}</tbody></table>"
+        f"<table class='result flags'><tbody>{resultados}</tbody></table>"
+        f"</div></body></html>"
+    ).encode("utf-8")
+
+def pagina_jogador(nome, n_links=1500, n_jogos=200, seed=0):
+    rng = random.Random(seed)
+    partes = nome.split()
+    jogos = "".join(
+        f"<tr><td>{rng.randint(2015, 2026)}</td><td><a href='/tournament/{i}/'>T{i}</a></td>"
+        f"<td>{rng.choice(['W', 'L'])}</td><td>6-{rng.randint(0, 4)}</td></tr>"
+        for i in range(n_jogos)
+    )
+    return (
+        f"<html>{_navegacao(rng, n_links)}<body><div id='center'><div class='box boxBasic'>"
+        f"<table class='plDetail'><tbody><tr><td class='image'></td><td>"
+        f"<h1>{' '.join(partes[1:])} {partes[0]}</h1><div class='date'>Country: Portugal</div></td></tr></tbody></table>"
+        f"</div><table class='result balance'><tbody>{jogos}</tbody></table></div></body></html>"
+    ).encode("utf-8")
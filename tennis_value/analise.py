@@ -0,0 +1,117 @@
+# Análise automática memorizada por jogo, partilhada por todas as sessões.
+#
+# Cada jogo avaliado fica guardado com a chave (versão dos ratings, superfície, jogador A, jogador B,
+# odd A, odd B, perfis dos jogadores, opções da avaliação); jogos sem ratings também, para não
+# voltarem a passar pela pesquisa aproximada de nomes. Um rerun que não mudou nada (um clique num
+# widget de outra aba) encontra o lote inteiro já montado e devolve o mesmo DataFrame, sem pesquisar
+# nem calcular.
+# Quando os ratings são recarregados a versão muda e as entradas antigas deixam de ser usadas;
+# invalidar() liberta-as logo.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from tennis_value import metricas
+from tennis_value.precos import _avaliar_pares
+
+MAX_JOGOS = 5000
+MAX_LOTES = 32
+
+
+def chave_jogo(jogo):
+    return (jogo["jogador_a"], jogo["jogador_b"])
+
+
+def jogos_alterados(jogos_anteriores, jogos):
+    # Chaves dos jogos novos ou com odds diferentes desde `jogos_anteriores`
+    odds_anteriores = {chave_jogo(j): (j["odd_a"], j["odd_b"]) for j in jogos_anteriores or []}
+    return {chave_jogo(j) for j in jogos if odds_anteriores.get(chave_jogo(j)) != (j["odd_a"], j["odd_b"])}
+
+
+class MemoAnalise:
+    def __init__(self, max_jogos=MAX_JOGOS, max_lotes=MAX_LOTES):
+        self.max_jogos = max_jogos
+        self.max_lotes = max_lotes
+        self._lock = threading.Lock()
+        self._jogos = OrderedDict()  # chave do jogo -> dict com a linha da avaliação (ou None)
+        self._lotes = OrderedDict()  # tuplo das chaves dos jogos -> DataFrame
+        self.acertos = 0
+        self.calculados = 0
+
+    @staticmethod
+    def _chave(jogo, ratings, superficie_en, opcoes):
+        return (ratings.versao, superficie_en, jogo["jogador_a"], jogo["jogador_b"],
+                jogo["odd_a"], jogo["odd_b"], jogo.get("url_a"), jogo.get("url_b"), opcoes)
+
+    def avaliar(self, jogos, ratings, superficie_en, **kwargs):
+        # Igual a precos.avaliar_jogos (mesmas linhas, pela ordem de `jogos`), mas só calcula os jogos
+        # ainda não vistos. O DataFrame devolvido é partilhado: não o alterar.
+        opcoes = tuple(sorted(kwargs.items()))
+        chaves = tuple(self._chave(j, ratings, superficie_en, opcoes) for j in jogos)
+        with self._lock:
+            lote = self._lotes.get(chaves)
+            if lote is not None:
+                self._lotes.move_to_end(chaves)
+                self.acertos += len(chaves)
+                return lote
+            linhas = {c: self._jogos.get(c, False) for c in chaves}
+        em_falta = [(c, j) for c, j in zip(chaves, jogos) if linhas[c] is False]
+        novas = self._calcular([j for _, j in em_falta], ratings, superficie_en, kwargs)
+        for (c, _), linha in zip(em_falta, novas):
+            linhas[c] = linha
+
+        registos = [linhas[c] for c in chaves if linhas[c] is not None]
+        lote = pd.DataFrame.from_records(registos) if registos else pd.DataFrame()
+        with self._lock:
+            self.acertos += len(chaves) - len(em_falta)
+            self.calculados += len(em_falta)
+            for (c, _), linha in zip(em_falta, novas):
+                self._jogos[c] = linha
+            while len(self._jogos) > self.max_jogos:
+                self._jogos.popitem(last=False)
+            self._lotes[chaves] = lote
+            while len(self._lotes) > self.max_lotes:
+                self._lotes.popitem(last=False)
+        return lote
+
+    def _calcular(self, jogos, ratings, superficie_en, kwargs):
+        # Uma linha (dict) por jogo, ou None quando faltam ratings a algum dos jogadores
+        if not jogos:
+            return []
+        linhas = [None] * len(jogos)
+        pares, indices = [], []
+        with metricas.medir("nomes"):
+            for i, jogo in enumerate(jogos):
+                pa = ratings.procurar(jogo["jogador_a"], jogo.get("url_a"))
+                pb = ratings.procurar(jogo["jogador_b"], jogo.get("url_b"))
+                if pa is not None and pb is not None:
+                    pares.append((jogo, pa, pb))
+                    indices.append(i)
+        if pares:
+            with metricas.medir("precos"):
+                colunas, validos = _avaliar_pares(pares, ratings, superficie_en, **kwargs)
+                nomes = list(colunas)
+                valores = [np.asarray(c).tolist() for c in colunas.values()]
+                for i, valido, registo in zip(indices, validos, zip(*valores)):
+                    if valido:
+                        linhas[i] = dict(zip(nomes, registo))
+        return linhas
+
+    def invalidar(self, ratings=None):
+        # Esquece os jogos avaliados com `ratings` (ou tudo, com ratings=None)
+        with self._lock:
+            if ratings is None:
+                self._jogos.clear()
+                self._lotes.clear()
+                return
+            for chave in [c for c in self._jogos if c[0] == ratings.versao]:
+                del self._jogos[chave]
+            for chave in [c for c in self._lotes if c and c[0][0] == ratings.versao]:
+                del self._lotes[chave]
+
+    def estatisticas(self):
+        with self._lock:
+            return {"jogos": len(self._jogos), "lotes": len(self._lotes),
+                    "acertos": self.acertos, "calculados": self.calculados}
@@ -0,0 +1,229 @@
+# Backtest dos parâmetros de valor (VALOR_MIN/MAX, ODD_MIN/MAX, faixas de stake, divisores +1.5 sets)
+# sobre jogos históricos, com a mesma fórmula de preços da app.
+#
+#   python -m tennis_value.backtest jogos_2025.csv --valor-min 0.03 0.045 0.06 --valor-max 0.2 0.275 \
+#       --odd-min 1.3 1.425 --odd-max 2.8 3.15 --faixas "0.11:5,0.18:7.5,inf:10" --processos 8 --saida grelha.csv
+#
+# O ficheiro (CSV ou Parquet) tem uma linha por jogo, por ordem cronológica ou com coluna "data":
+#   elo_geral_a, elo_sup_a, yelo_a, elo_geral_b, elo_sup_b, yelo_b   ratings à data do jogo
+#   odd_a, odd_b                                                     odds de fecho
+#   vencedor                                                         "a" ou "b"
+#   sets_a, sets_b (opcionais)                                       sets ganhos, para liquidar +1.5 sets
+# Sem sets, os lados "especiais" são liquidados como apostas ao vencedor à odd normal.
+#
+# As probabilidades e o valor de cada lado não dependem dos parâmetros e são calculados uma vez;
+# cada bloco de configurações é avaliado como matrizes (configurações x apostas), sem ciclo por aposta.
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tennis_value.precos import (
+    FAIXAS_STAKE, MAIS15_DIVISOR_ALTO, MAIS15_DIVISOR_BAIXO, MAIS15_ODD_MEDIA, MAIS15_ODD_MIN,
+    ODD_MAX, ODD_MIN, VALOR_MAX, VALOR_MIN, avaliar_arrays, regras_aposta,
+)
+
+COLUNAS_OBRIGATORIAS = ["elo_geral_a", "yelo_a", "elo_geral_b", "yelo_b", "odd_a", "odd_b", "vencedor"]
+PARAMETROS = [
+    "valor_min", "valor_max", "odd_min", "odd_max", "faixas",
+    "mais15_odd_min", "mais15_odd_media", "divisor_baixo", "divisor_alto",
+]
+PADROES = {
+    "valor_min": VALOR_MIN, "valor_max": VALOR_MAX, "odd_min": ODD_MIN, "odd_max": ODD_MAX,
+    "faixas": FAIXAS_STAKE, "mais15_odd_min": MAIS15_ODD_MIN, "mais15_odd_media": MAIS15_ODD_MEDIA,
+    "divisor_baixo": MAIS15_DIVISOR_BAIXO, "divisor_alto": MAIS15_DIVISOR_ALTO,
+}
+BANCA_INICIAL = 1000.0
+CONFIGS_POR_BLOCO = 256
+
+
+def carregar_jogos(caminho):
+    if caminho.endswith(".parquet"):
+        df = pd.read_parquet(caminho)
+    else:
+        df = pd.read_csv(caminho)
+    em_falta = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if em_falta:
+        raise ValueError(f"colunas em falta em {caminho}: {em_falta}")
+    if "data" in df.columns:
+        df = df.sort_values("data", kind="stable", ignore_index=True)
+    return df
+
+
+class Apostas:
+    # Os dois lados de cada jogo como arrays (ordem cronológica), com tudo o que não depende dos parâmetros
+    __slots__ = ("odd", "valor", "ganhou", "ganhou_mais15", "n_jogos")
+
+    def __init__(self, odd, valor, ganhou, ganhou_mais15, n_jogos):
+        self.odd = odd
+        self.valor = valor
+        self.ganhou = ganhou
+        self.ganhou_mais15 = ganhou_mais15
+        self.n_jogos = n_jogos
+
+    @classmethod
+    def de_jogos(cls, jogos):
+        geral_a = jogos["elo_geral_a"].to_numpy(dtype=float)
+        geral_b = jogos["elo_geral_b"].to_numpy(dtype=float)
+        sup_a = jogos["elo_sup_a"].to_numpy(dtype=float) if "elo_sup_a" in jogos else geral_a
+        sup_b = jogos["elo_sup_b"].to_numpy(dtype=float) if "elo_sup_b" in jogos else geral_b
+        sup_a = np.where(np.isnan(sup_a), geral_a, sup_a)
+        sup_b = np.where(np.isnan(sup_b), geral_b, sup_b)
+        odd_a = jogos["odd_a"].to_numpy(dtype=float)
+        odd_b = jogos["odd_b"].to_numpy(dtype=float)
+
+        # Mesma avaliação que a análise automática (sem arredondamento)
+        av = avaliar_arrays(geral_a, sup_a, jogos["yelo_a"].to_numpy(dtype=float),
+                            geral_b, sup_b, jogos["yelo_b"].to_numpy(dtype=float), odd_a, odd_b)
+        valor_a, valor_b = av["valor_a"], av["valor_b"]
+
+        vencedor = jogos["vencedor"].astype(str).str.strip().str.lower().to_numpy()
+        ganhou_a = vencedor == "a"
+        if "sets_a" in jogos and "sets_b" in jogos:
+            mais15_a = ganhou_a | (jogos["sets_a"].to_numpy(dtype=float) >= 1)
+            mais15_b = ~ganhou_a | (jogos["sets_b"].to_numpy(dtype=float) >= 1)
+        else:
+            mais15_a, mais15_b = ganhou_a, ~ganhou_a
+
+        # Intercalados por jogo (a0, b0, a1, b1, ...) para manter a ordem cronológica do drawdown
+        def lados(a, b):
+            return np.column_stack([a, b]).ravel()
+
+        valido = ~np.isnan(valor_a + valor_b) & np.isin(vencedor, ["a", "b"])
+        valido = lados(valido, valido)
+        return cls(
+            odd=lados(odd_a, odd_b)[valido],
+            valor=lados(valor_a, valor_b)[valido],
+            ganhou=lados(ganhou_a, ~ganhou_a)[valido],
+            ganhou_mais15=lados(mais15_a, mais15_b)[valido],
+            n_jogos=int(valido.sum() // 2),
+        )
+
+
+def grelha(**valores):
+    # Produto cartesiano dos valores por parâmetro; parâmetros omitidos ficam com o valor da app
+    listas = [valores.get(p) or [PADROES[p]] for p in PARAMETROS]
+    return [dict(zip(PARAMETROS, combinacao)) for combinacao in itertools.product(*listas)]
+
+
+def _coluna(configs, parametro):
+    return np.array([c[parametro] for c in configs], dtype=float)[:, None]
+
+def avaliar_bloco(apostas, configs, banca_inicial=BANCA_INICIAL):
+    # Avalia len(configs) configurações de uma vez: matrizes (configurações, apostas), com as regras de
+    # aposta da app (precos.regras_aposta) e os parâmetros de cada configuração como colunas
+    odd = np.broadcast_to(apostas.odd[None, :], (len(configs), len(apostas.odd)))
+    valor = np.broadcast_to(apostas.valor[None, :], odd.shape)
+    com_valor, stake, odd_mais15, especial = regras_aposta(
+        valor, odd,
+        valor_min=_coluna(configs, "valor_min"), valor_max=_coluna(configs, "valor_max"),
+        odd_min=_coluna(configs, "odd_min"), odd_max=_coluna(configs, "odd_max"),
+        faixas=[c["faixas"] for c in configs],
+        mais15_odd_min=_coluna(configs, "mais15_odd_min"), mais15_odd_media=_coluna(configs, "mais15_odd_media"),
+        divisor_baixo=_coluna(configs, "divisor_baixo"), divisor_alto=_coluna(configs, "divisor_alto"),
+    )
+    # Só se aposta nos lados com valor; nos especiais a aposta é a +1.5 sets
+    stake = np.where(com_valor, stake, 0.0)
+    odd_aposta = np.where(especial, odd_mais15, odd)
+    ganhou = np.where(especial, apostas.ganhou_mais15[None, :], apostas.ganhou[None, :])
+
+    lucro = np.where(ganhou, stake * (odd_aposta - 1), -stake)
+    acumulado = np.cumsum(lucro, axis=1)
+    pico = np.maximum(np.maximum.accumulate(acumulado, axis=1), 0.0)
+    investido = stake.sum(axis=1)
+    lucro_total = acumulado[:, -1] if acumulado.shape[1] else np.zeros(len(configs))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        yield_pct = np.where(investido > 0, lucro_total / investido * 100, 0.0)
+    return pd.DataFrame({
+        "apostas": (stake > 0).sum(axis=1),
+        "ganhas": ((stake > 0) & ganhou).sum(axis=1),
+        "investido": investido,
+        "lucro": lucro_total,
+        "roi": lucro_total / banca_inicial * 100,
+        "yield": yield_pct,
+        "drawdown_max": (pico - acumulado).max(axis=1) if acumulado.shape[1] else np.zeros(len(configs)),
+    })
+
+
+# Estado de cada processo do pool: as apostas são enviadas uma vez, no arranque do processo
+_apostas_processo = None
+
+def _iniciar_processo(apostas):
+    global _apostas_processo
+    _apostas_processo = apostas
+
+def _avaliar_no_processo(args):
+    configs, banca_inicial = args
+    return avaliar_bloco(_apostas_processo, configs, banca_inicial)
+
+
+def varrer_grelha(apostas, configs, processos=None, por_bloco=CONFIGS_POR_BLOCO, banca_inicial=BANCA_INICIAL):
+    # Uma linha por configuração: parâmetros + apostas, ganhas, investido, lucro, roi, yield, drawdown_max
+    blocos = [configs[i:i + por_bloco] for i in range(0, len(configs), por_bloco)]
+    processos = processos if processos is not None else (os.cpu_count() or 1)
+    if processos <= 1 or len(blocos) <= 1:
+        partes = [avaliar_bloco(apostas, b, banca_inicial) for b in blocos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(blocos)), initializer=_iniciar_processo,
+                                 initargs=(apostas,)) as pool:
+            partes = list(pool.map(_avaliar_no_processo, [(b, banca_inicial) for b in blocos]))
+    metricas = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    parametros = pd.DataFrame(configs, columns=PARAMETROS)
+    parametros["faixas"] = parametros["faixas"].map(formatar_faixas)
+    return pd.concat([parametros, metricas], axis=1)
+
+
+def ler_faixas(texto):
+    # "0.11:5,0.18:7.5,inf:10" -> ((0.11, 5.0), (0.18, 7.5), (inf, 10.0))
+    faixas = []
+    for parte in texto.split(","):
+        limite, _, stake = parte.partition(":")
+        faixas.append((float(limite), float(stake)))
+    if not faixas or any(a[0] >= b[0] for a, b in zip(faixas, faixas[1:])):
+        raise argparse.ArgumentTypeError(f"faixas com limites crescentes esperadas: {texto!r}")
+    return tuple(faixas)
+
+def formatar_faixas(faixas):
+    return ",".join(f"{'inf' if math.isinf(limite) else f'{limite:g}'}:{stake:g}" for limite, stake in faixas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest em grelha dos parâmetros de valor e stake.")
+    parser.add_argument("jogos", help="CSV ou Parquet com os jogos históricos")
+    for parametro in PARAMETROS:
+        if parametro == "faixas":
+            parser.add_argument("--faixas", type=ler_faixas, nargs="+", metavar="LIMITE:STAKE,...")
+        else:
+            parser.add_argument(f"--{parametro.replace('_', '-')}", type=float, nargs="+", dest=parametro)
+    parser.add_argument("--processos", type=int, default=None, help="omissão: número de CPUs")
+    parser.add_argument("--banca", type=float, default=BANCA_INICIAL, help="banca inicial, para o ROI")
+    parser.add_argument("--ordenar", default="yield", choices=["yield", "roi", "lucro", "drawdown_max", "apostas"])
+    parser.add_argument("--topo", type=int, default=20, help="configurações mostradas")
+    parser.add_argument("--saida", help="CSV com todas as configurações")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    jogos = carregar_jogos(args.jogos)
+    if "sets_a" not in jogos or "sets_b" not in jogos:
+        print("aviso: sem sets_a/sets_b, as apostas +1.5 sets são liquidadas como apostas ao vencedor",
+              file=sys.stderr)
+    apostas = Apostas.de_jogos(jogos)
+    configs = grelha(**{p: getattr(args, p) for p in PARAMETROS})
+    resultado = varrer_grelha(apostas, configs, args.processos, banca_inicial=args.banca)
+    resultado = resultado.sort_values(args.ordenar, ascending=args.ordenar == "drawdown_max", ignore_index=True)
+    if args.saida:
+        resultado.to_csv(args.saida, index=False)
+    print(resultado.head(args.topo).to_string(index=False))
+    print(f"{len(configs)} configurações x {apostas.n_jogos} jogos em {time.perf_counter() - inicio:.1f}s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+# ===== Parâmetros da cache em disco =====
+CACHE_DIR = os.environ.get(
+    "TENNIS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+CACHE_DB = os.path.join(CACHE_DIR, "respostas.sqlite")
+
+MINUTO = 60
+HORA = 60 * MINUTO
+DIA = 24 * HORA
+MIB = 1024 * 1024
+# Respostas não pedidas há mais do que isto são apagadas ao abrir a cache
+IDADE_MAX = float(os.environ.get("TENNIS_CACHE_IDADE_MAX", str(90 * DIA)))
+
+
+# Política de cache de uma fonte: validade (em segundos) e limites da cache em memória do cliente HTTP
+class PoliticaCache:
+    __slots__ = ("nome", "padrao", "ttl", "max_entradas", "max_bytes")
+
+    def __init__(self, nome, padrao, ttl, max_entradas, max_bytes):
+        self.nome = nome
+        self.padrao = re.compile(padrao) if isinstance(padrao, str) else padrao
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+
+
+# Primeira política cujo padrão corresponder ao URL é a que se aplica
+POLITICAS = [
+    PoliticaCache("jogadores", r"tennisexplorer\.com/player/", 30 * DIA, 2000, 64 * MIB),
+    PoliticaCache("torneios", r"tennisexplorer\.com/matches/", 30 * MINUTO, 8, 8 * MIB),
+    PoliticaCache("odds", r"tennisexplorer\.com/", 5 * MINUTO, 64, 32 * MIB),
+    PoliticaCache("ratings", r"tennisabstract\.com/reports/", 12 * HORA, 8, 64 * MIB),
+]
+POLITICA_PADRAO = PoliticaCache("outros", None, 5 * MINUTO, 64, 16 * MIB)
+
+
+def politica_para(url, politicas=None):
+    for politica in (politicas if politicas is not None else POLITICAS):
+        if politica.padrao.search(url):
+            return politica
+    return POLITICA_PADRAO
+
+
+def politica(nome):
+    for p in POLITICAS:
+        if p.nome == nome:
+            return p
+    if nome == POLITICA_PADRAO.nome:
+        return POLITICA_PADRAO
+    raise KeyError(nome)
+
+
+def ttl_para(url, politicas=None):
+    return politica_para(url, politicas).ttl
+
+
+class CacheRespostas:
+    def __init__(self, caminho=CACHE_DB):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS respostas (
+                url TEXT PRIMARY KEY,
+                obtido_em REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                conteudo BLOB NOT NULL
+            )
+            """
+        )
+        self._con.commit()
+
+    def ler(self, url):
+        # Devolve (obtido_em, etag, last_modified, conteudo) ou None
+        with self._lock:
+            linha = self._con.execute(
+                "SELECT obtido_em, etag, last_modified, conteudo FROM respostas WHERE url = ?", (url,)
+            ).fetchone()
+        if linha is None:
+            return None
+        obtido_em, etag, last_modified, comprimido = linha
+        try:
+            return obtido_em, etag, last_modified, zlib.decompress(comprimido)
+        except zlib.error:
+            self.remover(url)
+            return None
+
+    def gravar(self, url, conteudo, etag=None, last_modified=None, obtido_em=None):
+        comprimido = zlib.compress(conteudo, 6)
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT OR REPLACE INTO respostas (url, obtido_em, etag, last_modified, conteudo) VALUES (?, ?, ?, ?, ?)",
+                (url, obtido_em if obtido_em is not None else time.time(), etag, last_modified, comprimido),
+            )
+
+    def tocar(self, url, obtido_em=None):
+        with self._lock, self._con:
+            self._con.execute(
+                "UPDATE respostas SET obtido_em = ? WHERE url = ?",
+                (obtido_em if obtido_em is not None else time.time(), url),
+            )
+
+    def remover(self, url):
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM respostas WHERE url = ?", (url,))
+
+    def expirar(self, padrao=None):
+        # Marca entradas como expiradas sem apagar os validadores (o próximo pedido é condicional)
+        with self._lock, self._con:
+            if padrao is None:
+                self._con.execute("UPDATE respostas SET obtido_em = 0")
+            else:
+                self._con.execute("UPDATE respostas SET obtido_em = 0 WHERE url LIKE ?", (f"%{padrao}%",))
+
+    def expirar_fonte(self, nome):
+        # Como expirar(), mas só para os URLs cuja política é `nome`
+        with self._lock, self._con:
+            urls = [u for (u,) in self._con.execute("SELECT url FROM respostas WHERE obtido_em > 0")
+                    if politica_para(u).nome == nome]
+            self._con.executemany("UPDATE respostas SET obtido_em = 0 WHERE url = ?", [(u,) for u in urls])
+
+    def limpar_antigas(self, idade_max=IDADE_MAX):
+        # Também apaga as expiradas à força (obtido_em = 0) que nunca mais foram pedidas; devolve quantas
+        with self._lock, self._con:
+            return self._con.execute("DELETE FROM respostas WHERE obtido_em < ?", (time.time() - idade_max,)).rowcount
+
+    def estatisticas(self):
+        with self._lock:
+            n, total = self._con.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(conteudo)), 0) FROM respostas").fetchone()
+        return {"entradas": n, "bytes_comprimidos": total}
+
+
+def cache_padrao():
+    if os.environ.get("TENNIS_CACHE_DISCO", "1") == "0":
+        return None
+    try:
+        cache = CacheRespostas()
+        cache.limpar_antigas()
+        return cache
+    except (OSError, sqlite3.Error):
+        return None
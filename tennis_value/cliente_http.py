@@ -0,0 +1,297 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tennis_value import cache_disco, gravacoes, metricas, voo_unico
+
+# ===== Parâmetros do cliente HTTP =====
+TIMEOUT_PADRAO = (5, 20)  # (ligação, leitura) em segundos
+TENTATIVAS = 3
+BACKOFF = 0.5  # 0.5s, 1s, 2s entre tentativas
+STATUS_REPETIR = (429, 500, 502, 503, 504)
+POOL_POR_HOST = 10
+USER_AGENT = "Mozilla/5.0 (compatible; tennis-value-bet-app)"
+MAX_PEDIDOS_POR_HOST = int(os.environ.get("MAX_PEDIDOS_POR_HOST", "4"))
+INTERVALO_MIN_HOST = float(os.environ.get("INTERVALO_MIN_HOST", "0.1"))
+
+
+# Limita pedidos simultâneos e o ritmo de pedidos por host
+class LimitadorHost:
+    def __init__(self, max_por_host=MAX_PEDIDOS_POR_HOST, intervalo_min=INTERVALO_MIN_HOST):
+        self.max_por_host = max(1, max_por_host)
+        self.intervalo_min = intervalo_min
+        self._lock = threading.Lock()
+        self._semaforos = {}
+        self._proximo = {}
+
+    def _semaforo(self, host):
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.max_por_host)
+            return self._semaforos[host]
+
+    def _esperar_vez(self, host):
+        with self._lock:
+            agora = time.monotonic()
+            inicio = max(agora, self._proximo.get(host, agora))
+            self._proximo[host] = inicio + self.intervalo_min
+        if inicio > agora:
+            time.sleep(inicio - agora)
+
+    def executar(self, url, func, *args, **kwargs):
+        host = urlparse(url).netloc
+        with self._semaforo(host):
+            self._esperar_vez(host)
+            return func(*args, **kwargs)
+
+
+class EntradaCondicional:
+    __slots__ = ("etag", "last_modified", "conteudo", "obtido_em", "processados", "tamanho")
+
+    def __init__(self, etag, last_modified, conteudo, obtido_em=None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.conteudo = conteudo
+        self.obtido_em = obtido_em if obtido_em is not None else time.time()
+        self.processados = {}
+        self.tamanho = len(conteudo)
+
+
+def _tamanho(obj):
+    # Estimativa dos bytes ocupados por um resultado processado (DataFrames pelo memory_usage)
+    if hasattr(obj, "memory_usage"):
+        try:
+            return int(obj.memory_usage(deep=True).sum())
+        except (TypeError, ValueError):
+            pass
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_tamanho(k) + _tamanho(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_tamanho(o) for o in obj)
+    return sys.getsizeof(obj)
+
+
+# Entradas em memória de uma fonte, em ordem LRU, dentro dos limites da sua política
+class MemoriaFonte:
+    def __init__(self, politica):
+        self.politica = politica
+        self.entradas = OrderedDict()
+        self.bytes = 0
+
+    def remover(self, url):
+        entrada = self.entradas.pop(url, None)
+        if entrada is not None:
+            self.bytes -= entrada.tamanho
+        return entrada
+
+    def despejar(self):
+        # A entrada mais recente fica sempre, mesmo que sozinha exceda o orçamento
+        while len(self.entradas) > 1 and (len(self.entradas) > self.politica.max_entradas
+                                          or self.bytes > self.politica.max_bytes):
+            _, antiga = self.entradas.popitem(last=False)
+            self.bytes -= antiga.tamanho
+
+
+class ClienteHttp:
+    def __init__(self, timeout=TIMEOUT_PADRAO, tentativas=TENTATIVAS, backoff=BACKOFF,
+                 pool_por_host=POOL_POR_HOST, disco=None, limitador=None):
+        self.timeout = timeout
+        # `disco`: uma CacheRespostas, ou a função que a abre (chamada só no primeiro pedido)
+        self._disco = disco
+        self._disco_aberto = not callable(disco)
+        self._lock_disco = threading.Lock()
+        self.limitador = limitador or LimitadorHost()
+        self.sessao = requests.Session()
+        self.sessao.headers["User-Agent"] = USER_AGENT
+        retry = Retry(
+            total=tentativas,
+            backoff_factor=backoff,
+            status_forcelist=STATUS_REPETIR,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(pool_connections=pool_por_host, pool_maxsize=pool_por_host, max_retries=retry)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+        self._lock = threading.Lock()
+        self._memorias = {}
+
+    @property
+    def disco(self):
+        if not self._disco_aberto:
+            with self._lock_disco:
+                if not self._disco_aberto:
+                    self._disco = self._disco()
+                    self._disco_aberto = True
+        return self._disco
+
+    @disco.setter
+    def disco(self, disco):
+        with self._lock_disco:
+            self._disco = disco
+            self._disco_aberto = True
+
+    def _memoria(self, url):
+        # Chamar com self._lock adquirido
+        politica = cache_disco.politica_para(url)
+        memoria = self._memorias.get(politica.nome)
+        if memoria is None:
+            memoria = self._memorias[politica.nome] = MemoriaFonte(politica)
+        return memoria
+
+    def _entrada(self, url):
+        # Devolve (entrada, origem) com origem "memoria" ou "disco"; (None, None) se não houver
+        with self._lock:
+            memoria = self._memoria(url)
+            entrada = memoria.entradas.get(url)
+            if entrada is not None:
+                memoria.entradas.move_to_end(url)
+                return entrada, "memoria"
+        if self.disco is None:
+            return None, None
+        registo = self.disco.ler(url)
+        if registo is None:
+            return None, None
+        obtido_em, etag, last_modified, conteudo = registo
+        entrada = EntradaCondicional(etag, last_modified, conteudo, obtido_em)
+        self._guardar(url, entrada)
+        return entrada, "disco"
+
+    def _guardar(self, url, entrada):
+        with self._lock:
+            memoria = self._memoria(url)
+            memoria.remover(url)
+            memoria.entradas[url] = entrada
+            memoria.bytes += entrada.tamanho
+            memoria.despejar()
+
+    def _crescer(self, url, entrada, n):
+        # Conta no orçamento da fonte um resultado processado acrescentado à entrada
+        with self._lock:
+            memoria = self._memoria(url)
+            if memoria.entradas.get(url) is entrada:
+                memoria.bytes += n
+                entrada.tamanho += n
+                memoria.despejar()
+            else:
+                entrada.tamanho += n
+
+    def _pedir(self, url, timeout=None):
+        # Devolve (entrada, alterado); alterado=False quando veio da cache ou o servidor respondeu 304
+        entrada, origem = self._entrada(url)
+        if entrada is not None and time.time() - entrada.obtido_em < cache_disco.ttl_para(url):
+            metricas.contar_http(origem)
+            return entrada, False
+        # Pedidos simultâneos ao mesmo URL (de várias sessões) esperam pelo mesmo descarregamento
+        return voo_unico.executar(("http", url), self._descarregar, url, timeout)
+
+    def _descarregar(self, url, timeout=None):
+        entrada, origem = self._entrada(url)
+        agora = time.time()
+        ttl = cache_disco.ttl_para(url)
+        if entrada is not None and agora - entrada.obtido_em < ttl:
+            # Outro voo acabou de a renovar
+            metricas.contar_http(origem)
+            return entrada, False
+        headers = {}
+        if entrada is not None:
+            if entrada.etag:
+                headers["If-None-Match"] = entrada.etag
+            if entrada.last_modified:
+                headers["If-Modified-Since"] = entrada.last_modified
+        r = self.limitador.executar(url, self.sessao.get, url, headers=headers, timeout=timeout or self.timeout)
+        if r.status_code == 304 and entrada is not None:
+            metricas.contar_http("revalidado")
+            entrada.obtido_em = agora
+            if self.disco is not None:
+                self.disco.tocar(url, agora)
+            return entrada, False
+        metricas.contar_http("rede", len(r.content))
+        r.raise_for_status()
+        nova = EntradaCondicional(r.headers.get("ETag"), r.headers.get("Last-Modified"), r.content, agora)
+        if ttl > 0 or nova.etag or nova.last_modified:
+            self._guardar(url, nova)
+            if self.disco is not None:
+                self.disco.gravar(url, nova.conteudo, nova.etag, nova.last_modified, agora)
+        return nova, True
+
+    def expirar(self, padrao=None):
+        # Força revalidação no próximo pedido; padrao=None expira tudo
+        with self._lock:
+            for memoria in self._memorias.values():
+                for url, entrada in memoria.entradas.items():
+                    if padrao is None or padrao in url:
+                        entrada.obtido_em = 0
+        if self.disco is not None:
+            self.disco.expirar(padrao)
+
+    def expirar_fonte(self, nome):
+        # Força revalidação só das páginas da fonte `nome` (ver cache_disco.POLITICAS)
+        with self._lock:
+            memoria = self._memorias.get(nome)
+            if memoria is not None:
+                for entrada in memoria.entradas.values():
+                    entrada.obtido_em = 0
+        if self.disco is not None:
+            self.disco.expirar_fonte(nome)
+
+    def estatisticas(self):
+        # {fonte: {"entradas", "bytes", "max_entradas", "max_bytes"}} da cache em memória
+        with self._lock:
+            return {
+                nome: {
+                    "entradas": len(m.entradas), "bytes": m.bytes,
+                    "max_entradas": m.politica.max_entradas, "max_bytes": m.politica.max_bytes,
+                }
+                for nome, m in self._memorias.items()
+            }
+
+    def obter(self, url, timeout=None):
+        entrada, _ = self._pedir(url, timeout)
+        return entrada.conteudo
+
+    def obter_processado(self, url, processar, timeout=None):
+        # Reaproveita o resultado de `processar` se a página não mudou (304)
+        entrada, _ = self._pedir(url, timeout)
+        chave = getattr(processar, "__qualname__", repr(processar))
+        if chave in entrada.processados:
+            return entrada.processados[chave]
+        # Só uma thread processa cada versão da página; as outras recebem o mesmo resultado
+        return voo_unico.executar(("processar", url, chave, id(entrada)), self._processar, url, entrada, chave, processar)
+
+    def _processar(self, url, entrada, chave, processar):
+        if chave not in entrada.processados:
+            resultado = processar(entrada.conteudo)
+            entrada.processados[chave] = resultado
+            self._crescer(url, entrada, _tamanho(resultado))
+        return entrada.processados[chave]
+
+
+# Ao reproduzir gravações a cache em disco fica desligada, para as respostas serem sempre as da pasta.
+# Nos outros casos só é aberta no primeiro pedido: importar o módulo não cria ficheiros.
+cliente = ClienteHttp(disco=None if gravacoes.modo_ambiente() == "reproduzir" else cache_disco.cache_padrao)
+gravacoes.instalar_de_ambiente(cliente.sessao)
+
+
+def obter(url, timeout=None):
+    return cliente.obter(url, timeout)
+
+
+def obter_processado(url, processar, timeout=None):
+    return cliente.obter_processado(url, processar, timeout)
+
+
+def expirar(padrao=None):
+    cliente.expirar(padrao)
+
+
+def expirar_fonte(nome):
+    cliente.expirar_fonte(nome)
@@ -0,0 +1,223 @@
+# Gravação e reprodução das respostas HTTP (tennisexplorer, tennisabstract) numa pasta de fixtures.
+#
+# Os adaptadores ficam montados na sessão requests do cliente HTTP, por baixo da cache e dos pedidos
+# condicionais, pelo que obter_torneios, obter_jogos_do_torneio, obter_nome_completo, obter_elo_table e
+# obter_yelo_table funcionam sem alterações. Modo escolhido por variáveis de ambiente:
+#
+#   TENNIS_HTTP_MODO=gravar       pedidos reais, respostas 200 guardadas em TENNIS_GRAVACOES_DIR
+#   TENNIS_HTTP_MODO=reproduzir   sem rede: respostas servidas da pasta (URL sem gravação -> 404)
+#   TENNIS_HTTP_LATENCIA=0.2      segundos acrescentados a cada resposta reproduzida
+#   TENNIS_HTTP_FALHAS=0.05       fração de tentativas reproduzidas que falham como uma ligação recusada
+#                                 (repetidas pelo Retry do cliente, como as falhas reais)
+#   TENNIS_HTTP_SEMENTE=0         semente das falhas injetadas (sequência reprodutível)
+#
+# Para gravar uma varredura completa (torneios, páginas dos torneios, perfis e ratings):
+#
+#   python -m tennis_value.gravacoes --tipo ATP WTA --pasta gravacoes/
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from urllib3.util.retry import Retry
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRAVACOES_DIR = os.environ.get("TENNIS_GRAVACOES_DIR", os.path.join(BASE_DIR, "gravacoes"))
+MODOS = ("gravar", "reproduzir")
+CABECALHOS_GRAVADOS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def _nome_base(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+class PastaGravacoes:
+    # Uma resposta por URL: <hash>.json (url, status, cabeçalhos) e <hash>.html (corpo tal como veio)
+    def __init__(self, pasta=GRAVACOES_DIR):
+        self.pasta = pasta
+
+    def _caminhos(self, url):
+        base = os.path.join(self.pasta, _nome_base(url))
+        return base + ".json", base + ".html"
+
+    def ler(self, url):
+        # Devolve (status, cabeçalhos, corpo) ou None
+        meta_path, corpo_path = self._caminhos(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(corpo_path, "rb") as f:
+                corpo = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta["status"], meta["cabecalhos"], corpo
+
+    def gravar(self, url, status, cabecalhos, corpo):
+        os.makedirs(self.pasta, exist_ok=True)
+        meta_path, corpo_path = self._caminhos(url)
+        meta = {
+            "url": url,
+            "status": status,
+            "cabecalhos": {k: cabecalhos[k] for k in CABECALHOS_GRAVADOS if k in cabecalhos},
+            "gravado_em": time.time(),
+        }
+        # Corpo primeiro: um .json só existe com o respetivo .html completo
+        with open(corpo_path + ".tmp", "wb") as f:
+            f.write(corpo)
+        os.replace(corpo_path + ".tmp", corpo_path)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def urls(self):
+        if not os.path.isdir(self.pasta):
+            return []
+        urls = []
+        for ficheiro in sorted(os.listdir(self.pasta)):
+            if ficheiro.endswith(".json"):
+                with open(os.path.join(self.pasta, ficheiro), encoding="utf-8") as f:
+                    urls.append(json.load(f)["url"])
+        return urls
+
+
+class AdaptadorGravacao(BaseAdapter):
+    # Envia o pedido pelo adaptador real (com pool e tentativas) e guarda as respostas 200
+    def __init__(self, interno, gravacoes):
+        super().__init__()
+        self.interno = interno
+        self.gravacoes = gravacoes
+
+    def send(self, request, **kwargs):
+        resposta = self.interno.send(request, **kwargs)
+        if resposta.status_code == 200:
+            self.gravacoes.gravar(request.url, resposta.status_code, resposta.headers, resposta.content)
+        return resposta
+
+    def close(self):
+        self.interno.close()
+
+
+class AdaptadorReproducao(BaseAdapter):
+    # Serve as respostas gravadas, com latência e falhas injetadas reprodutíveis. As falhas passam pela
+    # mesma política de tentativas (`max_retries`, o Retry do adaptador real) que uma falha de ligação
+    # verdadeira: só chega ao chamador a falha que esgotar as tentativas.
+    def __init__(self, gravacoes, latencia=0.0, taxa_falhas=0.0, semente=0, max_retries=None):
+        super().__init__()
+        self.gravacoes = gravacoes
+        self.latencia = latencia
+        self.taxa_falhas = taxa_falhas
+        self.max_retries = max_retries if isinstance(max_retries, Retry) else Retry.from_int(max_retries or 0)
+        self._rng = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def _resposta(self, request, status, cabecalhos, corpo):
+        r = requests.Response()
+        r.status_code = status
+        r.reason = "OK" if status == 200 else ("Not Modified" if status == 304 else "Not Found")
+        r.headers = CaseInsensitiveDict(cabecalhos)
+        r._content = corpo
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.url = request.url
+        r.request = request
+        return r
+
+    def send(self, request, **kwargs):
+        tentativas = self.max_retries
+        while True:
+            try:
+                return self._servir(request)
+            except NewConnectionError as erro:
+                try:
+                    tentativas = tentativas.increment(method=request.method, url=request.url, error=erro)
+                except MaxRetryError as e:
+                    raise requests.ConnectionError(e, request=request)
+                tentativas.sleep()
+
+    def _servir(self, request):
+        if self.latencia:
+            time.sleep(self.latencia)
+        if self.taxa_falhas:
+            with self._lock:
+                falhar = self._rng.random() < self.taxa_falhas
+            if falhar:
+                raise NewConnectionError(None, f"falha injetada: {request.url}")
+        gravada = self.gravacoes.ler(request.url)
+        if gravada is None:
+            return self._resposta(request, 404, {}, b"")
+        status, cabecalhos, corpo = gravada
+        # Pedidos condicionais respondidos como o servidor faria
+        etag = cabecalhos.get("ETag")
+        last_modified = cabecalhos.get("Last-Modified")
+        if (etag and request.headers.get("If-None-Match") == etag) or \
+                (last_modified and request.headers.get("If-Modified-Since") == last_modified):
+            return self._resposta(request, 304, cabecalhos, b"")
+        return self._resposta(request, status, cabecalhos, corpo)
+
+    def close(self):
+        pass
+
+
+def instalar(sessao, modo, pasta=GRAVACOES_DIR, latencia=0.0, taxa_falhas=0.0, semente=0):
+    # Monta os adaptadores de gravação/reprodução na sessão; modo None deixa a sessão como está
+    if modo is None:
+        return
+    if modo not in MODOS:
+        raise ValueError(f"modo desconhecido {modo!r}; esperado um de {MODOS}")
+    gravacoes = PastaGravacoes(pasta)
+    for prefixo in ("https://", "http://"):
+        if modo == "gravar":
+            adaptador = AdaptadorGravacao(sessao.get_adapter(prefixo), gravacoes)
+        else:
+            # Com o Retry do adaptador substituído, para as falhas injetadas serem repetidas como as reais
+            retry = getattr(sessao.get_adapter(prefixo), "max_retries", None)
+            adaptador = AdaptadorReproducao(gravacoes, latencia, taxa_falhas, semente, max_retries=retry)
+        sessao.mount(prefixo, adaptador)
+
+
+def modo_ambiente():
+    return os.environ.get("TENNIS_HTTP_MODO") or None
+
+
+def instalar_de_ambiente(sessao):
+    instalar(
+        sessao,
+        modo_ambiente(),
+        GRAVACOES_DIR,
+        latencia=float(os.environ.get("TENNIS_HTTP_LATENCIA", "0")),
+        taxa_falhas=float(os.environ.get("TENNIS_HTTP_FALHAS", "0")),
+        semente=int(os.environ.get("TENNIS_HTTP_SEMENTE", "0")),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grava as respostas de uma varredura completa numa pasta de fixtures.")
+    parser.add_argument("--tipo", nargs="+", choices=["ATP", "WTA"], default=["ATP", "WTA"])
+    parser.add_argument("--pasta", default=GRAVACOES_DIR)
+    parser.add_argument("--concorrencia", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    from tennis_value import cliente_http, varrer
+
+    # Sem caches: todas as páginas têm de passar pela rede para serem gravadas
+    cliente_http.cliente.disco = None
+    cliente_http.expirar()
+    instalar(cliente_http.cliente.sessao, "gravar", args.pasta)
+    inicio = time.perf_counter()
+    varrer.varrer(args.tipo, concorrencia=args.concorrencia, registo=None,
+                  avisar=lambda msg: print(f"aviso: {msg}", file=sys.stderr))
+    n = len(PastaGravacoes(args.pasta).urls())
+    print(f"{n} respostas em {args.pasta} ({time.perf_counter() - inicio:.1f}s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
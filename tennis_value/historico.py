@@ -0,0 +1,406 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORICO_CSV = os.path.join(BASE_DIR, "historico_apostas.csv")
+HISTORICO_DB = os.environ.get("HISTORICO_DB", os.path.join(BASE_DIR, "historico_apostas.sqlite"))
+
+COLUNAS = ["data", "evento", "aposta", "odd", "stake", "resultado", "competicao", "torneio"]
+COLUNAS_REMOVIDAS = ["valor_apostado", "remove"]
+SELECIONAR = "SELECT id, data, evento, aposta, odd, stake, resultado, competicao, torneio, extras FROM apostas"
+# Colunas de texto onde a pesquisa livre de pagina()/contar() procura
+COLUNAS_PESQUISA = ("evento", "aposta", "torneio")
+RESULTADO_PENDENTE = "pendente"  # filtro: apostas ainda sem resultado
+
+logger = logging.getLogger("tennis_value.historico")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS apostas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT,
+    evento TEXT,
+    aposta TEXT,
+    odd REAL,
+    stake REAL,
+    resultado TEXT NOT NULL DEFAULT '',
+    competicao TEXT,
+    torneio TEXT,
+    extras TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', '0');
+CREATE INDEX IF NOT EXISTS apostas_resultado ON apostas (resultado);
+CREATE INDEX IF NOT EXISTS apostas_competicao ON apostas (competicao);
+CREATE TABLE IF NOT EXISTS agregados (
+    competicao TEXT NOT NULL,
+    ano_mes TEXT NOT NULL,
+    apostas INTEGER NOT NULL,
+    ganhas INTEGER NOT NULL,
+    perdidas INTEGER NOT NULL,
+    investido REAL NOT NULL,
+    retorno REAL NOT NULL,
+    PRIMARY KEY (competicao, ano_mes)
+) WITHOUT ROWID;
+"""
+
+
+# Agregados por (competição, mês) das apostas com resultado, mantidos por triggers: cada
+# inserção, liquidação ou remoção ajusta uma única linha, sem reler o histórico.
+def _ajuste_agregados(linha, sinal):
+    return f"""
+    INSERT INTO agregados
+    SELECT COALESCE({linha}.competicao, ''), COALESCE(strftime('%Y-%m', {linha}.data), ''),
+           {sinal}1,
+           {sinal}({linha}.resultado = 'ganhou'),
+           {sinal}({linha}.resultado = 'perdeu'),
+           {sinal}COALESCE({linha}.stake, 0),
+           {sinal}CASE {linha}.resultado
+               WHEN 'ganhou' THEN COALESCE({linha}.stake, 0) * COALESCE({linha}.odd, 0)
+               WHEN 'cashout' THEN COALESCE({linha}.stake, 0) * 0.5
+               ELSE 0 END
+    WHERE trim({linha}.resultado) != ''
+    ON CONFLICT (competicao, ano_mes) DO UPDATE SET
+        apostas = apostas + excluded.apostas,
+        ganhas = ganhas + excluded.ganhas,
+        perdidas = perdidas + excluded.perdidas,
+        investido = investido + excluded.investido,
+        retorno = retorno + excluded.retorno;
+    """
+
+TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS apostas_agregados_inserir AFTER INSERT ON apostas BEGIN
+    {_ajuste_agregados("NEW", "+")}
+END;
+CREATE TRIGGER IF NOT EXISTS apostas_agregados_remover AFTER DELETE ON apostas BEGIN
+    {_ajuste_agregados("OLD", "-")}
+END;
+CREATE TRIGGER IF NOT EXISTS apostas_agregados_atualizar AFTER UPDATE ON apostas BEGIN
+    {_ajuste_agregados("OLD", "-")}
+    {_ajuste_agregados("NEW", "+")}
+END;
+"""
+MIGRADO = "SELECT 1 FROM meta WHERE chave = 'migrado_csv'"
+INSERIR = (
+    "INSERT INTO apostas (data, evento, aposta, odd, stake, resultado, competicao, torneio, extras) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _numero(valor):
+    try:
+        return None if valor is None or valor == "" or pd.isna(valor) else float(valor)
+    except (TypeError, ValueError):
+        return None
+
+def _texto(valor):
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    return str(valor)
+
+def _linha(aposta):
+    # Converte um dict de aposta nos valores das colunas da tabela; colunas desconhecidas vão para extras
+    extras = {k: _texto(v) for k, v in aposta.items() if k not in COLUNAS and k not in COLUNAS_REMOVIDAS and k != "id"}
+    return (
+        _texto(aposta.get("data")),
+        _texto(aposta.get("evento")),
+        _texto(aposta.get("aposta")),
+        _numero(aposta.get("odd")),
+        _numero(aposta.get("stake")),
+        _texto(aposta.get("resultado")),
+        _texto(aposta.get("competicao")),
+        _texto(aposta.get("torneio")),
+        json.dumps(extras, ensure_ascii=False) if extras else None,
+    )
+
+def _expandir_extras(df):
+    # A coluna extras (JSON) passa a uma coluna por chave
+    extras = df.pop("extras")
+    if extras.notna().any():
+        df = df.join(pd.DataFrame([json.loads(e) if isinstance(e, str) and e else {} for e in extras], index=df.index))
+    return df
+
+def _filtro(procurar=None, resultado=None, competicao=None):
+    # (cláusula WHERE, parâmetros) para pagina()/contar()
+    condicoes, parametros = [], []
+    if procurar:
+        condicoes.append("(" + " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in COLUNAS_PESQUISA) + ")")
+        padrao = "%" + procurar.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        parametros.extend([padrao] * len(COLUNAS_PESQUISA))
+    if resultado:
+        condicoes.append("resultado = ?")
+        parametros.append("" if resultado == RESULTADO_PENDENTE else resultado)
+    if competicao:
+        condicoes.append("competicao = ?")
+        parametros.append(competicao)
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+
+# Livro de apostas em SQLite (modo WAL): cada aposta tem um id estável e cada operação é uma
+# transação curta sobre as linhas afetadas, em vez de reescrever o ficheiro inteiro. O contador
+# meta.versao avança a cada escrita e permite às sessões saberem quando recarregar.
+class LivroApostas:
+    def __init__(self, caminho=HISTORICO_DB, csv_migrar=HISTORICO_CSV):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self.aviso_migracao = None  # mensagem quando o CSV antigo não pôde ser importado
+        self._con = sqlite3.connect(caminho, check_same_thread=False, timeout=30, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.executescript(ESQUEMA)
+        self._con.executescript(TRIGGERS)
+        if self._con.execute("SELECT 1 FROM meta WHERE chave = 'agregados'").fetchone() is None:
+            # Livros criados antes dos agregados: calculados uma vez a partir das apostas existentes
+            self.reconstruir_agregados()
+        if csv_migrar:
+            self.migrar_csv(csv_migrar)
+
+    def _transacao(self, func):
+        # BEGIN IMMEDIATE: o lock de escrita é obtido logo, evitando que duas sessões se sobreponham
+        with self._lock:
+            self._con.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = func(self._con)
+                self._con.execute("UPDATE meta SET valor = CAST(valor AS INTEGER) + 1 WHERE chave = 'versao'")
+                self._con.execute("COMMIT")
+                return resultado
+            except BaseException:
+                self._con.execute("ROLLBACK")
+                raise
+
+    def versao(self):
+        with self._lock:
+            (valor,) = self._con.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+        return int(valor)
+
+    def _migrado(self):
+        with self._lock:
+            return self._con.execute(MIGRADO).fetchone() is not None
+
+    def migrar_csv(self, caminho_csv):
+        # Importa o CSV antigo uma única vez (fica registado em meta.migrado_csv). Um CSV que não se
+        # consegue ler (codificação, ficheiro bloqueado ou corrompido) não impede o livro de abrir: fica
+        # um aviso em aviso_migracao e a migração fica por fazer, para ser tentada no próximo arranque.
+        if not os.path.exists(caminho_csv) or self._migrado():
+            return 0
+        try:
+            df = pd.read_csv(caminho_csv, dtype={"data": str})
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            self.aviso_migracao = f"Não foi possível importar o histórico antigo ({caminho_csv}): {e}"
+            logger.warning(self.aviso_migracao)
+            return 0
+
+        def migrar(con):
+            # Verificado dentro da transação: dois processos a arrancar ao mesmo tempo não migram duas vezes
+            if con.execute(MIGRADO).fetchone():
+                return 0
+            con.executemany(INSERIR, [_linha(a) for a in df.to_dict(orient="records")])
+            con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('migrado_csv', ?)", (caminho_csv,))
+            return len(df)
+
+        return self._transacao(migrar)
+
+    def inserir(self, aposta):
+        def inserir(con):
+            return con.execute(INSERIR, _linha(aposta)).lastrowid
+
+        return self._transacao(inserir)
+
+    def inserir_varias(self, apostas):
+        def inserir(con):
+            return [con.execute(INSERIR, _linha(a)).lastrowid for a in apostas]
+
+        return self._transacao(inserir)
+
+    def atualizar(self, id_aposta, **campos):
+        campos = {k: v for k, v in campos.items() if k in COLUNAS}
+        if not campos:
+            return False
+        valores = [
+            _numero(v) if k in ("odd", "stake") else _texto(v)
+            for k, v in campos.items()
+        ]
+        sql = "UPDATE apostas SET " + ", ".join(f"{k} = ?" for k in campos) + " WHERE id = ?"
+        return self._transacao(lambda con: con.execute(sql, (*valores, int(id_aposta))).rowcount > 0)
+
+    def remover(self, ids):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        return self._transacao(
+            lambda con: con.executemany("DELETE FROM apostas WHERE id = ?", [(i,) for i in ids]).rowcount
+        )
+
+    def substituir(self, apostas):
+        def substituir(con):
+            con.execute("DELETE FROM apostas")
+            con.executemany(INSERIR, [_linha(a) for a in apostas])
+
+        self._transacao(substituir)
+
+    def listar(self):
+        with self._lock:
+            df = pd.read_sql_query(SELECIONAR + " ORDER BY id", self._con)
+        return _expandir_extras(df)
+
+    def pagina(self, inicio=0, limite=50, procurar=None, resultado=None, competicao=None,
+               ordem="id", descendente=True):
+        # Só as linhas de uma página do histórico filtrado (a grelha da app não recebe o livro inteiro)
+        if ordem not in ("id", *COLUNAS):
+            raise ValueError(f"ordem desconhecida: {ordem}")
+        where, parametros = _filtro(procurar, resultado, competicao)
+        direcao = "DESC" if descendente else "ASC"
+        sql = f"{SELECIONAR}{where} ORDER BY {ordem} {direcao}, id {direcao} LIMIT ? OFFSET ?"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._con, params=(*parametros, int(limite), int(inicio)))
+        return _expandir_extras(df)
+
+    def contar(self, procurar=None, resultado=None, competicao=None):
+        where, parametros = _filtro(procurar, resultado, competicao)
+        with self._lock:
+            (n,) = self._con.execute(f"SELECT COUNT(*) FROM apostas{where}", parametros).fetchone()
+        return n
+
+    def atualizar_resultados(self, resultados):
+        # {id: resultado} numa só transação; devolve o número de apostas alteradas
+        linhas = [(_texto(r), int(i)) for i, r in resultados.items()]
+        if not linhas:
+            return 0
+        return self._transacao(
+            lambda con: con.executemany("UPDATE apostas SET resultado = ? WHERE id = ?", linhas).rowcount
+        )
+
+    def sincronizar(self, df):
+        # Aplica ao livro as diferenças de um DataFrame completo (linhas com id atualizam,
+        # sem id inserem, ids em falta removem), numa só transação
+        registos = df.drop(columns=[c for c in COLUNAS_REMOVIDAS if c in df.columns]).to_dict(orient="records")
+
+        def sincronizar(con):
+            existentes = {
+                row[0]: row[1:]
+                for row in con.execute(
+                    "SELECT id, data, evento, aposta, odd, stake, resultado, competicao, torneio, extras FROM apostas"
+                )
+            }
+            vistos = set()
+            for aposta in registos:
+                id_aposta = _numero(aposta.get("id"))
+                linha = _linha(aposta)
+                if id_aposta is not None and int(id_aposta) in existentes:
+                    id_aposta = int(id_aposta)
+                    vistos.add(id_aposta)
+                    if existentes[id_aposta] != linha:
+                        con.execute(
+                            "UPDATE apostas SET data = ?, evento = ?, aposta = ?, odd = ?, stake = ?, resultado = ?, "
+                            "competicao = ?, torneio = ?, extras = ? WHERE id = ?",
+                            (*linha, id_aposta),
+                        )
+                else:
+                    con.execute(INSERIR, linha)
+            removidos = [(i,) for i in existentes if i not in vistos]
+            con.executemany("DELETE FROM apostas WHERE id = ?", removidos)
+
+        self._transacao(sincronizar)
+
+    def reconstruir_agregados(self):
+        def reconstruir(con):
+            con.execute("DELETE FROM agregados")
+            con.execute(
+                """
+                INSERT INTO agregados
+                SELECT COALESCE(competicao, ''), COALESCE(strftime('%Y-%m', data), ''), COUNT(*),
+                       SUM(resultado = 'ganhou'), SUM(resultado = 'perdeu'), SUM(COALESCE(stake, 0)),
+                       SUM(CASE resultado
+                           WHEN 'ganhou' THEN COALESCE(stake, 0) * COALESCE(odd, 0)
+                           WHEN 'cashout' THEN COALESCE(stake, 0) * 0.5
+                           ELSE 0 END)
+                FROM apostas
+                WHERE trim(resultado) != ''
+                GROUP BY 1, 2
+                """
+            )
+            con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('agregados', '1')")
+
+        self._transacao(reconstruir)
+
+    def agregados(self):
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT * FROM agregados WHERE apostas != 0 ORDER BY ano_mes, competicao", self._con
+            )
+
+    def fechar(self):
+        with self._lock:
+            self._con.close()
+
+
+_livro = None
+_livro_lock = threading.Lock()
+
+
+def livro_padrao():
+    global _livro
+    with _livro_lock:
+        if _livro is None or _livro.caminho != HISTORICO_DB:
+            _livro = LivroApostas(HISTORICO_DB, HISTORICO_CSV)
+        return _livro
+
+
+# ===== Compatibilidade com a API antiga baseada em CSV =====
+
+def carregar_historico():
+    try:
+        return livro_padrao().listar()
+    except Exception:
+        return pd.DataFrame()
+
+def salvar_historico(df):
+    livro_padrao().sincronizar(df)
+
+def resumo_desempenho(agregados):
+    totais = agregados[["apostas", "ganhas", "perdidas", "investido", "retorno"]].sum()
+    investido = float(totais["investido"])
+    retorno = float(totais["retorno"])
+    return {
+        "apostas": int(totais["apostas"]),
+        "ganhas": int(totais["ganhas"]),
+        "perdidas": int(totais["perdidas"]),
+        "investido": investido,
+        "retorno": retorno,
+        "yield": (retorno - investido) / investido * 100 if investido > 0 else 0.0,
+    }
+
+def lucro_acumulado_mensal(agregados, competicoes=("ATP", "WTA")):
+    # Uma linha por mês, uma coluna por competição, com o lucro acumulado
+    com_data = agregados[agregados["ano_mes"] != ""]
+    lucro = (com_data["retorno"] - com_data["investido"]).rename("lucro")
+    tabela = (
+        pd.concat([com_data[["ano_mes", "competicao"]], lucro], axis=1)
+        .pivot_table(index="ano_mes", columns="competicao", values="lucro", aggfunc="sum", fill_value=0.0)
+        .reindex(columns=list(competicoes), fill_value=0.0)
+        .sort_index()
+    )
+    return tabela.cumsum()
+
+def calcular_retorno(aposta):
+    resultado = aposta.get("resultado", "")
+    valor = float(aposta.get("stake", 0.0))
+    odd = float(aposta.get("odd", 0.0))
+    if resultado == "ganhou":
+        return valor * odd
+    elif resultado == "cashout":
+        return valor * 0.5
+    else:
+        return 0.0
@@ -0,0 +1,221 @@
+# Mapa persistente de identidades: perfil do jogador no tennisexplorer -> chave nos ratings do tennisabstract.
+#
+# Para cada URL de perfil guarda o nome mostrado (o do perfil, já reorganizado), a chave normalizada do
+# jogador nas tabelas Elo/yElo, a confiança da associação (ratio da pesquisa aproximada; 1.0 num acerto
+# exato ou numa correção manual), a origem e a data. Um jogador resolvido uma vez deixa de custar o
+# descarregamento do perfil e a pesquisa aproximada nos torneios seguintes. Uma chave guardada só é
+# substituída por outra chave encontrada por acerto exato (nunca por "sem correspondência"), e as
+# correções manuais nunca são substituídas pelas automáticas. Jogadores sem correspondência ficam
+# registados (para `listar --sem-chave`), mas voltam a ser procurados a cada carregamento dos ratings.
+#
+#   python -m tennis_value.identidades listar [--procurar TEXTO] [--confianca-max 0.95] [--sem-chave]
+#   python -m tennis_value.identidades corrigir URL --chave "nome no tennisabstract" [--nome "Nome Mostrado"]
+#   python -m tennis_value.identidades remover URL [URL ...]
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from tennis_value.nomes import normalizar_nome
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IDENTIDADES_DB = os.environ.get("IDENTIDADES_DB", os.path.join(BASE_DIR, "identidades.sqlite"))
+
+ORIGEM_EXATO = "exato"
+ORIGEM_APROXIMADO = "aproximado"
+ORIGEM_MANUAL = "manual"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS identidades (
+    url TEXT PRIMARY KEY,
+    nome TEXT,
+    chave TEXT,
+    confianca REAL,
+    origem TEXT,
+    atualizado REAL NOT NULL
+);
+"""
+COLUNAS = ("url", "nome", "chave", "confianca", "origem", "atualizado")
+
+
+class Identidade:
+    __slots__ = COLUNAS
+
+    def __init__(self, url, nome=None, chave=None, confianca=None, origem=None, atualizado=None):
+        self.url = url
+        self.nome = nome
+        self.chave = chave
+        self.confianca = confianca
+        self.origem = origem
+        self.atualizado = atualizado if atualizado is not None else time.time()
+
+
+# Todas as identidades ficam em memória (uma linha por jogador visto); a base só é lida no arranque
+# e em recarregar()
+class MapaIdentidades:
+    def __init__(self, caminho=IDENTIDADES_DB):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.executescript(ESQUEMA)
+        self._identidades = {}
+        self.recarregar()
+
+    def recarregar(self):
+        # Relê a base (ex.: depois de correções feitas com a CLI noutro processo)
+        with self._lock:
+            linhas = self._con.execute(f"SELECT {', '.join(COLUNAS)} FROM identidades").fetchall()
+            self._identidades = {linha[0]: Identidade(*linha) for linha in linhas}
+
+    def __len__(self):
+        return len(self._identidades)
+
+    def obter(self, url):
+        return self._identidades.get(url) if url else None
+
+    def nome(self, url):
+        identidade = self.obter(url)
+        return identidade.nome if identidade is not None else None
+
+    def _gravar(self, identidade):
+        # Chamar com self._lock adquirido
+        self._identidades[identidade.url] = identidade
+        with self._con:
+            self._con.execute(
+                f"INSERT OR REPLACE INTO identidades ({', '.join(COLUNAS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                tuple(getattr(identidade, c) for c in COLUNAS),
+            )
+
+    def registar_nome(self, url, nome):
+        # Nome mostrado, obtido do perfil; a chave dos ratings é resolvida mais tarde
+        if not url or not nome:
+            return
+        with self._lock:
+            atual = self._identidades.get(url)
+            if atual is not None and atual.nome == nome:
+                return
+            if atual is None:
+                atual = Identidade(url)
+            elif atual.origem == ORIGEM_MANUAL and atual.nome:
+                return
+            atual.nome = nome
+            atual.atualizado = time.time()
+            self._gravar(atual)
+
+    def registar_chave(self, url, chave, confianca):
+        # Resultado de uma pesquisa nos ratings (chave None: sem correspondência). Uma chave já guardada
+        # fica se a pesquisa falhou (ratings recarregados, tabela do outro circuito) ou só encontrou um
+        # nome aproximado diferente
+        if not url:
+            return
+        with self._lock:
+            atual = self._identidades.get(url) or Identidade(url)
+            if atual.origem == ORIGEM_MANUAL:
+                return
+            if atual.chave is not None and (chave is None or (chave != atual.chave and confianca < 1.0)):
+                return
+            if chave is None and atual.chave is None and atual.confianca == float(confianca):
+                return
+            atual.chave = chave
+            atual.confianca = float(confianca)
+            atual.origem = None if chave is None else ORIGEM_EXATO if confianca >= 1.0 else ORIGEM_APROXIMADO
+            atual.atualizado = time.time()
+            self._gravar(atual)
+
+    def corrigir(self, url, chave=None, nome=None):
+        # Correção manual: fica com confiança 1.0 e deixa de ser alterada automaticamente
+        with self._lock:
+            atual = self._identidades.get(url) or Identidade(url)
+            if chave is not None:
+                atual.chave = normalizar_nome(chave)
+            if nome is not None:
+                atual.nome = nome
+            atual.confianca = 1.0
+            atual.origem = ORIGEM_MANUAL
+            atual.atualizado = time.time()
+            self._gravar(atual)
+
+    def remover(self, urls):
+        with self._lock:
+            for url in urls:
+                self._identidades.pop(url, None)
+            with self._con:
+                self._con.executemany("DELETE FROM identidades WHERE url = ?", [(u,) for u in urls])
+
+    def listar(self):
+        with self._lock:
+            linhas = [tuple(getattr(i, c) for c in COLUNAS) for i in self._identidades.values()]
+        df = pd.DataFrame(linhas, columns=list(COLUNAS))
+        df["atualizado"] = pd.to_datetime(df["atualizado"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+        return df.sort_values("url", ignore_index=True)
+
+
+_padrao = None
+_lock_padrao = threading.Lock()
+
+
+def mapa_padrao():
+    # Um mapa por processo; IDENTIDADES=0 desliga (perfis e pesquisas como antes)
+    global _padrao
+    if os.environ.get("IDENTIDADES", "1") == "0":
+        return None
+    with _lock_padrao:
+        if _padrao is None:
+            try:
+                _padrao = MapaIdentidades()
+            except (OSError, sqlite3.Error):
+                return None
+        return _padrao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspecionar e corrigir o mapa de identidades dos jogadores.")
+    parser.add_argument("--db", default=IDENTIDADES_DB)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_listar = sub.add_parser("listar", help="mostrar as identidades guardadas")
+    p_listar.add_argument("--procurar", help="só URLs, nomes ou chaves que contenham este texto")
+    p_listar.add_argument("--confianca-max", type=float, help="só associações com confiança até este valor")
+    p_listar.add_argument("--sem-chave", action="store_true", help="só jogadores sem correspondência nos ratings")
+    p_corrigir = sub.add_parser("corrigir", help="fixar manualmente a chave e/ou o nome de um perfil")
+    p_corrigir.add_argument("url")
+    p_corrigir.add_argument("--chave", help="nome do jogador nas tabelas do tennisabstract")
+    p_corrigir.add_argument("--nome", help="nome a mostrar na app")
+    p_remover = sub.add_parser("remover", help="esquecer perfis (voltam a ser resolvidos)")
+    p_remover.add_argument("urls", nargs="+")
+    args = parser.parse_args(argv)
+
+    mapa = MapaIdentidades(args.db)
+    if args.comando == "listar":
+        df = mapa.listar()
+        if args.procurar:
+            texto = args.procurar.casefold()
+            df = df[df[["url", "nome", "chave"]].fillna("").apply(
+                lambda col: col.str.casefold().str.contains(texto, regex=False)).any(axis=1)]
+        if args.confianca_max is not None:
+            df = df[df["confianca"] <= args.confianca_max]
+        if args.sem_chave:
+            df = df[df["chave"].isna()]
+        with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 60):
+            print(df.to_string(index=False) if not df.empty else "(nenhuma identidade)")
+    elif args.comando == "corrigir":
+        if args.chave is None and args.nome is None:
+            parser.error("indicar --chave e/ou --nome")
+        mapa.corrigir(args.url, chave=args.chave, nome=args.nome)
+        print(f"corrigido: {args.url}")
+    else:
+        mapa.remover(args.urls)
+        print(f"removidos: {len(args.urls)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
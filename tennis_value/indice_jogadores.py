@@ -0,0 +1,105 @@
+import sys
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from tennis_value.nomes import normalizar_nome
+
+CUTOFF_PADRAO = 0.8
+
+
+def _bigramas(s):
+    return Counter(s[i:i + 2] for i in range(len(s) - 1))
+
+
+# Índice de nomes de jogadores construído uma vez por carregamento das tabelas de ratings.
+#
+# Equivale a normalizar a coluna inteira e fazer
+# get_close_matches(nome, nomes, n=1, cutoff=0.8) a cada pesquisa, mas:
+#  - acertos exatos são um lookup num dicionário;
+#  - a pesquisa aproximada só calcula SequenceMatcher.ratio() para os candidatos
+#    que passam dois filtros que nunca rejeitam um nome com ratio >= cutoff:
+#    comprimento (o mesmo teste de real_quick_ratio) e número mínimo de bigramas
+#    partilhados, obtido de um índice invertido de bigramas.
+#
+# Porque bigramas e não trigramas: para ratio = 2M/T >= c, com U = T - 2M
+# caracteres não emparelhados, os M caracteres emparelhados formam no máximo U + 1
+# blocos e por isso partilham pelo menos M - U - 1 = ((3c - 2) / 2) * T - 1 bigramas.
+# Com trigramas o limite equivalente pode ser zero (ex.: "abxcdyef" / "abcdef").
+class PlayerIndex:
+    def __init__(self, nomes, cutoff=CUTOFF_PADRAO):
+        # nomes: pd.Series (devolve rótulos do índice) ou lista (devolve posições)
+        self.cutoff = cutoff
+        if hasattr(nomes, "dropna"):
+            serie = nomes.dropna()
+            rotulos = serie.index.tolist()
+            valores = serie.tolist()
+        else:
+            valores = [n for n in nomes if n is not None]
+            rotulos = list(range(len(valores)))
+
+        # Só a primeira ocorrência de cada nome normalizado conta, como em match_nome
+        self.exatos = {}
+        for rotulo, valor in zip(rotulos, valores):
+            self.exatos.setdefault(sys.intern(normalizar_nome(str(valor))), rotulo)
+        self.nomes = list(self.exatos)
+        self.rotulos = [self.exatos[n] for n in self.nomes]
+        self.comprimentos = np.fromiter((len(n) for n in self.nomes), dtype=np.int32, count=len(self.nomes))
+
+        postings = defaultdict(lambda: ([], []))
+        for i, nome in enumerate(self.nomes):
+            for bigrama, contagem in _bigramas(nome).items():
+                ids, contagens = postings[bigrama]
+                ids.append(i)
+                contagens.append(contagem)
+        self.postings = {
+            b: (np.asarray(ids, dtype=np.int32), np.asarray(cs, dtype=np.int32))
+            for b, (ids, cs) in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def _candidatos(self, alvo):
+        n = len(self.nomes)
+        la = len(alvo)
+        total = self.comprimentos + la
+        # real_quick_ratio: 2 * min(la, lb) / (la + lb) >= cutoff
+        mascara = 2.0 * np.minimum(self.comprimentos, la) >= self.cutoff * total
+        minimo = ((3 * self.cutoff - 2) / 2) * total - 1
+        if np.any(mascara & (minimo > 0)):
+            partilhados = np.zeros(n, dtype=np.int32)
+            for bigrama, contagem in _bigramas(alvo).items():
+                entrada = self.postings.get(bigrama)
+                if entrada is not None:
+                    ids, contagens = entrada
+                    partilhados[ids] += np.minimum(contagens, contagem)
+            mascara &= partilhados >= minimo - 1e-9
+        return np.flatnonzero(mascara)
+
+    def procurar_normalizado(self, alvo):
+        return self.procurar_com_confianca(alvo)[0]
+
+    def procurar_com_confianca(self, alvo):
+        # (rótulo, ratio) do melhor nome para `alvo` já normalizado; (rótulo, 1.0) num acerto exato
+        # e (None, 0.0) sem nenhum nome acima do cutoff
+        rotulo = self.exatos.get(alvo)
+        if rotulo is not None:
+            return rotulo, 1.0
+        s = SequenceMatcher()
+        s.set_seq2(alvo)
+        melhor = None
+        for i in self._candidatos(alvo):
+            nome = self.nomes[i]
+            s.set_seq1(nome)
+            r = s.ratio()
+            # Desempate igual ao de get_close_matches: maior (ratio, nome)
+            if r >= self.cutoff and (melhor is None or (r, nome) > melhor[:2]):
+                melhor = (r, nome, i)
+        if melhor is None:
+            return None, 0.0
+        return self.rotulos[melhor[2]], melhor[0]
+
+    def procurar(self, nome):
+        return self.procurar_normalizado(normalizar_nome(nome))
@@ -0,0 +1,161 @@
+# Tempos e contadores por etapa do pipeline (torneios, ratings, jogos, perfis, nomes, preços, histórico).
+#
+# Cada `with medir("etapa"):` regista o tempo de parede e os pedidos HTTP feitos lá dentro (pedidos à
+# rede, bytes descarregados, acertos/falhas da cache, pedidos partilhados com outra sessão), emite uma linha JSON no logger
+# "tennis_value.metricas" e, se houver uma Medicoes ativa (uma por rerun da app), acumula-a por etapa.
+# As etapas podem encaixar-se: os contadores HTTP contam para todas as etapas abertas.
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("tennis_value.metricas")
+
+# Origem de cada resposta do cliente HTTP; só "rede" descarrega o corpo
+ORIGENS_ACERTO = ("memoria", "disco", "revalidado")
+
+_medicoes = contextvars.ContextVar("medicoes", default=None)
+_pilha = contextvars.ContextVar("pilha_etapas", default=())
+_lock_contadores = threading.Lock()  # as threads de uma etapa (ex.: perfis) partilham os contadores
+
+
+class Contadores:
+    __slots__ = ("chamadas", "segundos", "pedidos", "bytes", "acertos", "falhas", "partilhados")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.segundos = 0.0
+        self.pedidos = 0
+        self.bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.partilhados = 0
+
+    def acrescentar(self, outro):
+        self.chamadas += outro.chamadas
+        self.segundos += outro.segundos
+        self.pedidos += outro.pedidos
+        self.bytes += outro.bytes
+        self.acertos += outro.acertos
+        self.falhas += outro.falhas
+        self.partilhados += outro.partilhados
+
+    def como_dict(self):
+        consultas = self.acertos + self.falhas
+        return {
+            "chamadas": self.chamadas,
+            "segundos": round(self.segundos, 4),
+            "pedidos": self.pedidos,
+            "bytes": self.bytes,
+            "cache_acertos": self.acertos,
+            "cache_falhas": self.falhas,
+            "taxa_acertos": round(self.acertos / consultas, 3) if consultas else None,
+            "partilhados": self.partilhados,
+        }
+
+
+# Acumulado por etapa de um rerun (ou de uma execução da CLI)
+class Medicoes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.etapas = {}
+        self.inicio = time.perf_counter()
+
+    def registar(self, etapa, contadores):
+        with self._lock:
+            self.etapas.setdefault(etapa, Contadores()).acrescentar(contadores)
+
+    def tabela(self):
+        # Uma linha por etapa, pela ordem em que cada uma terminou pela primeira vez
+        with self._lock:
+            return [{"etapa": nome, **c.como_dict()} for nome, c in self.etapas.items()]
+
+    def duracao(self):
+        return time.perf_counter() - self.inicio
+
+
+def ativar(medicoes):
+    # Torna `medicoes` o destino das etapas medidas neste contexto (thread do rerun)
+    _medicoes.set(medicoes)
+    return medicoes
+
+
+@contextmanager
+def medir(etapa):
+    contadores = Contadores()
+    token = _pilha.set(_pilha.get() + (contadores,))
+    inicio = time.perf_counter()
+    try:
+        yield contadores
+    finally:
+        contadores.segundos = time.perf_counter() - inicio
+        contadores.chamadas = 1
+        _pilha.reset(token)
+        medicoes = _medicoes.get()
+        if medicoes is not None:
+            medicoes.registar(etapa, contadores)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"evento": "etapa", "etapa": etapa, **contadores.como_dict()}))
+
+
+def emitir_resumo(medicoes):
+    # Uma linha JSON por etapa com os totais acumulados
+    for linha in medicoes.tabela():
+        logger.info(json.dumps({"evento": "resumo", **linha}))
+
+
+def contar_http(origem, n_bytes=0):
+    # Chamado pelo cliente HTTP para cada resposta; sem etapas abertas não custa mais que um get()
+    pilha = _pilha.get()
+    if not pilha:
+        return
+    acerto = origem in ORIGENS_ACERTO
+    pedido = origem in ("rede", "revalidado")
+    with _lock_contadores:
+        for contadores in pilha:
+            contadores.pedidos += pedido
+            contadores.bytes += n_bytes
+            contadores.acertos += acerto
+            contadores.falhas += not acerto
+
+
+def contar_partilhado():
+    # Chamado pelo voo único (voo_unico.py) quando esta chamada esperou pelo mesmo trabalho de outra
+    pilha = _pilha.get()
+    if not pilha:
+        return
+    with _lock_contadores:
+        for contadores in pilha:
+            contadores.partilhados += 1
+
+
+def propagar(func):
+    # Para ThreadPoolExecutor: o trabalho corre com as etapas e a Medicoes de quem o submeteu
+    medicoes = _medicoes.get()
+    pilha = _pilha.get()
+
+    def executar(*args, **kwargs):
+        t_medicoes = _medicoes.set(medicoes)
+        t_pilha = _pilha.set(pilha)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _pilha.reset(t_pilha)
+            _medicoes.reset(t_medicoes)
+
+    return executar
+
+
+def configurar_log(stream=None):
+    # Linhas JSON em stderr; TENNIS_METRICAS_LOG=0 desliga
+    if os.environ.get("TENNIS_METRICAS_LOG", "1") == "0" or logger.handlers:
+        return
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
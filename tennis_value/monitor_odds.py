@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import namedtuple
+
+from tennis_value import cliente_http, scrapers
+
+INTERVALO_PADRAO = 120  # segundos entre atualizações de odds de um torneio
+INTERVALO_MIN = 15
+PASSO_CICLO = 1.0
+# Uma sessão que deixa de renovar o seu interesse num torneio durante este tempo (janela fechada,
+# sessão terminada) deixa de contar; o torneio só sai do ciclo quando não resta nenhuma sessão
+VALIDADE_SESSAO = 60
+
+DiferencaOdds = namedtuple("DiferencaOdds", ["novos", "alterados", "removidos"])
+
+
+def chave_jogo(jogo):
+    return (jogo["jogador_a"], jogo["jogador_b"])
+
+def diferenca_jogos(antigos, novos):
+    # Compara as odds por jogo; devolve as chaves (jogador_a, jogador_b) novas, alteradas e removidas
+    odds_antigas = {chave_jogo(j): (j["odd_a"], j["odd_b"]) for j in antigos or []}
+    odds_novas = {chave_jogo(j): (j["odd_a"], j["odd_b"]) for j in novos or []}
+    return DiferencaOdds(
+        novos=[k for k in odds_novas if k not in odds_antigas],
+        alterados=[k for k, odds in odds_novas.items() if k in odds_antigas and odds_antigas[k] != odds],
+        removidos=[k for k in odds_antigas if k not in odds_novas],
+    )
+
+def tem_diferencas(diferenca):
+    return bool(diferenca.novos or diferenca.alterados or diferenca.removidos)
+
+
+class EstadoTorneio:
+    __slots__ = ("url", "intervalo", "jogos", "versao", "atualizado_em", "proxima", "diferenca", "erro",
+                 "torneio", "competicao", "sessoes")
+
+    def __init__(self, url, intervalo, jogos=None, torneio=None, competicao=None):
+        self.url = url
+        self.torneio = torneio
+        self.competicao = competicao
+        self.intervalo = intervalo
+        self.jogos = jogos
+        self.versao = 0
+        self.atualizado_em = time.time() if jogos is not None else None
+        self.proxima = time.monotonic() + (intervalo if jogos is not None else 0)
+        self.diferenca = DiferencaOdds([], [], [])
+        self.erro = None
+        self.sessoes = {}  # sessão -> [intervalo pedido, validade (time.monotonic)]
+
+    def recalcular_intervalo(self):
+        # O torneio é atualizado ao ritmo da sessão mais exigente
+        intervalo = min(i for i, _ in self.sessoes.values())
+        if intervalo != self.intervalo:
+            self.intervalo = intervalo
+            self.proxima = min(self.proxima, time.monotonic() + intervalo)
+
+
+# Atualiza periodicamente só as páginas dos torneios acompanhados. Os perfis dos jogadores vêm da
+# cache HTTP, por isso cada ciclo custa um pedido (condicional) por torneio. A versão de um torneio
+# só avança quando alguma odd mudou.
+#
+# O monitor é partilhado pelo processo: cada sessão acompanha um torneio com um arrendamento
+# (acompanhar/renovar) que expira ao fim de VALIDADE_SESSAO segundos sem renovação. Um torneio deixa de
+# ser atualizado quando a última sessão o larga ou o seu arrendamento expira.
+class MonitorOdds:
+    def __init__(self, obter_jogos=scrapers.obter_jogos_do_torneio, expirar=cliente_http.expirar, registo=None):
+        self.obter_jogos = obter_jogos
+        self.expirar = expirar
+        self.registo = registo
+        self._lock = threading.Lock()
+        self._estados = {}
+        self._parar = threading.Event()
+        self._thread = None
+
+    def acompanhar(self, url, intervalo=INTERVALO_PADRAO, jogos=None, torneio=None, competicao=None,
+                   sessao=None, validade=VALIDADE_SESSAO):
+        intervalo = max(INTERVALO_MIN, intervalo)
+        with self._lock:
+            estado = self._estados.get(url)
+            if estado is None:
+                estado = self._estados[url] = EstadoTorneio(url, intervalo, jogos, torneio, competicao)
+            estado.sessoes[sessao] = [intervalo, time.monotonic() + validade]
+            estado.recalcular_intervalo()
+
+    def renovar(self, url, sessao=None, validade=VALIDADE_SESSAO):
+        # Prolonga o arrendamento de `sessao`; False se já expirou (a sessão tem de voltar a acompanhar)
+        with self._lock:
+            estado = self._estados.get(url)
+            arrendamento = estado.sessoes.get(sessao) if estado is not None else None
+            if arrendamento is None:
+                return False
+            arrendamento[1] = time.monotonic() + validade
+            return True
+
+    def deixar_de_acompanhar(self, url, sessao=None):
+        # Larga o arrendamento de `sessao`; o torneio continua enquanto houver outras sessões
+        with self._lock:
+            estado = self._estados.get(url)
+            if estado is None:
+                return
+            estado.sessoes.pop(sessao, None)
+            if estado.sessoes:
+                estado.recalcular_intervalo()
+            else:
+                del self._estados[url]
+
+    def acompanhados(self, sessao=None):
+        # {url: intervalo} de todos os torneios, ou só dos acompanhados por `sessao` (com o intervalo que pediu)
+        with self._lock:
+            if sessao is None:
+                return {url: e.intervalo for url, e in self._estados.items()}
+            return {url: e.sessoes[sessao][0] for url, e in self._estados.items() if sessao in e.sessoes}
+
+    def estado(self, url):
+        with self._lock:
+            return self._estados.get(url)
+
+    def atualizar(self, url):
+        with self._lock:
+            estado = self._estados.get(url)
+        if estado is None:
+            return None
+        try:
+            self.expirar(url)
+            jogos = self.obter_jogos(url)
+        except Exception as e:
+            with self._lock:
+                estado.erro = str(e)
+                estado.proxima = time.monotonic() + estado.intervalo
+            return None
+        erro = None
+        if self.registo is not None:
+            try:
+                self.registo.registar(url, jogos, estado.torneio, estado.competicao)
+            except Exception as e:
+                erro = f"registo de odds: {e}"
+        diferenca = diferenca_jogos(estado.jogos, jogos)
+        with self._lock:
+            estado.erro = erro
+            estado.atualizado_em = time.time()
+            estado.proxima = time.monotonic() + estado.intervalo
+            if estado.jogos is None or tem_diferencas(diferenca):
+                estado.jogos = jogos
+                estado.diferenca = diferenca
+                estado.versao += 1
+        return diferenca
+
+    def _expirar_sessoes(self):
+        # Chamar com self._lock adquirido
+        agora = time.monotonic()
+        for url, estado in list(self._estados.items()):
+            expiradas = [s for s, (_, validade) in estado.sessoes.items() if validade <= agora]
+            if not expiradas:
+                continue
+            for sessao in expiradas:
+                del estado.sessoes[sessao]
+            if estado.sessoes:
+                estado.recalcular_intervalo()
+            else:
+                del self._estados[url]
+
+    def _pendentes(self):
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar_sessoes()
+            return [url for url, e in self._estados.items() if e.proxima <= agora]
+
+    def _ciclo(self):
+        while not self._parar.is_set():
+            for url in self._pendentes():
+                if self._parar.is_set():
+                    break
+                self.atualizar(url)
+            self._parar.wait(PASSO_CICLO)
+
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._ciclo, name="monitor-odds", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
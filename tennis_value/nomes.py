@@ -0,0 +1,28 @@
+import re
+import unicodedata
+
+
+def limpar_numero_ranking(nome):
+    return re.sub(r"\s*\(\d+\)", "", nome or "").strip()
+
+def ajustar_nome(nome_raw):
+    nome_raw = nome_raw or ""
+    nome_sem_profile = nome_raw.replace(" - profile", "").strip()
+    partes = nome_sem_profile.split(" - ")
+    if len(partes) == 2:
+        return f"{partes[1].strip()} {partes[0].strip()}"
+    return nome_sem_profile
+
+def reorganizar_nome(nome):
+    partes = (nome or "").strip().split()
+    if len(partes) == 2:
+        return f"{partes[1]} {partes[0]}"
+    elif len(partes) == 3:
+        return f"{partes[2]} {partes[0]} {partes[1]}"
+    else:
+        return nome or ""
+
+def normalizar_nome(nome):
+    nome = nome or ""
+    s = "".join(c for c in unicodedata.normalize("NFD", nome) if unicodedata.category(c) != "Mn")
+    return s.strip().casefold()
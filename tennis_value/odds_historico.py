@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ODDS_DB = os.environ.get("ODDS_DB", os.path.join(BASE_DIR, "odds_historico.sqlite"))
+
+# Observações guardadas com ids inteiros (torneios e jogadores em tabelas à parte) e timestamp em
+# segundos inteiros. A chave primária (torneio, jogador_a, jogador_b, ts) de uma tabela WITHOUT ROWID
+# agrupa fisicamente a série de cada jogo, pelo que "movimento deste jogo" é uma leitura por intervalo;
+# o índice (torneio, ts) serve "todas as observações do torneio X na janela Y".
+#
+# Só se grava uma observação quando as odds de um jogo mudam em relação à última guardada: a tabela cresce
+# com o movimento das linhas e não com a frequência de atualização do monitor. A série de um jogo tem
+# assim um ponto por mudança (as odds valem desde esse ts até ao ponto seguinte).
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS torneios (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    nome TEXT,
+    competicao TEXT
+);
+CREATE TABLE IF NOT EXISTS jogadores (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS observacoes (
+    torneio_id INTEGER NOT NULL,
+    jogador_a_id INTEGER NOT NULL,
+    jogador_b_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    odd_a REAL,
+    odd_b REAL,
+    PRIMARY KEY (torneio_id, jogador_a_id, jogador_b_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observacoes_torneio_ts ON observacoes (torneio_id, ts);
+"""
+
+
+def _segundos(momento, omissao):
+    if momento is None:
+        return omissao
+    if hasattr(momento, "timestamp"):
+        return int(momento.timestamp())
+    return int(momento)
+
+
+class RegistoOdds:
+    def __init__(self, caminho=ODDS_DB):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.executescript(ESQUEMA)
+        self._ids_torneios = {}
+        self._ids_jogadores = {}
+        self._ultimas = {}  # id do torneio -> {(id jogador A, id jogador B): (odd_a, odd_b)} da última observação
+
+    def _id_torneio(self, url, nome=None, competicao=None):
+        if url in self._ids_torneios:
+            return self._ids_torneios[url]
+        self._con.execute(
+            "INSERT INTO torneios (url, nome, competicao) VALUES (?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET nome = COALESCE(excluded.nome, nome), "
+            "competicao = COALESCE(excluded.competicao, competicao)",
+            (url, nome, competicao),
+        )
+        (id_,) = self._con.execute("SELECT id FROM torneios WHERE url = ?", (url,)).fetchone()
+        self._ids_torneios[url] = id_
+        return id_
+
+    def _id_jogador(self, nome):
+        if nome in self._ids_jogadores:
+            return self._ids_jogadores[nome]
+        self._con.execute("INSERT OR IGNORE INTO jogadores (nome) VALUES (?)", (nome,))
+        (id_,) = self._con.execute("SELECT id FROM jogadores WHERE nome = ?", (nome,)).fetchone()
+        self._ids_jogadores[nome] = id_
+        return id_
+
+    def _ultimas_do_torneio(self, id_torneio):
+        # Últimas odds guardadas de cada jogo do torneio (lidas da base uma vez por processo)
+        ultimas = self._ultimas.get(id_torneio)
+        if ultimas is None:
+            linhas = self._con.execute(
+                """
+                SELECT o.jogador_a_id, o.jogador_b_id, o.odd_a, o.odd_b
+                FROM observacoes o
+                WHERE o.torneio_id = ? AND o.ts = (
+                    SELECT MAX(ts) FROM observacoes
+                    WHERE torneio_id = o.torneio_id
+                      AND jogador_a_id = o.jogador_a_id AND jogador_b_id = o.jogador_b_id
+                )
+                """,
+                (id_torneio,),
+            ).fetchall()
+            ultimas = self._ultimas[id_torneio] = {(a, b): (odd_a, odd_b) for a, b, odd_a, odd_b in linhas}
+        return ultimas
+
+    def registar(self, url_torneio, jogos, torneio=None, competicao=None, ts=None):
+        # Acrescenta uma observação por jogo cujas odds mudaram desde a última guardada (uma transação por
+        # snapshot); devolve quantas gravou
+        ts = int(ts if ts is not None else time.time())
+        with self._lock:
+            try:
+                with self._con:
+                    id_torneio = self._id_torneio(url_torneio, torneio, competicao)
+                    ultimas = self._ultimas_do_torneio(id_torneio)
+                    novas = {}
+                    for j in jogos:
+                        chave = (self._id_jogador(j["jogador_a"]), self._id_jogador(j["jogador_b"]))
+                        odds = (j.get("odd_a"), j.get("odd_b"))
+                        if ultimas.get(chave, novas.get(chave)) != odds:
+                            novas[chave] = odds
+                    linhas = [(id_torneio, a, b, ts, odd_a, odd_b) for (a, b), (odd_a, odd_b) in novas.items()]
+                    cur = self._con.executemany("INSERT OR IGNORE INTO observacoes VALUES (?, ?, ?, ?, ?, ?)", linhas)
+            except sqlite3.Error:
+                # Os ids e as odds em memória podem referir linhas desfeitas pelo rollback
+                self._ids_torneios.clear()
+                self._ids_jogadores.clear()
+                self._ultimas.clear()
+                raise
+            ultimas.update(novas)
+        return cur.rowcount
+
+    def _ler(self, sql, params):
+        with self._lock:
+            return pd.read_sql_query(sql, self._con, params=params)
+
+    def movimento_jogo(self, url_torneio, jogador_a, jogador_b, inicio=None, fim=None):
+        df = self._ler(
+            """
+            SELECT o.ts, o.odd_a, o.odd_b
+            FROM observacoes o
+            JOIN torneios t ON t.id = o.torneio_id
+            JOIN jogadores ja ON ja.id = o.jogador_a_id
+            JOIN jogadores jb ON jb.id = o.jogador_b_id
+            WHERE t.url = ? AND ja.nome = ? AND jb.nome = ? AND o.ts BETWEEN ? AND ?
+            ORDER BY o.ts
+            """,
+            (url_torneio, jogador_a, jogador_b, _segundos(inicio, 0), _segundos(fim, 2**62)),
+        )
+        df["ts"] = pd.to_datetime(df["ts"], unit="s")
+        return df
+
+    def observacoes_torneio(self, url_torneio, inicio=None, fim=None):
+        df = self._ler(
+            """
+            SELECT o.ts, ja.nome AS jogador_a, jb.nome AS jogador_b, o.odd_a, o.odd_b
+            FROM observacoes o
+            JOIN torneios t ON t.id = o.torneio_id
+            JOIN jogadores ja ON ja.id = o.jogador_a_id
+            JOIN jogadores jb ON jb.id = o.jogador_b_id
+            WHERE t.url = ? AND o.ts BETWEEN ? AND ?
+            ORDER BY o.ts
+            """,
+            (url_torneio, _segundos(inicio, 0), _segundos(fim, 2**62)),
+        )
+        df["ts"] = pd.to_datetime(df["ts"], unit="s")
+        return df
+
+    def estatisticas(self):
+        with self._lock:
+            (n,) = self._con.execute("SELECT COUNT(*) FROM observacoes").fetchone()
+            (t,) = self._con.execute("SELECT COUNT(*) FROM torneios").fetchone()
+        return {"observacoes": n, "torneios": t}
+
+    def fechar(self):
+        with self._lock:
+            self._con.close()
+
+
+def registo_padrao():
+    if os.environ.get("ODDS_REGISTO", "1") == "0":
+        return None
+    try:
+        return RegistoOdds()
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,48 @@
+import re
+
+from lxml import html as lxml_html
+
+
+# O parser HTML do libxml2 (lxml) é ordens de grandeza mais rápido que o html.parser em Python puro
+def documento_html(conteudo):
+    # Sem charset declarado o libxml2 assume latin-1; tenta-se UTF-8 primeiro, como o BeautifulSoup
+    if isinstance(conteudo, bytes):
+        try:
+            conteudo = conteudo.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    if isinstance(conteudo, str) and conteudo.lstrip().startswith("<?xml"):
+        # Declaração de encoding XML: o lxml só a aceita em bytes
+        conteudo = conteudo.encode("utf-8")
+    if not conteudo or not conteudo.strip():
+        return None
+    try:
+        return lxml_html.document_fromstring(conteudo)
+    except lxml_html.etree.ParserError:
+        return None
+
+_ESPACOS = re.compile(r"[\r\n]+|\s{2,}")
+
+def texto_celula(celula):
+    # Mesma limpeza de espaços que o pd.read_html
+    return _ESPACOS.sub(" ", celula.text_content()).strip()
+
+def tabelas_html(doc):
+    # Para cada <table>: (cabeçalho, linhas). O cabeçalho vem do <thead> ou das primeiras linhas só com <th>.
+    for table in doc.iter("table"):
+        linhas = table.xpath("./tr|./thead/tr|./tbody/tr|./tfoot/tr")
+        if not linhas:
+            continue
+        thead = table.xpath("./thead/tr")
+        if thead:
+            cabecalho = thead[-1]
+            corpo = [tr for tr in linhas if tr.getparent().tag != "thead"]
+        else:
+            n = 0
+            while n < len(linhas) and linhas[n].xpath("./td") == [] and linhas[n].xpath("./th"):
+                n += 1
+            if n == 0:
+                continue
+            cabecalho, corpo = linhas[n - 1], linhas[n:]
+        colunas = [texto_celula(c) for c in cabecalho.xpath("./th|./td")]
+        yield colunas, [[texto_celula(c) for c in tr.xpath("./td|./th")] for tr in corpo]
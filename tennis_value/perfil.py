@@ -0,0 +1,73 @@
+# Perfil (cProfile) de um rerun completo da app, a pedido.
+#
+# Ligado com ?perfil=1 no URL (um rerun) ou TENNIS_PERFIL=1 (todos os reruns). Com o interruptor
+# desligado a app só faz o teste de pedido(); nada é instrumentado. O resultado fica em
+# TENNIS_PERFIS_DIR como .pstats (para `python -m pstats` ou snakeviz) e como resumo em texto.
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+
+from tennis_value.cache_disco import CACHE_DIR
+
+PERFIS_DIR = os.environ.get("TENNIS_PERFIS_DIR", os.path.join(CACHE_DIR, "perfis"))
+PARAMETRO = "perfil"
+ORDENAR = "cumulative"
+LINHAS_RESUMO = 60
+MAX_PERFIS = 20
+
+_estado = threading.local()
+
+
+def pedido(query_params):
+    if os.environ.get("TENNIS_PERFIL", "0") == "1":
+        return True
+    return str(query_params.get(PARAMETRO, "")).lower() in ("1", "true", "sim")
+
+def a_perfilar():
+    # True dentro da execução perfilada (evita que o script volte a perfilar-se a si próprio)
+    return getattr(_estado, "ativo", False)
+
+def _limpar_antigos(pasta, manter=MAX_PERFIS):
+    ficheiros = sorted(f for f in os.listdir(pasta) if f.endswith(".pstats"))
+    for ficheiro in ficheiros[:-manter]:
+        for extensao in (".pstats", ".txt"):
+            try:
+                os.remove(os.path.join(pasta, ficheiro[:-len(".pstats")] + extensao))
+            except OSError:
+                pass
+
+def guardar(perfil, segundos, pasta=PERFIS_DIR, ordenar=ORDENAR, linhas=LINHAS_RESUMO):
+    # Devolve {"caminho", "texto", "segundos"}; caminho None se não foi possível escrever em disco
+    texto = io.StringIO()
+    pstats.Stats(perfil, stream=texto).sort_stats(ordenar).print_stats(linhas)
+    caminho = None
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        base = os.path.join(pasta, time.strftime("perfil-%Y%m%d-%H%M%S"))
+        perfil.dump_stats(base + ".pstats")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(texto.getvalue())
+        caminho = base + ".pstats"
+        _limpar_antigos(pasta)
+    except OSError:
+        pass
+    return {"caminho": caminho, "texto": texto.getvalue(), "segundos": segundos}
+
+def perfilar_script(caminho, ao_terminar, pasta=PERFIS_DIR):
+    # Executa o script `caminho` sob cProfile. ao_terminar(resultado) é chamado mesmo quando o script
+    # termina com uma exceção (st.stop / st.rerun do Streamlit), que depois segue o seu caminho.
+    with open(caminho, encoding="utf-8") as f:
+        codigo = compile(f.read(), caminho, "exec")
+    perfil = cProfile.Profile()
+    _estado.ativo = True
+    inicio = time.perf_counter()
+    try:
+        perfil.enable()
+        exec(codigo, {"__name__": "__main__", "__file__": caminho})
+    finally:
+        perfil.disable()
+        _estado.ativo = False
+        ao_terminar(guardar(perfil, time.perf_counter() - inicio, pasta))
@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+
+from tennis_value import metricas
+
+# ===== Parâmetros globais =====
+TOLERANCIA = 1e-6
+VALOR_MIN = 0.045
+VALOR_MAX = 0.275
+ODD_MIN = 1.425
+ODD_MAX = 3.15
+
+# (limite superior do valor, stake em €) para valores dentro de [VALOR_MIN, VALOR_MAX]
+FAIXAS_STAKE = ((0.11, 5.0), (0.18, 7.5), (float("inf"), 10.0))
+
+# Sugestão +1.5 sets: odds em [MAIS15_ODD_MIN, MAIS15_ODD_MEDIA] divididas por
+# MAIS15_DIVISOR_BAIXO, odds acima de MAIS15_ODD_MEDIA divididas por MAIS15_DIVISOR_ALTO
+MAIS15_ODD_MIN = 2.45
+MAIS15_ODD_MEDIA = 2.70
+MAIS15_DIVISOR_BAIXO = 1.5
+MAIS15_DIVISOR_ALTO = 1.7
+
+ODD_PADRAO_A = 1.80
+ODD_PADRAO_B = 2.00
+
+COLUNAS_SUPERFICIE = {"Hard": "hElo", "Clay": "cElo", "Grass": "gElo"}
+
+
+def elo_prob(elo_a, elo_b):
+    return 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
+
+def value_bet(prob, odd):
+    return prob * odd - 1
+
+def stake_por_faixa(valor):
+    if valor < VALOR_MIN or valor > VALOR_MAX:
+        return 0.0
+    for limite, stake in FAIXAS_STAKE:
+        if valor < limite:
+            return stake
+    return FAIXAS_STAKE[-1][1]
+
+def elo_final(elo_geral, elo_superficie, yelo):
+    return (elo_superficie / elo_geral) * yelo
+
+def elo_por_superficie(df_jogador, superficie_en):
+    try:
+        return float(df_jogador[COLUNAS_SUPERFICIE[superficie_en]])
+    except:
+        return float(df_jogador.get("Elo", 1500))
+
+def odd_mais15(odd):
+    if MAIS15_ODD_MIN <= odd <= MAIS15_ODD_MEDIA:
+        return odd / MAIS15_DIVISOR_BAIXO
+    elif odd > MAIS15_ODD_MEDIA:
+        return odd / MAIS15_DIVISOR_ALTO
+    return None
+
+
+# ===== Versões vetorizadas (arrays NumPy / Series pandas) =====
+
+def tabela_faixas(faixas):
+    # Faixas de stake como arrays (limites, stakes). Uma política ((limite, stake), ...) dá vetores; uma
+    # sequência de políticas (uma por configuração) dá matrizes (políticas, faixas), completadas com a
+    # última faixa de cada política até todas terem o mesmo número
+    if not isinstance(faixas[0][0], (tuple, list)):
+        return np.array([limite for limite, _ in faixas], dtype=float), np.array([s for _, s in faixas], dtype=float)
+    n = max(len(f) for f in faixas)
+    limites = np.full((len(faixas), n), np.inf)
+    stakes = np.empty((len(faixas), n))
+    for i, politica in enumerate(faixas):
+        limites[i, :len(politica)] = [limite for limite, _ in politica]
+        stakes[i, :len(politica)] = [s for _, s in politica]
+        stakes[i, len(politica):] = politica[-1][1]
+    return limites, stakes
+
+def stake_por_faixa_vetor(valor, valor_min=VALOR_MIN, valor_max=VALOR_MAX, faixas=FAIXAS_STAKE):
+    # Com uma sequência de políticas em `faixas`, `valor` é uma matriz (políticas, apostas) e os limites
+    # de valor podem ser colunas (políticas, 1)
+    valor = np.asarray(valor, dtype=float)
+    limites, stakes = tabela_faixas(faixas)
+    if limites.ndim == 1:
+        idx = np.minimum(np.searchsorted(limites, valor, side="right"), len(stakes) - 1)
+        stake = stakes[idx]
+    else:
+        # Primeira faixa cujo limite excede o valor (o searchsorted de cada linha), da última para a primeira
+        stake = np.broadcast_to(stakes[:, -1:], valor.shape)
+        for j in range(limites.shape[1] - 2, -1, -1):
+            stake = np.where(valor < limites[:, j:j + 1], stakes[:, j:j + 1], stake)
+    fora = ~((valor >= valor_min) & (valor <= valor_max))  # NaN também fica fora
+    return np.where(fora, 0.0, stake)
+
+def odd_mais15_vetor(odd, odd_min=MAIS15_ODD_MIN, odd_media=MAIS15_ODD_MEDIA,
+                     divisor_baixo=MAIS15_DIVISOR_BAIXO, divisor_alto=MAIS15_DIVISOR_ALTO):
+    odd = np.asarray(odd, dtype=float)
+    return np.select(
+        [(odd >= odd_min) & (odd <= odd_media), odd > odd_media],
+        [odd / divisor_baixo, odd / divisor_alto],
+        np.nan,
+    )
+
+def com_valor_vetor(valor, odd, valor_min=VALOR_MIN, valor_max=VALOR_MAX,
+                    odd_min=ODD_MIN, odd_max=ODD_MAX, tolerancia=0.0):
+    valor = np.asarray(valor, dtype=float)
+    odd = np.asarray(odd, dtype=float)
+    return ((odd >= odd_min) & (odd <= odd_max)
+            & (valor >= valor_min - tolerancia) & (valor <= valor_max + tolerancia))
+
+def regras_aposta(valor, odd, valor_min=VALOR_MIN, valor_max=VALOR_MAX, odd_min=ODD_MIN, odd_max=ODD_MAX,
+                  faixas=FAIXAS_STAKE, tolerancia=0.0, mais15_odd_min=MAIS15_ODD_MIN,
+                  mais15_odd_media=MAIS15_ODD_MEDIA, divisor_baixo=MAIS15_DIVISOR_BAIXO,
+                  divisor_alto=MAIS15_DIVISOR_ALTO):
+    # Regras de aposta de um lado, partilhadas pela app e pelo backtest: (com valor, stake da faixa,
+    # odd +1.5 sets, especial). Especial: lado com valor cuja odd tem sugestão +1.5 sets, que passa a ser
+    # a aposta. Os parâmetros podem ser colunas (configurações, 1) contra matrizes (configurações, apostas).
+    com_valor = com_valor_vetor(valor, odd, valor_min, valor_max, odd_min, odd_max, tolerancia)
+    stake = stake_por_faixa_vetor(valor, valor_min, valor_max, faixas)
+    mais15 = odd_mais15_vetor(odd, mais15_odd_min, mais15_odd_media, divisor_baixo, divisor_alto)
+    return com_valor, stake, mais15, com_valor & ~np.isnan(mais15)
+
+def avaliar_arrays(elo_geral_a, elo_sup_a, yelo_a, elo_geral_b, elo_sup_b, yelo_b, odd_a, odd_b,
+                   valor_min=VALOR_MIN, valor_max=VALOR_MAX, odd_min=ODD_MIN, odd_max=ODD_MAX,
+                   faixas=FAIXAS_STAKE, arredondar=None, tolerancia=0.0):
+    # Avalia um lote de jogos numa única passagem; cada argumento é um array com um valor por jogo e o
+    # resultado é um dict coluna -> array NumPy (sem DataFrame: a análise manual avalia um único jogo).
+    # arredondar/tolerancia reproduzem a análise manual (valor arredondado a 6 casas e
+    # margem TOLERANCIA nas faixas); a análise automática usa os valores sem arredondar.
+    elo_geral_a, elo_sup_a, yelo_a, elo_geral_b, elo_sup_b, yelo_b, odd_a, odd_b = (
+        np.asarray(x, dtype=float)
+        for x in (elo_geral_a, elo_sup_a, yelo_a, elo_geral_b, elo_sup_b, yelo_b, odd_a, odd_b)
+    )
+    elo_final_a = elo_final(elo_geral_a, elo_sup_a, yelo_a)
+    elo_final_b = elo_final(elo_geral_b, elo_sup_b, yelo_b)
+    prob_a = elo_prob(elo_final_a, elo_final_b)
+    prob_b = 1 - prob_a
+
+    # Remoção da margem da casa (overround)
+    raw_a = 1 / odd_a
+    raw_b = 1 / odd_b
+    soma = raw_a + raw_b
+    odd_corr_a = soma / raw_a
+    odd_corr_b = soma / raw_b
+
+    valor_a = value_bet(prob_a, odd_corr_a)
+    valor_b = value_bet(prob_b, odd_corr_b)
+    if arredondar is not None:
+        valor_a = np.round(valor_a, arredondar)
+        valor_b = np.round(valor_b, arredondar)
+
+    com_valor_a, stake_a, mais15_a, especial_a = regras_aposta(
+        valor_a, odd_a, valor_min, valor_max, odd_min, odd_max, faixas, tolerancia)
+    com_valor_b, stake_b, mais15_b, especial_b = regras_aposta(
+        valor_b, odd_b, valor_min, valor_max, odd_min, odd_max, faixas, tolerancia)
+
+    return {
+        "elo_final_a": elo_final_a,
+        "elo_final_b": elo_final_b,
+        "prob_a": prob_a,
+        "prob_b": prob_b,
+        "odd_corr_a": odd_corr_a,
+        "odd_corr_b": odd_corr_b,
+        "valor_a": valor_a,
+        "valor_b": valor_b,
+        "stake_a": stake_a,
+        "stake_b": stake_b,
+        "com_valor_a": com_valor_a,
+        "com_valor_b": com_valor_b,
+        "odd_mais15_a": mais15_a,
+        "odd_mais15_b": mais15_b,
+        "especial_a": especial_a,
+        "especial_b": especial_b,
+    }
+
+def avaliar_lote(*args, **kwargs):
+    # Como avaliar_arrays, num DataFrame com uma linha por jogo
+    return pd.DataFrame(avaliar_arrays(*args, **kwargs))
+
+def avaliar_jogos(jogos, ratings, superficie_en, **kwargs):
+    # Liga cada jogo à vista PlayerRatings (uma pesquisa de nome por jogador) e avalia o lote inteiro.
+    # Jogos sem Elo/yElo para algum dos jogadores são descartados, como na análise automática.
+    pares = []
+    with metricas.medir("nomes"):
+        for jogo in jogos:
+            pa = ratings.procurar(jogo["jogador_a"], jogo.get("url_a"))
+            pb = ratings.procurar(jogo["jogador_b"], jogo.get("url_b"))
+            if pa is None or pb is None:
+                continue
+            pares.append((jogo, pa, pb))
+    if not pares:
+        return pd.DataFrame()
+    with metricas.medir("precos"):
+        colunas, validos = _avaliar_pares(pares, ratings, superficie_en, **kwargs)
+        df = pd.DataFrame(colunas)
+        return df if validos.all() else df[validos].reset_index(drop=True)
+
+def _avaliar_pares(pares, ratings, superficie_en, **kwargs):
+    # pares: [(jogo, posição de A, posição de B)] em ratings. Devolve (colunas, validos): um dict
+    # coluna -> array com uma posição por par, pela mesma ordem, e a máscara dos pares com ratings
+    # numéricos (jogadores sem yElo ficam de fora)
+    geral_a, sup_a, yelo_a = ratings.valores([p[1] for p in pares], superficie_en)
+    geral_b, sup_b, yelo_b = ratings.valores([p[2] for p in pares], superficie_en)
+    odd_a = np.array([p[0]["odd_a"] or ODD_PADRAO_A for p in pares], dtype=float)
+    odd_b = np.array([p[0]["odd_b"] or ODD_PADRAO_B for p in pares], dtype=float)
+
+    colunas = {
+        "jogador_a": [p[0]["jogador_a"] for p in pares],
+        "jogador_b": [p[0]["jogador_b"] for p in pares],
+        "odd_a": odd_a,
+        "odd_b": odd_b,
+        **avaliar_arrays(geral_a, sup_a, yelo_a, geral_b, sup_b, yelo_b, odd_a, odd_b, **kwargs),
+    }
+    validos = ~np.isnan(geral_a + sup_a + yelo_a + geral_b + sup_b + yelo_b)
+    return colunas, validos
+
+def mudancas_de_valor(avaliacao_anterior, avaliacao, chaves):
+    # Entre os jogos `chaves`, devolve (passaram a ter valor, deixaram de ter valor)
+    def com_valor(av):
+        if av is None or av.empty:
+            return {}
+        flags = av["com_valor_a"] | av["com_valor_b"]
+        return dict(zip(zip(av["jogador_a"], av["jogador_b"]), flags))
+
+    antes = com_valor(avaliacao_anterior)
+    depois = com_valor(avaliacao)
+    ganharam = [k for k in chaves if depois.get(k, False) and not antes.get(k, False)]
+    perderam = [k for k in chaves if antes.get(k, False) and not depois.get(k, False)]
+    return ganharam, perderam
@@ -0,0 +1,230 @@
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+
+from tennis_value import cliente_http, metricas
+from tennis_value.indice_jogadores import CUTOFF_PADRAO, PlayerIndex
+from tennis_value.nomes import normalizar_nome
+from tennis_value.paginas import documento_html, tabelas_html
+from tennis_value.precos import COLUNAS_SUPERFICIE
+
+URLS_ELO = {
+    "ATP": "https://tennisabstract.com/reports/atp_elo_ratings.html",
+    "WTA": "https://tennisabstract.com/reports/wta_elo_ratings.html",
+}
+URLS_YELO = {
+    "ATP": "https://tennisabstract.com/reports/atp_season_yelo_ratings.html",
+    "WTA": "https://tennisabstract.com/reports/wta_season_yelo_ratings.html",
+}
+
+COLUNAS_RATINGS = ("Elo", "hElo", "cElo", "gElo", "yElo")
+MAX_PROCURAS = 4096  # nomes pesquisados memorizados por PlayerRatings
+# Ratings com uma casa decimal: float32 representa-os com erro < 1e-4 e ocupa metade
+DTYPE_RATINGS = np.float32
+
+
+def _tabela_tipada(colunas, linhas):
+    # Uma lista por coluna; ratings em float32, restantes numéricas quando todos os valores o são,
+    # nomes como categoria e uma coluna "chave" com o nome normalizado (internado: as chaves do Elo, do
+    # yElo e do índice de nomes partilham as mesmas strings)
+    largura = len(colunas)
+    colunas = [c or f"Unnamed: {i}" for i, c in enumerate(colunas)]
+    valores = [[] for _ in range(largura)]
+    for linha in linhas:
+        linha = (linha + [""] * largura)[:largura]
+        for lista, valor in zip(valores, linha):
+            lista.append(valor if valor != "" else None)
+    df = pd.DataFrame(dict(zip(colunas, valores)))
+    df = df[df["Player"].notna()].reset_index(drop=True)
+    for coluna in df.columns:
+        if coluna == "Player":
+            continue
+        numeros = pd.to_numeric(df[coluna], errors="coerce")
+        if coluna in COLUNAS_RATINGS:
+            df[coluna] = numeros.astype(DTYPE_RATINGS)
+        elif numeros.notna().sum() == df[coluna].notna().sum():
+            df[coluna] = numeros.astype(float)
+    df.insert(df.columns.get_loc("Player") + 1, "chave", [sys.intern(normalizar_nome(n)) for n in df["Player"]])
+    df["Player"] = df["Player"].astype("category")
+    return df
+
+def _tabela_elo_de_html(conteudo):
+    doc = documento_html(conteudo)
+    if doc is None:
+        return None
+    for colunas, linhas in tabelas_html(doc):
+        if "Player" in colunas:
+            return _tabela_tipada(colunas, linhas)
+    return None
+
+def _tabela_yelo_de_html(conteudo):
+    doc = documento_html(conteudo)
+    if doc is None:
+        return None
+    for colunas, linhas in tabelas_html(doc):
+        minusculas = [c.lower() for c in colunas]
+        if "player" in minusculas and "yelo" in minusculas:
+            renomear = {"player": "Player", "yelo": "yElo"}
+            df = _tabela_tipada([renomear.get(c, c) for c in minusculas], linhas)
+            return df[["Player", "chave", "yElo"]]
+    return None
+
+def obter_elo_table(tipo="ATP"):
+    url = URLS_ELO["ATP"] if tipo == "ATP" else URLS_ELO["WTA"]
+    with metricas.medir("ratings"):
+        return cliente_http.obter_processado(url, _tabela_elo_de_html)
+
+def obter_yelo_table(tipo="ATP"):
+    url = URLS_YELO["ATP"] if tipo == "ATP" else URLS_YELO["WTA"]
+    with metricas.medir("ratings"):
+        return cliente_http.obter_processado(url, _tabela_yelo_de_html)
+
+def encontrar_yelo(nome, yelo_df, indice=None):
+    if indice is None:
+        indice = PlayerIndex(yelo_df["Player"].dropna().tolist())
+    pos = indice.procurar(nome)
+    if pos is not None:
+        return yelo_df.iloc[pos]["yElo"]
+    return None
+
+def match_nome(nome, df_col, indice=None):
+    if indice is None:
+        indice = PlayerIndex(df_col)
+    return indice.procurar(nome)
+
+
+# Vista única Elo + yElo por jogador. A junção pela chave normalizada é feita uma vez, na construção:
+# jogadores do Elo sem chave igual no yElo recebem o yElo do nome mais próximo (mesmo critério do
+# PlayerIndex). Cada jogo custa então uma pesquisa de nome e uma leitura por posição nos arrays.
+#
+# Construída uma vez por processo e partilhada por todas as sessões (st.cache_resource na app): os
+# arrays são float32 e só de leitura, os nomes uma categoria e as chaves strings internadas. Cada sessão
+# lê através de RegistoJogador / valores(), sem copiar a tabela. `versao` identifica o carregamento
+# (para as caches que dependem dos ratings) e as pesquisas de nomes ficam memorizadas. Com um mapa de
+# identidades (identidades.py), um jogador pesquisado com o URL do perfil já resolvido é um lookup exato.
+_versoes = itertools.count(1)
+
+
+class PlayerRatings:
+    __slots__ = ("nomes", "chaves", "indice", "versao", "identidades", "_arrays", "_procuras")
+
+    def __init__(self, elo_df, yelo_df, cutoff=CUTOFF_PADRAO, identidades=None):
+        elo = elo_df.drop_duplicates("chave").reset_index(drop=True)
+        yelo = yelo_df.dropna(subset=["yElo"]).drop_duplicates("chave")
+        yelo_por_chave = pd.Series(yelo["yElo"].to_numpy(dtype=DTYPE_RATINGS), index=yelo["chave"])
+
+        yelos = elo["chave"].map(yelo_por_chave).to_numpy(dtype=DTYPE_RATINGS, copy=True)
+        sem_yelo = np.flatnonzero(np.isnan(yelos))
+        if len(sem_yelo) and len(yelo):
+            indice_yelo = PlayerIndex(yelo["chave"].tolist(), cutoff)
+            valores_yelo = yelo_por_chave.to_numpy()
+            for i in sem_yelo:
+                pos = indice_yelo.procurar_normalizado(elo["chave"].iat[i])
+                if pos is not None:
+                    yelos[i] = valores_yelo[pos]
+
+        self.nomes = pd.Categorical(elo["Player"].astype(str))
+        self.chaves = elo["chave"].to_numpy(dtype=object, copy=True)
+        self._arrays = {}
+        for coluna in COLUNAS_RATINGS[:-1]:
+            if coluna in elo.columns:
+                self._arrays[coluna] = elo[coluna].to_numpy(dtype=DTYPE_RATINGS, copy=True)
+            else:
+                self._arrays[coluna] = np.full(len(elo), np.nan, dtype=DTYPE_RATINGS)
+        self._arrays["yElo"] = yelos
+        for array in (self.chaves, *self._arrays.values()):
+            array.flags.writeable = False
+        self.indice = PlayerIndex(list(self.nomes), cutoff)
+        self.versao = next(_versoes)
+        self.identidades = identidades
+        self._procuras = {}
+
+    def __len__(self):
+        return len(self.chaves)
+
+    @property
+    def tabela(self):
+        # DataFrame com uma linha por jogador (construído a pedido; para inspeção e exportação)
+        return pd.DataFrame({"Player": self.nomes, "chave": self.chaves, **self._arrays})
+
+    def procurar(self, nome, url=None):
+        # Posição do jogador na tabela (ou None); os mesmos nomes repetem-se em todos os reruns.
+        # url: perfil do jogador no tennisexplorer, chave do mapa de identidades
+        try:
+            return self._procuras[(nome, url)]
+        except KeyError:
+            pass
+        pos = self._procurar(nome, url)
+        if len(self._procuras) >= MAX_PROCURAS:
+            self._procuras.clear()
+        self._procuras[(nome, url)] = pos
+        return pos
+
+    def _procurar(self, nome, url):
+        mapa = self.identidades if url else None
+        if mapa is not None:
+            identidade = mapa.obter(url)
+            if identidade is not None and identidade.chave is not None:
+                if identidade.confianca is not None and identidade.confianca < 1.0:
+                    # Associação aproximada: um acerto exato do nome (o jogador certo entrou nos ratings)
+                    # substitui-a
+                    pos = self.indice.exatos.get(normalizar_nome(nome))
+                    if pos is not None:
+                        mapa.registar_chave(url, self.chaves[pos], 1.0)
+                        return pos
+                pos = self.indice.exatos.get(identidade.chave)
+                if pos is not None:
+                    return pos
+                # A chave guardada não está nestas tabelas: volta a procurar pelo nome
+        # Sem chave guardada a pesquisa (indexada) repete-se: o jogador pode ter entrado nos ratings de hoje
+        pos, confianca = self.indice.procurar_com_confianca(normalizar_nome(nome))
+        if mapa is not None:
+            mapa.registar_chave(url, None if pos is None else self.chaves[pos], confianca)
+        return pos
+
+    def jogador(self, nome, url=None):
+        pos = self.procurar(nome, url)
+        return None if pos is None else RegistoJogador(self, pos)
+
+    def valores(self, posicoes, superficie_en):
+        # (Elo geral, Elo da superfície, yElo) em float64 para as posições dadas; sem Elo da superfície
+        # usa o geral
+        posicoes = np.asarray(posicoes, dtype=np.intp)
+        geral = self._arrays["Elo"][posicoes].astype(float)
+        coluna = COLUNAS_SUPERFICIE.get(superficie_en)
+        sup = self._arrays[coluna][posicoes].astype(float) if coluna else geral.copy()
+        sup = np.where(np.isnan(sup), geral, sup)
+        return geral, sup, self._arrays["yElo"][posicoes].astype(float)
+
+    def memoria(self):
+        # Bytes ocupados pelos arrays, nomes e chaves (o índice de nomes não é contado)
+        total = sum(a.nbytes for a in self._arrays.values())
+        total += self.nomes.codes.nbytes + sum(sys.getsizeof(n) for n in self.nomes.categories)
+        return total + self.chaves.nbytes + sum(sys.getsizeof(c) for c in self.chaves)
+
+
+# Leitura de um jogador da PlayerRatings sem cópia: r["Elo"], r["Player"], r.get("cElo", 1500)
+class RegistoJogador:
+    __slots__ = ("ratings", "pos")
+
+    def __init__(self, ratings, pos):
+        self.ratings = ratings
+        self.pos = pos
+
+    def __getitem__(self, coluna):
+        if coluna == "Player":
+            return self.ratings.nomes[self.pos]
+        if coluna == "chave":
+            return self.ratings.chaves[self.pos]
+        return float(self.ratings._arrays[coluna][self.pos])
+
+    def get(self, coluna, padrao=None):
+        try:
+            return self[coluna]
+        except KeyError:
+            return padrao
+
+    def __repr__(self):
+        return f"RegistoJogador({self['Player']!r}, Elo={self['Elo']}, yElo={self['yElo']})"
@@ -0,0 +1,193 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from tennis_value import cliente_http, identidades, metricas, voo_unico
+from tennis_value.paginas import documento_html
+from tennis_value.nomes import ajustar_nome, limpar_numero_ranking, reorganizar_nome
+
+BASE_URL = "https://www.tennisexplorer.com"
+
+# Resolução concorrente de perfis de jogadores (o ritmo por host é gerido pelo cliente HTTP)
+MAX_PERFIS_CONCORRENTES = int(os.environ.get("MAX_PERFIS_CONCORRENTES", "8"))
+
+TORNEIOS_ATP_PERMITIDOS = [
+    "Acapulco", "Adelaide", "Adelaide 2", "Almaty", "Antwerp", "Astana", "Atlanta", "ATP Cup",
+    "Auckland", "Australian Open", "Banja Luka", "Barcelona", "Basel", "Bastad", "Beijing",
+    "Belgrade", "Belgrade 2", "Brisbane", "Bucharest", "Buenos Aires", "Chengdu", "Cincinnati",
+    "Cordoba", "Dallas", "Delray Beach", "Doha", "Dubai", "Eastbourne", "Estoril", "Florence",
+    "French Open", "Geneva", "Gijon", "Gstaad", "Halle", "Hamburg", "Hangzhou",
+    "Hertogenbosch", "Hong Kong ATP", "Houston", "Indian Wells", "Kitzbühel", "Los Cabos",
+    "Lyon", "Madrid", "Mallorca", "Marrakech", "Marseille", "Masters Cup ATP", "Melbourne Summer Set 1",
+    "Metz", "Miami", "Monte Carlo", "Montpellier", "Montreal", "Moscow", "Munich", "Napoli",
+    "Newport", "Next Gen ATP Finals", "Paris", "Parma", "Pune", "Queen's Club", "Rio de Janeiro",
+    "Rome", "Rotterdam", "Saint Petersburg", "San Diego", "Santiago", "Seoul", "Shanghai",
+    "Sofia", "Stockholm", "Stuttgart", "Sydney", "Tel Aviv", "Tokyo (Japan Open)", "Toronto",
+    "Umag", "United Cup", "US Open", "Vienna", "Washington", "Wimbledon", "Winston Salem", "Zhuhai"
+]
+
+TORNEIOS_WTA_PERMITIDOS = [
+    "Abu Dhabi WTA", "Adelaide", "Adelaide 2", "Andorra WTA", "Angers WTA", "Antalya 2 WTA", "Antalya 3 WTA",
+    "Antalya WTA", "Auckland", "Austin", "Australian Open", "Bad Homburg WTA", "Bari WTA", "Barranquilla",
+    "Bastad WTA", "Beijing", "Belgrade", "Belgrade WTA", "Berlin", "Birmingham", "Bogotá WTA", "Bol WTA", "Brisbane",
+    "Bucharest 2 WTA", "Budapest 2 WTA", "Budapest WTA", "Buenos Aires WTA", "Cali", "Cancún WTA", "Charleston",
+    "Charleston 2", "Charleston 3", "Charleston 4", "Chennai WTA", "Chicago 2 WTA", "Chicago 3 WTA", "Chicago WTA",
+    "Cincinnati WTA", "Cleveland WTA", "Cluj-Napoca 2 WTA", "Cluj-Napoca WTA", "Colina WTA", "Columbus WTA",
+    "Concord WTA", "Contrexeville WTA", "Courmayeur WTA", "Doha", "Dubai", "Eastbourne", "Florence WTA",
+    "Florianopolis WTA", "French Open", "Gaiba WTA", "Gdynia", "Grado", "Granby WTA", "Guadalajara 2 WTA",
+    "Guadalajara WTA", "Guangzhou", "Hamburg WTA", "Hertogenbosch", "Hobart", "Hong Kong 2 WTA", "Hong Kong WTA",
+    "Hua Hin 2 WTA", "Hua Hin WTA", "Iasi WTA", "Ilkley WTA", "Indian Wells", "Istanbul WTA", "Jiujiang",
+    "Karlsruhe", "Kozerki", "La Bisbal", "Lausanne", "Limoges", "Linz", "Livesport Prague Open", "Ljubljana WTA",
+    "Lleida", "Luxembourg WTA", "Lyon WTA", "Madrid WTA", "Makarska", "Marbella WTA", "Mérida", "Miami",
+    "Midland WTA", "Monastir", "Monterrey", "Montevideo WTA", "Montreal WTA", "Montreux WTA", "Moscow", "Mumbai WTA",
+    "Newport Beach WTA", "Ningbo WTA", "Nottingham", "Nur-Sultan WTA", "Osaka WTA", "Ostrava WTA", "Palermo",
+    "Paris WTA", "Parma", "Porto WTA", "Portoroz WTA", "Puerto Vallarta", "Queen's Club", "Rabat", "Reus WTA",
+    "Rome 2 WTA", "Rome WTA", "Rouen WTA", "Saint Petersburg WTA", "Saint-Malo WTA", "San Diego", "San Jose WTA",
+    "San Luis Potosi WTA", "Santa Cruz WTA", "Seoul WTA", "Singapore WTA", "Stanford WTA", "Strasbourg", "Stuttgart",
+    "Sydney", "Tallinn", "Tampico WTA", "Tenerife WTA", "Tokyo", "Toronto WTA", "US Open", "Valencia WTA",
+    "Vancouver WTA", "Warsaw 2 WTA", "Warsaw WTA", "Washington", "Wimbledon", "Wuhan", "Zhengzhou 2 WTA"
+]
+
+# Listas de permissão em casefold, calculadas uma vez (pertença em O(1) por link)
+PERMITIDOS = {
+    "ATP": frozenset(t.casefold() for t in TORNEIOS_ATP_PERMITIDOS),
+    "WTA": frozenset(t.casefold() for t in TORNEIOS_WTA_PERMITIDOS),
+}
+MARCADORES_TIPO = {"ATP": "/atp", "WTA": "/wta"}
+
+
+def _url_absoluto(href):
+    return BASE_URL + href if href.startswith("/") else href
+
+# As expressões XPath limitam o trabalho aos links e tabelas que interessam
+def torneios_de_html(conteudo, tipo="ATP"):
+    doc = documento_html(conteudo)
+    if doc is None:
+        return []
+    permitidos = PERMITIDOS.get(tipo, frozenset())
+    marcador = MARCADORES_TIPO.get(tipo)
+    if marcador is None:
+        return []
+    torneios = []
+    vistos = set()
+    for a in doc.xpath("//a[@href][contains(@href, $m)]", m=marcador):
+        nome = a.text_content().strip()
+        if nome.casefold() not in permitidos:
+            continue
+        url_full = _url_absoluto(a.get("href"))
+        if url_full not in vistos:
+            vistos.add(url_full)
+            torneios.append({"nome": nome, "url": url_full})
+    return torneios
+
+def nome_de_html(conteudo):
+    doc = documento_html(conteudo)
+    if doc is None:
+        return None
+    h1 = doc.find(".//h1")
+    if h1 is None:
+        return None
+    return re.sub(r"\s+", " ", "".join(t.strip() for t in h1.itertext()))
+
+def _float_ou_none(texto):
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+def linhas_de_html(conteudo):
+    # Devolve ([(jogador_a, jogador_b, odd_a, odd_b)], {nome curto: url do perfil}) da primeira tabela com jogos
+    doc = documento_html(conteudo)
+    if doc is None:
+        return [], {}
+    jogador_map = {
+        a.text_content().strip(): _url_absoluto(a.get("href"))
+        for a in doc.xpath("//a[starts-with(@href, '/player/')]")
+    }
+    linhas = []
+    for table in doc.iter("table"):
+        tbody = table.find(".//tbody")
+        if tbody is None:
+            continue
+        for tr in tbody.iter("tr"):
+            tds = list(tr.iter("td"))
+            if len(tds) < 7:
+                continue
+            parts = tds[2].text_content().strip().split("-")
+            if len(parts) != 2:
+                continue
+            odd_a = _float_ou_none(tds[5].text_content().strip())
+            odd_b = _float_ou_none(tds[6].text_content().strip())
+            if odd_a is None or odd_b is None:
+                odd_a = odd_b = None
+            p1, p2 = map(lambda s: limpar_numero_ranking(s.strip()), parts)
+            linhas.append((p1, p2, odd_a, odd_b))
+        if linhas:
+            break
+    return linhas, jogador_map
+
+
+def obter_torneios(tipo="ATP"):
+    with metricas.medir("torneios"):
+        return voo_unico.executar(("torneios", tipo), _obter_torneios, tipo)
+
+def _obter_torneios(tipo):
+    return torneios_de_html(cliente_http.obter(f"{BASE_URL}/matches/"), tipo)
+
+def obter_nome_completo(url_jogador):
+    if not url_jogador:
+        return None
+    try:
+        # O nome fica memorizado na entrada da cache HTTP, com a validade e os limites da fonte "jogadores"
+        return cliente_http.obter_processado(url_jogador, nome_de_html)
+    except Exception:
+        return None
+
+def resolver_nomes_completos(urls, max_workers=MAX_PERFIS_CONCORRENTES):
+    urls_unicos = list(dict.fromkeys(u for u in urls if u))
+    if not urls_unicos:
+        return {}
+    workers = max(1, min(max_workers, len(urls_unicos)))
+    with metricas.medir("perfis"), ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(urls_unicos, pool.map(metricas.propagar(obter_nome_completo), urls_unicos)))
+
+def obter_jogos_do_torneio(url_torneio):
+    # Sessões que carregam o mesmo torneio ao mesmo tempo partilham a mesma lista (não a alterar)
+    with metricas.medir("jogos"):
+        return voo_unico.executar(("jogos", url_torneio), _obter_jogos_do_torneio, url_torneio)
+
+def _obter_jogos_do_torneio(url_torneio):
+    jogos = []
+    linhas, jogador_map = linhas_de_html(cliente_http.obter(url_torneio))
+
+    # Jogadores já resolvidos no mapa de identidades não precisam do perfil; os restantes são obtidos
+    # uma única vez, em paralelo, antes de montar os jogos
+    mapa = identidades.mapa_padrao()
+    urls = [jogador_map.get(p) for p1, p2, _, _ in linhas for p in (p1, p2)]
+    conhecidos = {u: mapa.nome(u) for u in urls if u} if mapa is not None else {}
+    nomes_completos = resolver_nomes_completos(u for u in urls if not conhecidos.get(u))
+
+    def nome_mostrado(jogador):
+        url = jogador_map.get(jogador)
+        if conhecidos.get(url):
+            return conhecidos[url]
+        nome = reorganizar_nome(ajustar_nome(nomes_completos.get(url) or jogador))
+        if mapa is not None and nomes_completos.get(url):
+            mapa.registar_nome(url, nome)
+        return nome
+
+    for p1, p2, odd_a, odd_b in linhas:
+        nome1 = nome_mostrado(p1)
+        nome2 = nome_mostrado(p2)
+        jogos.append(
+            {
+                "label": f"{nome1} vs {nome2}",
+                "jogador_a": nome1,
+                "jogador_b": nome2,
+                "odd_a": odd_a,
+                "odd_b": odd_b,
+                "url_a": jogador_map.get(p1),
+                "url_b": jogador_map.get(p2),
+            }
+        )
+    return jogos
@@ -0,0 +1,137 @@
+# Simulação Monte Carlo da banca para uma sequência de apostas (registadas ou candidatas).
+#
+# Cada aposta tem a probabilidade do modelo, a odd e a stake (stake_por_faixa, em €). Cada caminho sorteia
+# o resultado de todas as apostas pela ordem dada; a ruína é absorvente (a banca deixa de apostar quando
+# desce a `limiar_ruina`). Os caminhos são gerados em blocos com memória limitada e o resultado só depende
+# da semente, do número de caminhos e das apostas.
+import numpy as np
+import pandas as pd
+
+from tennis_value.precos import stake_por_faixa_vetor
+
+CAMINHOS = 100_000
+BANCA_INICIAL = 1000.0
+MEMORIA_BLOCO = 64 * 1024 * 1024  # bytes por bloco de caminhos (matriz caminhos x apostas em float64)
+CAMINHOS_POR_BLOCO_MAX = 50_000
+CAMINHOS_POR_SEMENTE = 1024  # os blocos são múltiplos disto: o resultado não depende de `memoria`
+PERCENTIS = (1, 5, 25, 50, 75, 95, 99)
+SUFIXO_MAIS15 = "+1.5 sets"
+
+
+def prob_mais15(prob_jogo):
+    # P(ganhar pelo menos um set) num jogo à melhor de 3, com sets independentes de probabilidade s
+    # tal que prob_jogo = s²(3 - 2s); s obtido por bisseção (a função é monótona em [0, 1])
+    p = np.clip(np.asarray(prob_jogo, dtype=float), 0.0, 1.0)
+    baixo, alto = np.zeros_like(p), np.ones_like(p)
+    for _ in range(50):
+        s = (baixo + alto) / 2
+        acima = s * s * (3 - 2 * s) > p
+        alto = np.where(acima, s, alto)
+        baixo = np.where(acima, baixo, s)
+    s = (baixo + alto) / 2
+    return 1 - (1 - s) ** 2
+
+
+def apostas_do_historico(df):
+    # (prob, odd, stake) das apostas do livro por ordem de registo. Sem "prob" guardada usa-se a
+    # probabilidade implícita 1/odd (valor esperado nulo); apostas "+1.5 sets" convertem a
+    # probabilidade de vitória do jogo com prob_mais15. Devolve também o número de apostas sem prob.
+    if df.empty:
+        vazio = np.array([], dtype=float)
+        return vazio, vazio, vazio, 0
+    odd = pd.to_numeric(df["odd"], errors="coerce").to_numpy(dtype=float)
+    stake = pd.to_numeric(df["stake"], errors="coerce").to_numpy(dtype=float)
+    prob_col = df["prob"] if "prob" in df.columns else pd.Series(np.nan, index=df.index)
+    prob = pd.to_numeric(prob_col.replace("", np.nan), errors="coerce").to_numpy(dtype=float)
+    mais15 = df["aposta"].astype(str).str.endswith(SUFIXO_MAIS15).to_numpy()
+    sem_prob = np.isnan(prob)
+    prob = np.where(mais15 & ~sem_prob, prob_mais15(np.nan_to_num(prob)), prob)
+    prob = np.where(sem_prob, 1 / odd, prob)
+    validas = ~np.isnan(odd + stake + prob) & (odd > 1) & (stake > 0)
+    return prob[validas], odd[validas], stake[validas], int((sem_prob & validas).sum())
+
+
+def apostas_candidatas(prob, odd, valor, **kwargs):
+    # Apostas candidatas com a política de stake da app (stake_por_faixa; stake 0 fica de fora)
+    prob, odd = np.asarray(prob, dtype=float), np.asarray(odd, dtype=float)
+    stake = stake_por_faixa_vetor(np.asarray(valor, dtype=float), **kwargs)
+    com_stake = stake > 0
+    return prob[com_stake], odd[com_stake], stake[com_stake]
+
+
+def apostas_da_avaliacao(av, **kwargs):
+    # Apostas candidatas de uma avaliação (precos.avaliar_jogos): os dois lados de cada jogo, só os com
+    # valor. Nos lados com sugestão +1.5 sets (especial_*) a aposta é essa, como na tabela de valor: odd
+    # +1.5 e probabilidade prob_mais15; a stake é a do lado
+    probs, odds, valores = [], [], []
+    for lado in ("a", "b"):
+        especial = av[f"especial_{lado}"].to_numpy(dtype=bool)
+        prob = av[f"prob_{lado}"].to_numpy(dtype=float)
+        probs.append(np.where(especial, prob_mais15(prob), prob))
+        odds.append(np.where(especial, av[f"odd_mais15_{lado}"].to_numpy(dtype=float),
+                             av[f"odd_{lado}"].to_numpy(dtype=float)))
+        valores.append(av[f"valor_{lado}"].where(av[f"com_valor_{lado}"]).to_numpy(dtype=float))
+    return apostas_candidatas(np.concatenate(probs), np.concatenate(odds), np.concatenate(valores), **kwargs)
+
+
+def _caminhos_por_bloco(n_apostas, memoria=MEMORIA_BLOCO):
+    # Duas matrizes caminhos x apostas vivas ao mesmo tempo (sorteios e banca)
+    caminhos = min(CAMINHOS_POR_BLOCO_MAX, memoria // (16 * max(1, n_apostas)))
+    return int(max(1, caminhos // CAMINHOS_POR_SEMENTE)) * CAMINHOS_POR_SEMENTE
+
+
+def simular_banca(prob, odd, stake, banca_inicial=BANCA_INICIAL, caminhos=CAMINHOS, semente=0,
+                  limiar_ruina=0.0, memoria=MEMORIA_BLOCO):
+    # Devolve {"banca_final", "drawdown_max" (arrays float32 por caminho), "prob_ruina", "prob_prejuizo",
+    #          "percentis_banca", "percentis_drawdown", "media_banca", "lucro_esperado"}
+    prob = np.asarray(prob, dtype=float)
+    odd = np.asarray(odd, dtype=float)
+    stake = np.asarray(stake, dtype=float)
+    n = len(prob)
+    ganho = stake * (odd - 1)
+
+    finais = np.empty(caminhos, dtype=np.float32)
+    drawdowns = np.empty(caminhos, dtype=np.float32)
+    arruinados = np.zeros(caminhos, dtype=bool)
+    por_bloco = _caminhos_por_bloco(n, memoria)
+    # Uma semente filha por cada CAMINHOS_POR_SEMENTE caminhos: reprodutível com qualquer tamanho de bloco
+    sementes = np.random.SeedSequence(semente).spawn(-(-caminhos // CAMINHOS_POR_SEMENTE))
+    for inicio in range(0, caminhos, por_bloco):
+        fim = min(caminhos, inicio + por_bloco)
+        if n == 0:
+            finais[inicio:fim] = banca_inicial
+            drawdowns[inicio:fim] = 0.0
+            continue
+        sorteios = np.empty((fim - inicio, n))
+        for parte in range(inicio, fim, CAMINHOS_POR_SEMENTE):
+            rng = np.random.default_rng(sementes[parte // CAMINHOS_POR_SEMENTE])
+            rng.random(out=sorteios[parte - inicio:min(fim, parte + CAMINHOS_POR_SEMENTE) - inicio])
+        ganhou = sorteios < prob
+        del sorteios
+        banca = banca_inicial + np.cumsum(np.where(ganhou, ganho, -stake), axis=1)
+        del ganhou
+        # Ruína absorvente: a partir da primeira aposta em que a banca chega ao limiar, fica congelada
+        # (no valor dessa aposta, que pode ficar abaixo do limiar se a stake era maior do que a banca)
+        abaixo = banca <= limiar_ruina
+        ruina = abaixo.any(axis=1)
+        if ruina.any():
+            primeira = abaixo.argmax(axis=1)
+            congelada = np.take_along_axis(banca, primeira[:, None], axis=1)
+            depois = np.arange(n)[None, :] > primeira[:, None]
+            banca = np.where(ruina[:, None] & depois, congelada, banca)
+        del abaixo
+        pico = np.maximum(np.maximum.accumulate(banca, axis=1), banca_inicial)
+        drawdowns[inicio:fim] = (pico - banca).max(axis=1)
+        finais[inicio:fim] = banca[:, -1]
+        arruinados[inicio:fim] = ruina
+
+    return {
+        "banca_final": finais,
+        "drawdown_max": drawdowns,
+        "prob_ruina": float(arruinados.mean()) if caminhos else 0.0,
+        "prob_prejuizo": float((finais < banca_inicial).mean()) if caminhos else 0.0,
+        "percentis_banca": dict(zip(PERCENTIS, np.percentile(finais, PERCENTIS).tolist())),
+        "percentis_drawdown": dict(zip(PERCENTIS, np.percentile(drawdowns, PERCENTIS).tolist())),
+        "media_banca": float(finais.mean()) if caminhos else banca_inicial,
+        "lucro_esperado": float(np.sum(prob * ganho - (1 - prob) * stake)),
+    }
@@ -0,0 +1,184 @@
+# Varre todos os torneios ATP/WTA ativos em paralelo e produz um relatório único de apostas com valor.
+#
+#   python -m tennis_value.varrer --tipo ATP WTA --formato csv --saida valor.csv
+#   python -m tennis_value.varrer --tipo ATP --superficie-torneio "Madrid=Clay" --concorrencia 8
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from tennis_value import identidades, metricas, ratings, scrapers
+from tennis_value.odds_historico import registo_padrao
+from tennis_value.precos import avaliar_jogos
+
+SUPERFICIES = ("Hard", "Clay", "Grass")
+SUPERFICIE_PADRAO = "Hard"
+
+# Superfície de omissão dos torneios que não são em piso duro (sobreponível com --superficie-torneio)
+SUPERFICIES_TORNEIOS = {
+    "Barcelona": "Clay", "Bastad": "Clay", "Bastad WTA": "Clay", "Bogotá WTA": "Clay", "Bucharest": "Clay",
+    "Buenos Aires": "Clay", "Charleston": "Clay", "Cordoba": "Clay", "Estoril": "Clay", "French Open": "Clay",
+    "Geneva": "Clay", "Gstaad": "Clay", "Hamburg": "Clay", "Hamburg WTA": "Clay", "Houston": "Clay",
+    "Kitzbühel": "Clay", "Madrid": "Clay", "Madrid WTA": "Clay", "Marrakech": "Clay", "Monte Carlo": "Clay",
+    "Munich": "Clay", "Palermo": "Clay", "Rabat": "Clay", "Rio de Janeiro": "Clay", "Rome": "Clay",
+    "Rome WTA": "Clay", "Santiago": "Clay", "Strasbourg": "Clay", "Umag": "Clay",
+    "Bad Homburg WTA": "Grass", "Berlin": "Grass", "Birmingham": "Grass", "Eastbourne": "Grass",
+    "Halle": "Grass", "Hertogenbosch": "Grass", "Mallorca": "Grass", "Newport": "Grass",
+    "Nottingham": "Grass", "Queen's Club": "Grass", "Wimbledon": "Grass",
+}
+
+COLUNAS_RELATORIO = [
+    "competicao", "torneio", "superficie", "jogo", "aposta", "odd", "valor", "stake", "prob", "especial",
+]
+
+
+def superficie_do_torneio(nome, mapa, padrao=SUPERFICIE_PADRAO):
+    # mapa com chaves em casefold (ver varrer)
+    return mapa.get(nome.casefold(), padrao)
+
+def carregar_ratings(tipo):
+    elo_df = ratings.obter_elo_table(tipo)
+    yelo_df = ratings.obter_yelo_table(tipo)
+    if elo_df is None or yelo_df is None or elo_df.empty or yelo_df.empty:
+        raise RuntimeError(f"bases Elo/yElo vazias para {tipo}")
+    with metricas.medir("indice_ratings"):
+        return ratings.PlayerRatings(elo_df, yelo_df, identidades=identidades.mapa_padrao())
+
+def apostas_com_valor(avaliacao):
+    # Converte a avaliação (uma linha por jogo) em apostas (uma linha por lado com valor),
+    # com a mesma regra da análise automática: +1.5 sets quando o lado é especial.
+    partes = []
+    for lado in ("a", "b"):
+        sel = avaliacao[avaliacao[f"com_valor_{lado}"] & (avaliacao[f"stake_{lado}"] > 0)]
+        if sel.empty:
+            continue
+        especial = sel[f"especial_{lado}"].to_numpy()
+        jogador = sel[f"jogador_{lado}"]
+        partes.append(pd.DataFrame({
+            "jogo": sel["jogador_a"] + " vs " + sel["jogador_b"],
+            "aposta": np.where(especial, jogador + " +1.5 sets", jogador),
+            "odd": np.where(especial, sel[f"odd_mais15_{lado}"], sel[f"odd_{lado}"]),
+            "valor": sel[f"valor_{lado}"],
+            "stake": sel[f"stake_{lado}"],
+            "prob": sel[f"prob_{lado}"],
+            "especial": especial,
+        }))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO[3:])
+    return pd.concat(partes, ignore_index=True)
+
+def varrer_torneio(tipo, torneio, superficie, ratings_jog, registo=None):
+    jogos = scrapers.obter_jogos_do_torneio(torneio["url"])
+    if registo is not None and jogos:
+        registo.registar(torneio["url"], jogos, torneio["nome"], tipo)
+    if not jogos:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+    apostas = apostas_com_valor(avaliar_jogos(jogos, ratings_jog, superficie))
+    apostas.insert(0, "competicao", tipo)
+    apostas.insert(1, "torneio", torneio["nome"])
+    apostas.insert(2, "superficie", superficie)
+    return apostas
+
+def varrer(tipos=("ATP", "WTA"), mapa_superficies=None, superficie_padrao=SUPERFICIE_PADRAO,
+           concorrencia=4, avisar=None, registo=None):
+    mapa = {nome.casefold(): sup for nome, sup in SUPERFICIES_TORNEIOS.items()}
+    mapa.update({nome.casefold(): sup for nome, sup in (mapa_superficies or {}).items()})
+    avisar = avisar or (lambda msg: None)
+
+    tarefas = []
+    for tipo in tipos:
+        try:
+            ratings_jog = carregar_ratings(tipo)
+            torneios = scrapers.obter_torneios(tipo)
+        except Exception as e:
+            avisar(f"{tipo}: {e}")
+            continue
+        for torneio in torneios:
+            superficie = superficie_do_torneio(torneio["nome"], mapa, superficie_padrao)
+            tarefas.append((tipo, torneio, superficie, ratings_jog))
+
+    resultados = []
+    with ThreadPoolExecutor(max_workers=max(1, concorrencia)) as pool:
+        futuros = {pool.submit(metricas.propagar(varrer_torneio), *t, registo=registo): t for t in tarefas}
+        for futuro in as_completed(futuros):
+            tipo, torneio = futuros[futuro][:2]
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                avisar(f"{tipo} {torneio['nome']}: {e}")
+
+    resultados = [r for r in resultados if not r.empty]
+    if not resultados:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+    relatorio = pd.concat(resultados, ignore_index=True)[COLUNAS_RELATORIO]
+    return relatorio.sort_values(["valor", "stake"], ascending=False, ignore_index=True)
+
+def escrever_relatorio(relatorio, formato, saida):
+    if formato == "csv":
+        texto = relatorio.to_csv(index=False)
+    elif formato == "json":
+        texto = json.dumps(relatorio.to_dict(orient="records"), ensure_ascii=False, indent=2, default=float)
+    else:
+        if relatorio.empty:
+            texto = "Nenhuma aposta com valor encontrada.\n"
+        else:
+            tabela = relatorio.assign(
+                odd=relatorio["odd"].map("{:.2f}".format),
+                valor=(relatorio["valor"] * 100).map("{:.1f}%".format),
+                stake=relatorio["stake"].map("€{:.2f}".format),
+                prob=(relatorio["prob"] * 100).map("{:.1f}%".format),
+            )
+            texto = tabela.to_string(index=False) + "\n"
+    if saida in (None, "-"):
+        sys.stdout.write(texto)
+    else:
+        with open(saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+def _par_superficie(texto):
+    nome, _, superficie = texto.rpartition("=")
+    if not nome or superficie not in SUPERFICIES:
+        raise argparse.ArgumentTypeError(f"esperado TORNEIO=SUPERFICIE com SUPERFICIE em {SUPERFICIES}: {texto!r}")
+    return nome, superficie
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatório de apostas com valor em todos os torneios ativos.")
+    parser.add_argument("--tipo", nargs="+", choices=["ATP", "WTA"], default=["ATP", "WTA"])
+    parser.add_argument("--concorrencia", type=int, default=4, help="torneios processados em paralelo")
+    parser.add_argument("--superficie", choices=SUPERFICIES, default=SUPERFICIE_PADRAO,
+                        help="superfície dos torneios sem mapeamento")
+    parser.add_argument("--superficie-torneio", type=_par_superficie, action="append", default=[],
+                        metavar="TORNEIO=SUPERFICIE", help="pode repetir-se")
+    parser.add_argument("--mapa-superficies", help="ficheiro JSON {torneio: superfície}")
+    parser.add_argument("--formato", choices=["tabela", "csv", "json"], default="tabela")
+    parser.add_argument("--saida", default="-", help="ficheiro de saída (omissão: stdout)")
+    parser.add_argument("--sem-registo-odds", action="store_true",
+                        help="não guardar as odds observadas no histórico de odds")
+    args = parser.parse_args(argv)
+
+    mapa = {}
+    if args.mapa_superficies:
+        with open(args.mapa_superficies, encoding="utf-8") as f:
+            mapa.update(json.load(f))
+    mapa.update(dict(args.superficie_torneio))
+
+    metricas.configurar_log()
+    medicoes = metricas.ativar(metricas.Medicoes())
+    inicio = time.perf_counter()
+    relatorio = varrer(
+        args.tipo, mapa, args.superficie, args.concorrencia,
+        avisar=lambda msg: print(f"aviso: {msg}", file=sys.stderr),
+        registo=None if args.sem_registo_odds else registo_padrao(),
+    )
+    escrever_relatorio(relatorio, args.formato, args.saida)
+    metricas.emitir_resumo(medicoes)
+    print(f"{len(relatorio)} apostas com valor em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
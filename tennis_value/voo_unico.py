@@ -0,0 +1,81 @@
+# Pedidos em voo único ("single-flight") partilhados por todo o processo.
+#
+# Quando várias sessões da app pedem ao mesmo tempo o mesmo recurso (o mesmo URL, a mesma página
+# processada, os jogos do mesmo torneio), só a primeira chamada executa o trabalho; as outras esperam por
+# ela e recebem o mesmo resultado (ou a mesma exceção). Nada fica guardado depois de o voo terminar: o
+# reaproveitamento entre pedidos não simultâneos continua a ser das caches.
+import threading
+
+from tennis_value import metricas
+
+
+class _Voo:
+    __slots__ = ("evento", "resultado", "erro", "thread", "seguidores")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.thread = threading.get_ident()
+        self.seguidores = 0
+
+
+class VooUnico:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._voos = {}
+        self.executados = 0
+        self.partilhados = 0
+
+    def executar(self, chave, func, *args, **kwargs):
+        with self._lock:
+            voo = self._voos.get(chave)
+            if voo is None:
+                voo = self._voos[chave] = _Voo()
+                self.executados += 1
+                lider = True
+            elif voo.thread == threading.get_ident():
+                # Chamada encaixada com a mesma chave na thread do voo: esperar por si própria bloquearia
+                voo = None
+            else:
+                voo.seguidores += 1
+                self.partilhados += 1
+                lider = False
+        if voo is None:
+            return func(*args, **kwargs)
+        if lider:
+            return self._liderar(chave, voo, func, args, kwargs)
+        metricas.contar_partilhado()
+        voo.evento.wait()
+        if voo.erro is not None:
+            raise voo.erro
+        return voo.resultado
+
+    def _liderar(self, chave, voo, func, args, kwargs):
+        try:
+            voo.resultado = func(*args, **kwargs)
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                if self._voos.get(chave) is voo:
+                    del self._voos[chave]
+            voo.evento.set()
+
+    def estatisticas(self):
+        # {"executados", "partilhados", "em_voo"} desde o arranque do processo
+        with self._lock:
+            return {"executados": self.executados, "partilhados": self.partilhados, "em_voo": len(self._voos)}
+
+
+voos = VooUnico()
+
+
+def executar(chave, func, *args, **kwargs):
+    return voos.executar(chave, func, *args, **kwargs)
+
+
+def estatisticas():
+    return voos.estatisticas()
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tennis_value.gravacoes import PastaGravacoes, instalar
+
+URL = "https://www.tennisexplorer.com/matches/"
+
+
+def _sessao(pasta, taxa_falhas, semente, tentativas=3):
+    sessao = requests.Session()
+    sessao.mount("https://", HTTPAdapter(max_retries=Retry(total=tentativas, backoff_factor=0)))
+    PastaGravacoes(str(pasta)).gravar(URL, 200, {"Content-Type": "text/html"}, b"<html>ok</html>")
+    instalar(sessao, "reproduzir", str(pasta), taxa_falhas=taxa_falhas, semente=semente)
+    return sessao
+
+
+def test_falha_injetada_e_repetida(tmp_path):
+    # Semente cujo primeiro sorteio falha e o segundo não
+    semente = next(s for s in range(1000)
+                   if (lambda rng: rng.random() < 0.5 <= rng.random())(random.Random(s)))
+    r = _sessao(tmp_path, 0.5, semente).get(URL)
+    assert r.status_code == 200
+    assert r.content == b"<html>ok</html>"
+
+
+def test_falhas_esgotam_as_tentativas(tmp_path):
+    sessao = _sessao(tmp_path, 1.0, 0, tentativas=2)
+    with pytest.raises(requests.ConnectionError):
+        sessao.get(URL)
@@ -0,0 +1,30 @@
+from tennis_value.historico import LivroApostas
+
+CSV_VALIDO = "data,evento,aposta,odd,stake,resultado\n2024-05-01,A vs B,A,2.1,5,ganhou\n"
+
+
+def test_csv_ilegivel_nao_impede_o_livro_nem_marca_migracao(tmp_path):
+    csv = tmp_path / "historico_apostas.csv"
+    db = str(tmp_path / "historico.sqlite")
+    # latin-1 com um campo a mais: nem UTF-8 nem CSV válido
+    csv.write_bytes("data,evento,aposta\n2024-05-01,Müller vs Ćorić,Müller,extra\n".encode("cp1250"))
+
+    livro = LivroApostas(db, str(csv))
+    assert livro.aviso_migracao
+    assert livro.contar() == 0
+    assert not livro._migrado()
+
+    # Corrigido o ficheiro, o arranque seguinte importa o histórico
+    csv.write_text(CSV_VALIDO, encoding="utf-8")
+    livro = LivroApostas(db, str(csv))
+    assert livro.aviso_migracao is None
+    assert livro.contar() == 1
+    assert livro._migrado()
+
+
+def test_csv_mal_formado(tmp_path):
+    csv = tmp_path / "historico_apostas.csv"
+    csv.write_text("data,evento\n2024-05-01,A vs B\n2024-05-02,C vs D,x,y\n", encoding="utf-8")
+    livro = LivroApostas(str(tmp_path / "historico.sqlite"), str(csv))
+    assert livro.aviso_migracao
+    assert not livro._migrado()
@@ -0,0 +1,24 @@
+from tennis_value.odds_historico import RegistoOdds
+
+URL = "https://www.tennisexplorer.com/roland-garros/2024/atp-men/"
+
+
+def _jogo(a, b, odd_a, odd_b):
+    return {"jogador_a": a, "jogador_b": b, "odd_a": odd_a, "odd_b": odd_b}
+
+
+def test_so_grava_quando_as_odds_mudam(tmp_path):
+    caminho = str(tmp_path / "odds.sqlite")
+    registo = RegistoOdds(caminho)
+    assert registo.registar(URL, [_jogo("A", "B", 1.8, 2.0), _jogo("C", "D", 1.5, 2.6)], ts=100) == 2
+    assert registo.registar(URL, [_jogo("A", "B", 1.8, 2.0), _jogo("C", "D", 1.5, 2.6)], ts=110) == 0
+    assert registo.registar(URL, [_jogo("A", "B", 1.7, 2.1), _jogo("C", "D", 1.5, 2.6)], ts=120) == 1
+    assert registo.estatisticas()["observacoes"] == 3
+    assert registo.movimento_jogo(URL, "A", "B")["odd_a"].tolist() == [1.8, 1.7]
+    registo.fechar()
+
+    # Outro processo parte das últimas odds guardadas na base
+    registo = RegistoOdds(caminho)
+    assert registo.registar(URL, [_jogo("A", "B", 1.7, 2.1), _jogo("C", "D", 1.5, 2.5)], ts=130) == 1
+    assert registo.estatisticas()["observacoes"] == 4
+    registo.fechar()
@@ -0,0 +1,21 @@
+import numpy as np
+
+from tennis_value.precos import FAIXAS_STAKE, regras_aposta
+
+FAIXAS_ALT = ((0.08, 2.0), (float("inf"), 6.0))
+
+
+def test_regras_por_configuracao_iguais_as_de_cada_politica():
+    valor = np.array([np.nan, 0.02, 0.05, 0.09, 0.12, 0.2, 0.3])
+    odd = np.array([2.0, 1.6, 2.5, 2.8, 1.9, 3.0, 2.2])
+    configs = [(0.045, 0.275, 1.425, 3.15, FAIXAS_STAKE, 2.45), (0.03, 0.2, 1.5, 2.9, FAIXAS_ALT, 2.3)]
+    coluna = lambda i: np.array([c[i] for c in configs])[:, None]
+    matriz = regras_aposta(
+        np.broadcast_to(valor, (2, len(valor))), np.broadcast_to(odd, (2, len(odd))),
+        valor_min=coluna(0), valor_max=coluna(1), odd_min=coluna(2), odd_max=coluna(3),
+        faixas=[c[4] for c in configs], mais15_odd_min=coluna(5),
+    )
+    for i, (valor_min, valor_max, odd_min, odd_max, faixas, mais15_min) in enumerate(configs):
+        linha = regras_aposta(valor, odd, valor_min, valor_max, odd_min, odd_max, faixas, mais15_odd_min=mais15_min)
+        for m, l in zip(matriz, linha):
+            np.testing.assert_array_equal(m[i], l)
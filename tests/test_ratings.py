@@ -0,0 +1,40 @@
+import pandas as pd
+
+from tennis_value.identidades import ORIGEM_EXATO, MapaIdentidades
+from tennis_value.nomes import normalizar_nome
+from tennis_value.ratings import PlayerRatings
+
+URL = "https://www.tennisexplorer.com/player/pliskova-2/"
+
+
+def _ratings(nomes, identidades):
+    chaves = [normalizar_nome(n) for n in nomes]
+    elo = pd.DataFrame({"Player": nomes, "chave": chaves, "Elo": 1800.0, "hElo": 1800.0,
+                        "cElo": 1800.0, "gElo": 1800.0})
+    yelo = pd.DataFrame({"Player": nomes, "chave": chaves, "yElo": 1800.0})
+    return PlayerRatings(elo, yelo, identidades=identidades)
+
+
+def test_associacao_aproximada_substituida_por_acerto_exato(tmp_path):
+    mapa = MapaIdentidades(str(tmp_path / "identidades.sqlite"))
+
+    # Dia 1: Kristyna não está nos ratings e fica associada (aproximadamente) a Karolina
+    dia1 = _ratings(["Karolina Pliskova", "Iga Swiatek"], mapa)
+    assert dia1.nomes[dia1.procurar("Kristyna Pliskova", URL)] == "Karolina Pliskova"
+    assert mapa.obter(URL).chave == "karolina pliskova"
+    assert mapa.obter(URL).confianca < 1.0
+
+    # Dia 2: Kristyna já está nos ratings
+    dia2 = _ratings(["Karolina Pliskova", "Kristyna Pliskova", "Iga Swiatek"], mapa)
+    assert dia2.nomes[dia2.procurar("Kristyna Pliskova", URL)] == "Kristyna Pliskova"
+    assert mapa.obter(URL).chave == "kristyna pliskova"
+    assert mapa.obter(URL).confianca == 1.0
+    assert mapa.obter(URL).origem == ORIGEM_EXATO
+
+
+def test_associacao_aproximada_mantida_sem_acerto_exato(tmp_path):
+    mapa = MapaIdentidades(str(tmp_path / "identidades.sqlite"))
+    _ratings(["Karolina Pliskova"], mapa).procurar("Kristyna Pliskova", URL)
+
+    dia2 = _ratings(["Karolina Pliskova", "Iga Swiatek"], mapa)
+    assert dia2.nomes[dia2.procurar("Kristyna Pliskova", URL)] == "Karolina Pliskova"